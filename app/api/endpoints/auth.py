@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-import requests
 from app.core.config import settings
 from app.schemas.auth import LoginRequest, Token, UserInfo
 from app.core.auth import get_current_user, User
@@ -12,6 +11,9 @@ async def login(login_request: LoginRequest):
     Endpoint para autenticação de usuários.
     Envia as credenciais para o Keycloak e retorna o token.
     """
+    # Importação adiada: requests não é carregado na inicialização
+    import requests
+
     keycloak_token_url = f"{settings.KEYCLOAK_SERVER_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/token"
 
     # Dados para enviar ao Keycloak
@@ -67,6 +69,9 @@ async def refresh_token(refresh_token: str):
     """
     Endpoint para atualizar um token expirado usando refresh_token.
     """
+    # Importação adiada: requests não é carregado na inicialização
+    import requests
+
     keycloak_token_url = f"{settings.KEYCLOAK_SERVER_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/token"
 
     # Dados para enviar ao Keycloak
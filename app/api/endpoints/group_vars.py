@@ -1,12 +1,15 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app.db.session import get_session
 from app.models.inventory import GroupVar
 from app.schemas.inventory import GroupVarCreate, GroupVarRead, GroupVarUpdate
+from app.services.export_service import ExportService
 from app.services.group_var_service import GroupVarService
 from app.services.group_service import GroupService
+from app.services.projection import fields_param
 
 router = APIRouter()
 
@@ -34,6 +37,29 @@ def create_group_var(group_var: GroupVarCreate, session: Session = Depends(get_s
     return GroupVarService.create(session=session, group_var_create=group_var)
 
 
+@router.get("/", response_model=List[GroupVarRead])
+def read_group_vars_by_groups(
+    group_ids: List[int] = Query(...),
+    session: Session = Depends(get_session)
+):
+    """Retorna as variáveis de vários grupos em uma única consulta."""
+    return GroupVarService.get_all_by_groups(session=session, group_ids=group_ids)
+
+
+@router.get("/export.ndjson", response_class=StreamingResponse)
+def export_group_vars_ndjson(
+    request: Request,
+    selected: Optional[List[str]] = Depends(fields_param(GroupVarRead)),
+    session: Session = Depends(get_session)
+):
+    """
+    Exporta as variáveis de todos os grupos em NDJSON, uma variável por
+    linha com o `group_id`. Valores criptografados saem como armazenados
+    (vault). Aceita `fields` e `Accept-Encoding: gzip`.
+    """
+    return ExportService.stream(session, request, GroupVar, selected or list(GroupVarRead.model_fields))
+
+
 @router.get("/group/{group_id}", response_model=List[GroupVarRead])
 def read_group_vars_by_group(group_id: int, session: Session = Depends(get_session)):
     # Verificar se o grupo existe
@@ -1,11 +1,22 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
+from app.core.response_cache import cache_roles, group_tags, list_tags, response_cache
 from app.db.session import get_session
 from app.models.inventory import Group
-from app.schemas.inventory import GroupCreate, GroupRead, GroupUpdate, GroupWithDetails
-from app.services.group_service import GroupService
+from app.schemas.inventory import (
+    GroupCreate, GroupRead, GroupUpdate, GroupWithDetails, GroupVarRead,
+    DynamicGroupRuleCreate, DynamicGroupRuleRead
+)
+from app.services.export_service import ExportService
+from app.services.group_service import GroupService, parse_group_includes
+from app.services.group_var_service import GroupVarService
+from app.services.dynamic_group_service import DynamicGroupService
+from app.services.inventory_graph_service import inventory_graph
+from app.services.projection import fields_param
 
 router = APIRouter()
 
@@ -22,23 +33,85 @@ def create_group(group: GroupCreate, session: Session = Depends(get_session)):
 
 @router.get("/", response_model=List[GroupRead])
 def read_groups(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    selected: Optional[List[str]] = Depends(fields_param(GroupRead)),
+    session: Session = Depends(get_session),
+    roles: List[str] = Depends(cache_roles)
+):
+    """
+    Lista os grupos. Com `fields` (por exemplo `fields=name`), apenas essas
+    colunas (e o `id`) são consultadas e retornadas.
+    """
+
+    def compute():
+        if inventory_graph.is_enabled():
+            groups = inventory_graph.get_groups(session=session, skip=skip, limit=limit)
+            if selected is not None:
+                return jsonable_encoder([{name: getattr(group, name) for name in selected}
+                                        for group in groups])
+        else:
+            groups = GroupService.get_all(
+                session=session, skip=skip, limit=limit, fields=selected)
+            if selected is not None:
+                return jsonable_encoder(groups)
+        return jsonable_encoder([GroupRead.model_validate(group) for group in groups])
+
+    return response_cache.serve(request, roles, compute, list_tags("group", ("groups",)))
+
+
+@router.get("/export.ndjson", response_class=StreamingResponse)
+def export_groups_ndjson(
+    request: Request,
+    selected: Optional[List[str]] = Depends(fields_param(GroupRead)),
     session: Session = Depends(get_session)
 ):
-    groups = GroupService.get_all(session=session, skip=skip, limit=limit)
-    return groups
+    """
+    Exporta todos os grupos em NDJSON, um grupo por linha com o
+    `parent_group_id`, sem os hosts nem os subgrupos. Aceita `fields` e
+    `Accept-Encoding: gzip` como a exportação de hosts.
+    """
+    return ExportService.stream(session, request, Group, selected or list(GroupRead.model_fields))
 
 
 @router.get("/{group_id}", response_model=GroupWithDetails)
-def read_group(group_id: int, session: Session = Depends(get_session)):
-    db_group = GroupService.get_by_id(session=session, group_id=group_id)
-    if db_group is None:
+def read_group(
+    request: Request,
+    group_id: int,
+    depth: Optional[int] = Query(None, ge=0),
+    include: Optional[str] = None,
+    session: Session = Depends(get_session),
+    roles: List[str] = Depends(cache_roles)
+):
+    """
+    Retorna o grupo com a sua subárvore. `depth` limita os níveis de subgrupos
+    (0 = sem subgrupos; omitido = árvore completa) e `include` seleciona as
+    relações (hosts, variables, children), por exemplo `include=hosts,children`.
+    """
+    try:
+        relations = parse_group_includes(include)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Grupo com ID {group_id} não encontrado"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-    return db_group
+
+    def compute():
+        if inventory_graph.is_enabled():
+            db_group = inventory_graph.get_group(
+                session=session, group_id=group_id, depth=depth, include=relations)
+        else:
+            db_group = GroupService.get_details(
+                session=session, group_id=group_id, depth=depth, include=relations)
+        if db_group is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Grupo com ID {group_id} não encontrado"
+            )
+        return jsonable_encoder(GroupWithDetails.model_validate(db_group))
+
+    return response_cache.serve(request, roles, compute, group_tags)
 
 
 @router.put("/{group_id}", response_model=GroupRead)
@@ -56,6 +129,75 @@ def update_group(
     return db_group
 
 
+@router.put("/{group_id}/vars", response_model=List[GroupVarRead])
+def replace_group_vars(
+    group_id: int,
+    values: Dict[str, str] = Body(...),
+    session: Session = Depends(get_session)
+):
+    """
+    Substitui todo o mapa de variáveis do grupo. Apenas as inclusões,
+    alterações e exclusões necessárias são aplicadas, em uma única transação.
+    """
+    db_group = GroupService.get_by_id(session=session, group_id=group_id)
+    if db_group is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Grupo com ID {group_id} não encontrado"
+        )
+    return GroupVarService.replace_all(session=session, group_id=group_id, values=values)
+
+
+@router.get("/{group_id}/rules", response_model=List[DynamicGroupRuleRead])
+def read_group_rules(group_id: int, session: Session = Depends(get_session)):
+    """Retorna as regras do grupo dinâmico (lista vazia para grupos estáticos)."""
+    db_group = GroupService.get_by_id(session=session, group_id=group_id)
+    if db_group is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Grupo com ID {group_id} não encontrado"
+        )
+    return DynamicGroupService.get_rules(session=session, group_id=group_id)
+
+
+@router.put("/{group_id}/rules", response_model=List[DynamicGroupRuleRead])
+def replace_group_rules(
+    group_id: int,
+    rules: List[DynamicGroupRuleCreate],
+    session: Session = Depends(get_session)
+):
+    """
+    Define as regras do grupo, tornando-o dinâmico. As regras são combinadas
+    com E, e a associação de hosts é recalculada e mantida automaticamente.
+    """
+    db_group = GroupService.get_by_id(session=session, group_id=group_id)
+    if db_group is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Grupo com ID {group_id} não encontrado"
+        )
+    try:
+        return DynamicGroupService.set_rules(session=session, group_id=group_id, rules=rules)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.delete("/{group_id}/rules", status_code=status.HTTP_204_NO_CONTENT)
+def delete_group_rules(group_id: int, session: Session = Depends(get_session)):
+    """Remove as regras; o grupo volta a ser estático com a associação atual."""
+    db_group = GroupService.get_by_id(session=session, group_id=group_id)
+    if db_group is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Grupo com ID {group_id} não encontrado"
+        )
+    DynamicGroupService.clear_rules(session=session, group_id=group_id)
+    return None
+
+
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_group(group_id: int, session: Session = Depends(get_session)):
     success = GroupService.delete(session=session, group_id=group_id)
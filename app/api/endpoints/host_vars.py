@@ -1,12 +1,15 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app.db.session import get_session
 from app.models.inventory import HostVar
 from app.schemas.inventory import HostVarCreate, HostVarRead, HostVarUpdate
+from app.services.export_service import ExportService
 from app.services.host_var_service import HostVarService
 from app.services.host_service import HostService
+from app.services.projection import fields_param
 
 router = APIRouter()
 
@@ -34,6 +37,30 @@ def create_host_var(host_var: HostVarCreate, session: Session = Depends(get_sess
     return HostVarService.create(session=session, host_var_create=host_var)
 
 
+@router.get("/", response_model=List[HostVarRead])
+def read_host_vars_by_hosts(
+    host_ids: List[int] = Query(...),
+    session: Session = Depends(get_session)
+):
+    """Retorna as variáveis de vários hosts em uma única consulta."""
+    return HostVarService.get_all_by_hosts(session=session, host_ids=host_ids)
+
+
+@router.get("/export.ndjson", response_class=StreamingResponse)
+def export_host_vars_ndjson(
+    request: Request,
+    selected: Optional[List[str]] = Depends(fields_param(HostVarRead)),
+    session: Session = Depends(get_session)
+):
+    """
+    Exporta as variáveis de todos os hosts em NDJSON, uma variável por
+    linha com o `host_id`. Valores criptografados saem como armazenados
+    (vault). Aceita `fields` (por exemplo `fields=host_id,var_name`) e
+    `Accept-Encoding: gzip`.
+    """
+    return ExportService.stream(session, request, HostVar, selected or list(HostVarRead.model_fields))
+
+
 @router.get("/host/{host_id}", response_model=List[HostVarRead])
 def read_host_vars_by_host(host_id: int, session: Session = Depends(get_session)):
     # Verificar se o host existe
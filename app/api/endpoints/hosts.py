@@ -1,11 +1,18 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
+from app.core.response_cache import cache_roles, host_tags, list_tags, response_cache
 from app.db.session import get_session
 from app.models.inventory import Host
-from app.schemas.inventory import HostCreate, HostRead, HostUpdate, HostWithDetails
+from app.schemas.inventory import HostCreate, HostRead, HostUpdate, HostWithDetails, HostVarRead
+from app.services.export_service import ExportService
 from app.services.host_service import HostService
+from app.services.host_var_service import HostVarService
+from app.services.inventory_graph_service import inventory_graph
+from app.services.projection import fields_param
 
 router = APIRouter()
 
@@ -24,28 +31,86 @@ def create_host(host: HostCreate, session: Session = Depends(get_session)):
 
 @router.get("/", response_model=List[HostRead])
 def read_hosts(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     group_id: Optional[int] = None,
-    session: Session = Depends(get_session)
+    var_name: Optional[str] = None,
+    var_value: Optional[str] = None,
+    selected: Optional[List[str]] = Depends(fields_param(HostRead)),
+    session: Session = Depends(get_session),
+    roles: List[str] = Depends(cache_roles)
 ):
-    if group_id:
-        hosts = HostService.get_by_group(
-            session=session, group_id=group_id, skip=skip, limit=limit)
+    """
+    Lista os hosts. Com `fields` (por exemplo `fields=hostname,ansible_host`),
+    apenas essas colunas (e o `id`) são consultadas e retornadas.
+    """
+
+    def compute():
+        if inventory_graph.is_enabled():
+            hosts = inventory_graph.get_hosts(
+                session=session, skip=skip, limit=limit, group_id=group_id,
+                var_name=var_name, var_value=var_value)
+            if selected is not None:
+                return jsonable_encoder([{name: getattr(host, name) for name in selected} for host in hosts])
+        elif var_name:
+            hosts = HostService.get_by_var(
+                session=session, var_name=var_name, var_value=var_value, skip=skip, limit=limit,
+                fields=selected)
+        elif group_id:
+            hosts = HostService.get_by_group(
+                session=session, group_id=group_id, skip=skip, limit=limit, fields=selected)
+        else:
+            hosts = HostService.get_all(session=session, skip=skip, limit=limit, fields=selected)
+        if selected is not None:
+            return jsonable_encoder(hosts)
+        return jsonable_encoder([HostRead.model_validate(host) for host in hosts])
+
+    # A lista depende de inclusões de hosts, da associação ao grupo ou das variáveis
+    if var_name:
+        tags = list_tags("host", ("host_vars",))
+    elif group_id:
+        tags = list_tags("host", ("group", group_id))
     else:
-        hosts = HostService.get_all(session=session, skip=skip, limit=limit)
-    return hosts
+        tags = list_tags("host", ("hosts",))
+    return response_cache.serve(request, roles, compute, tags)
+
+
+@router.get("/export.ndjson", response_class=StreamingResponse)
+def export_hosts_ndjson(
+    request: Request,
+    selected: Optional[List[str]] = Depends(fields_param(HostRead)),
+    session: Session = Depends(get_session)
+):
+    """
+    Exporta todos os hosts em NDJSON, um host por linha, em ordem de `id`.
+    A tabela é lida em lotes de um cursor no servidor, sem carregar tudo na
+    memória; com `Accept-Encoding: gzip` a resposta é comprimida. `fields`
+    seleciona as colunas, como na listagem.
+    """
+    return ExportService.stream(session, request, Host, selected or list(HostRead.model_fields))
 
 
 @router.get("/{host_id}", response_model=HostWithDetails)
-def read_host(host_id: int, session: Session = Depends(get_session)):
-    db_host = HostService.get_by_id(session=session, host_id=host_id)
-    if db_host is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Host com ID {host_id} não encontrado"
-        )
-    return db_host
+def read_host(
+    request: Request,
+    host_id: int,
+    session: Session = Depends(get_session),
+    roles: List[str] = Depends(cache_roles)
+):
+    def compute():
+        if inventory_graph.is_enabled():
+            db_host = inventory_graph.get_host(session=session, host_id=host_id)
+        else:
+            db_host = HostService.get_with_details(session=session, host_id=host_id)
+        if db_host is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Host com ID {host_id} não encontrado"
+            )
+        return jsonable_encoder(HostWithDetails.model_validate(db_host))
+
+    return response_cache.serve(request, roles, compute, host_tags)
 
 
 @router.put("/{host_id}", response_model=HostRead)
@@ -64,6 +129,25 @@ def update_host(
     return db_host
 
 
+@router.put("/{host_id}/vars", response_model=List[HostVarRead])
+def replace_host_vars(
+    host_id: int,
+    values: Dict[str, str] = Body(...),
+    session: Session = Depends(get_session)
+):
+    """
+    Substitui todo o mapa de variáveis do host. Apenas as inclusões,
+    alterações e exclusões necessárias são aplicadas, em uma única transação.
+    """
+    db_host = HostService.get_by_id(session=session, host_id=host_id)
+    if db_host is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Host com ID {host_id} não encontrado"
+        )
+    return HostVarService.replace_all(session=session, host_id=host_id, values=values)
+
+
 @router.delete("/{host_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_host(host_id: int, session: Session = Depends(get_session)):
     success = HostService.delete(session=session, host_id=host_id)
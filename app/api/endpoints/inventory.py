@@ -1,31 +1,261 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlmodel import Session
 
+from app.core import metrics
+from app.core.config import settings
+from app.core.http_cache import (
+    accepts_gzip, conditional_json, encode_json, encoded_json_response, etag_matches, make_etag)
+from app.core.single_flight import SingleFlight
+from app.core.subscriptions import broker, LAGGED
+
 from app.db.session import get_session
+from app.schemas.inventory import HostPatternResult, InventoryDelta
+from app.services.artifact_service import ARTIFACT_FORMATS, artifacts
+from app.services.change_log_service import ChangeLogService
+from app.services.group_service import GroupService
+from app.services.host_pattern_service import (
+    MAX_PATTERN_LENGTH, HostPatternService, PatternError)
 from app.services.inventory_service import InventoryService
 from app.core.auth import get_current_user, User, has_role
 
 router = APIRouter()
 
+# Exportações do inventário em andamento, compartilhadas entre requisições
+export_flight = SingleFlight("ansible-format")
+
+
+def _resolve_pattern(session: Session, pattern: str):
+    try:
+        return HostPatternService.resolve(session=session, pattern=pattern)
+    except PatternError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def _inventory_etag(revision: int, pattern: Optional[str] = None, decrypt_vault: bool = False) -> str:
+    return make_etag("ansible-format", revision, pattern, decrypt_vault)
+
+
+async def _export_response(request: Request, session: Session, pattern: Optional[str],
+                           decrypt_vault: bool):
+    bind = session.get_bind()
+
+    def read_revision() -> int:
+        # Sessão curta: a conexão volta ao pool antes de aguardar a montagem,
+        # para que uma rajada de requisições não esgote o pool
+        with Session(bind) as revision_session:
+            return ChangeLogService.current_revision(session=revision_session)
+
+    # A revisão é lida antes dos dados: a ETag nunca é mais nova que o conteúdo
+    revision = await run_in_threadpool(read_revision)
+    etag = _inventory_etag(revision, pattern, decrypt_vault)
+    headers = {"X-Inventory-Revision": str(revision)}
+    if etag_matches(request, etag):
+        return conditional_json(request, None, etag, headers)
+
+    use_gzip = accepts_gzip(request)
+
+    def build():
+        # Sessão própria: a montagem pode atender requisições que terminam
+        # antes dela
+        with Session(bind) as build_session:
+            host_ids = None
+            if pattern is not None:
+                _, host_ids, _ = _resolve_pattern(build_session, pattern)
+            inventory = InventoryService.export_ansible_inventory(
+                session=build_session, decrypt_vault=decrypt_vault, host_ids=host_ids)
+        return encode_json(inventory, use_gzip)
+
+    # Requisições simultâneas com a mesma rota, parâmetros, escopo de papéis
+    # (vault descriptografado ou não), revisão e codificação compartilham
+    # uma única montagem e serialização
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())),
+           decrypt_vault, revision, use_gzip)
+    body, content_encoding = await export_flight.do(key, build)
+    metrics.observe_export_size("ansible-format", len(body))
+    return encoded_json_response(body, content_encoding, etag, headers)
+
+
 @router.get("/ansible-format")
-def get_ansible_inventory(
+async def get_ansible_inventory(
+    request: Request,
+    pattern: Optional[str] = Query(None, max_length=MAX_PATTERN_LENGTH),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Exporta o inventário no formato utilizado pelo Ansible.
     Este formato é compatível com inventários dinâmicos do Ansible.
+    Com `pattern` (sintaxe do `ansible --limit`), exporta apenas os hosts
+    selecionados e os grupos que os contêm.
+    A resposta traz a revisão (`X-Inventory-Revision`) e uma ETag: com
+    `If-None-Match` e o inventário inalterado, retorna 304 sem corpo.
+    Requisições idênticas simultâneas compartilham uma única montagem.
     Requer autenticação.
     """
-    return InventoryService.export_ansible_inventory(session=session)
+    return await _export_response(request, session, pattern, decrypt_vault=False)
+
+
+@router.get("/ansible-format/delta")
+def get_ansible_inventory_delta(
+    request: Request,
+    since: int = Query(..., ge=0),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Retorna apenas os grupos do inventário Ansible alterados desde a revisão
+    `since` (`groups`), com a lista completa de grupos (`children`); grupos
+    ausentes dela foram removidos. Se `full` for verdadeiro, `groups` contém
+    todos os grupos e substitui o inventário local.
+    Com `If-None-Match` igual à ETag atual de `/ansible-format`, retorna 304.
+    Requer autenticação.
+    """
+    revision = ChangeLogService.current_revision(session=session)
+    etag = _inventory_etag(revision)
+    headers = {"X-Inventory-Revision": str(revision)}
+    if etag_matches(request, etag):
+        return conditional_json(request, None, etag, headers)
+    delta = InventoryService.export_delta(session=session, since=since)
+    etag = _inventory_etag(delta["revision"])
+    headers["X-Inventory-Revision"] = str(delta["revision"])
+    return conditional_json(request, delta, etag, headers)
 
 
 @router.get("/ansible-format-admin", dependencies=[Depends(has_role(["admin"]))])
-def get_ansible_inventory_admin(
+async def get_ansible_inventory_admin(
+    request: Request,
+    pattern: Optional[str] = Query(None, max_length=MAX_PATTERN_LENGTH),
     session: Session = Depends(get_session)
 ):
     """
     Endpoint que requer papel de admin.
-    Exporta o inventário no formato utilizado pelo Ansible.
+    Exporta o inventário no formato utilizado pelo Ansible, com os valores
+    criptografados pelo Ansible Vault já descriptografados.
+    """
+    return await _export_response(request, session, pattern, decrypt_vault=True)
+
+
+@router.get("/artifacts/{artifact_format}", response_class=FileResponse)
+def get_inventory_artifact(
+    artifact_format: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Retorna o inventário pré-gerado em disco (`json`, `yaml` ou `ini`),
+    atualizado a cada revisão, sem consultar o banco nem serializar dados.
+    Valores do Ansible Vault permanecem criptografados (omitidos no INI).
+    Requer autenticação e INVENTORY_ARTIFACTS_DIR configurado.
+    """
+    if artifact_format not in ARTIFACT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Formato '{artifact_format}' inválido; use {', '.join(ARTIFACT_FORMATS)}"
+        )
+    path = artifacts.path(artifact_format) if artifacts.is_enabled() else None
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Arquivos do inventário não disponíveis"
+        )
+    filename, media_type = ARTIFACT_FORMATS[artifact_format]
+    return FileResponse(path, media_type=media_type, filename=filename,
+                        content_disposition_type="inline")
+
+
+@router.get("/query", response_model=HostPatternResult)
+def query_hosts(
+    pattern: str = Query(..., min_length=1, max_length=MAX_PATTERN_LENGTH),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Resolve um padrão de hosts do Ansible para a lista de hosts, por exemplo
+    `web:&prod:!maintenance` (hosts em web e prod, exceto os em maintenance).
+    Suporta nomes de grupos e hosts, curingas (`web*`), expressões regulares
+    (`~^db\\d+`), `all`, interseção (`&`) e exclusão (`!`). Grupos incluem os
+    hosts dos seus subgrupos.
     """
-    return InventoryService.export_ansible_inventory(session=session)
\ No newline at end of file
+    revision, host_ids, hostnames = _resolve_pattern(session, pattern)
+    return HostPatternResult(
+        pattern=pattern, revision=revision, count=len(host_ids),
+        hosts=hostnames, host_ids=host_ids)
+
+
+@router.get("/changes", response_model=InventoryDelta)
+def get_inventory_changes(
+    since: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Retorna o delta compacto do inventário desde a revisão informada:
+    hosts, grupos e variáveis incluídos/alterados (com o estado atual) e
+    removidos, além das associações adicionadas e removidas.
+    Use a `revision` retornada como `since` na próxima sincronização.
+    """
+    return ChangeLogService.get_changes(session=session, since=since)
+
+
+@router.get("/changes/stream")
+async def stream_inventory_changes(
+    request: Request,
+    group_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Envia notificações de alterações (Server-Sent Events) assim que as escritas
+    são confirmadas: tipo da entidade, ID, ação e revisão.
+    Com `group_id`, apenas alterações na subárvore do grupo são enviadas.
+    Um evento `lagged` indica que o consumidor ficou para trás e deve
+    sincronizar por `/inventory/changes?since=<última revisão recebida>`.
+    """
+    def resolve_scope():
+        # Consultas síncronas executadas fora do event loop
+        group_ids = None
+        if group_id is not None:
+            if GroupService.get_by_id(session=session, group_id=group_id) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Grupo com ID {group_id} não encontrado"
+                )
+            group_ids = GroupService.get_descendant_ids(
+                session=session, group_id=group_id)
+        return group_ids, ChangeLogService.current_revision(session=session)
+
+    group_ids, revision = await run_in_threadpool(resolve_scope)
+
+    subscription = broker.subscribe(group_ids)
+
+    async def event_stream():
+        try:
+            yield f"event: ready\ndata: {json.dumps({'revision': revision})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    change = await asyncio.wait_for(
+                        subscription.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comentário SSE para manter a conexão ativa
+                    yield ": keep-alive\n\n"
+                    continue
+                if change is LAGGED:
+                    yield "event: lagged\ndata: {}\n\n"
+                    continue
+                data = {key: value for key, value in change.items() if key != "group_ids"}
+                yield f"id: {change['revision']}\nevent: change\ndata: {json.dumps(data)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
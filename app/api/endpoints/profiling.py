@@ -0,0 +1,60 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.auth import has_role
+from app.core.profiling import profiler
+from app.schemas.profiling import ProfilingSettings
+
+# Todas as rotas exigem o papel de administrador
+router = APIRouter(dependencies=[Depends(has_role(["admin"]))])
+
+
+def _get_profile(profile_id: str):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil não encontrado neste worker"
+        )
+    return profile
+
+
+@router.get("/")
+def get_profiling_status() -> Dict[str, Any]:
+    """Estado da captura de perfis neste worker e perfis disponíveis."""
+    return profiler.status()
+
+
+@router.put("/")
+def update_profiling(config: ProfilingSettings) -> Dict[str, Any]:
+    """
+    Ligar, desligar ou ajustar a captura de perfis em execução, sem reiniciar.
+
+    A alteração vale apenas para o worker que atende esta requisição: com
+    vários workers, os demais mantêm a configuração de `PROFILING_*`, e um
+    reinício do worker também a restaura.
+    """
+    profiler.configure(**config.model_dump(exclude_none=True))
+    return profiler.status()
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str) -> Dict[str, Any]:
+    """Resumo de um perfil, com os relatórios de memória do InventoryService."""
+    return _get_profile(profile_id).summary()
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: str):
+    """
+    Amostras de CPU no formato "folded", para flamegraph.pl, speedscope ou
+    inferno (ex.: `flamegraph.pl perfil.folded > perfil.svg`).
+    """
+    profile = _get_profile(profile_id)
+    if not profile.cpu:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil sem captura de CPU"
+        )
+    return PlainTextResponse(profile.folded)
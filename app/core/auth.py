@@ -1,16 +1,13 @@
 from typing import Dict, List, Optional
 import time
 import logging
-from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-import requests
 from pydantic import BaseModel
 
 from app.core.config import settings
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Modelo para representar o usuário autenticado
@@ -26,18 +23,48 @@ oauth2_scheme = OAuth2PasswordBearer(
     auto_error=True
 )
 
+# Variante que não exige o token, para endpoints públicos
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.KEYCLOAK_SERVER_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/token",
+    auto_error=False
+)
+
 # Cache para armazenar temporariamente a chave pública do Keycloak
 keycloak_public_key = None
 keycloak_public_key_expiry = 0
 KEY_CACHE_TTL = 24 * 3600  # 24 horas
+# Depois de uma falha, novas buscas só a partir deste instante
+keycloak_public_key_retry_at = 0
 
-def get_keycloak_public_key() -> str:
-    """Obtém a chave pública do Keycloak para validação de tokens."""
-    global keycloak_public_key, keycloak_public_key_expiry
 
-    current_time = time.time()
-    if keycloak_public_key and current_time < keycloak_public_key_expiry:
+class KeycloakUnavailableError(Exception):
+    """A chave pública do Keycloak não pôde ser obtida"""
+
+
+def cached_keycloak_public_key() -> Optional[str]:
+    """Chave pública em cache, se ainda válida, sem acessar a rede."""
+    if keycloak_public_key and time.time() < keycloak_public_key_expiry:
         return keycloak_public_key
+    return None
+
+def get_keycloak_public_key() -> str:
+    """
+    Obtém a chave pública do Keycloak para validação de tokens. Bloqueante:
+    no laço de eventos, use `run_in_threadpool`. Após uma falha, novas
+    buscas falham imediatamente durante KEYCLOAK_RETRY_INTERVAL segundos.
+    """
+    global keycloak_public_key, keycloak_public_key_expiry, keycloak_public_key_retry_at
+    cached = cached_keycloak_public_key()
+    if cached:
+        return cached
+    current_time = time.time()
+    if current_time < keycloak_public_key_retry_at:
+        raise KeycloakUnavailableError(
+            f"Chave pública do Keycloak indisponível; nova tentativa em "
+            f"{keycloak_public_key_retry_at - current_time:.0f}s")
+
+    # Importação adiada: requests só é necessário ao buscar a chave
+    import requests
 
     # Obter a chave pública do Keycloak
     cert_endpoint = f"{settings.KEYCLOAK_SERVER_URL}/realms/{settings.KEYCLOAK_REALM}"
@@ -46,7 +73,8 @@ def get_keycloak_public_key() -> str:
     try:
         response = requests.get(
             cert_endpoint,
-            verify=settings.KEYCLOAK_SSL_VERIFY
+            verify=settings.KEYCLOAK_SSL_VERIFY,
+            timeout=settings.KEYCLOAK_TIMEOUT
         )
         response.raise_for_status()
         jwks = response.json()
@@ -59,14 +87,18 @@ def get_keycloak_public_key() -> str:
         return keycloak_public_key
     
     except Exception as e:
+        keycloak_public_key_retry_at = time.time() + settings.KEYCLOAK_RETRY_INTERVAL
         logger.error(f"Erro ao obter chave pública do Keycloak: {str(e)}")
-        raise
+        raise KeycloakUnavailableError(str(e)) from e
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Valida o token JWT e extrai as informações do usuário.
     Será usado como dependência em endpoints protegidos.
     """
+    # Importação adiada para a primeira validação, fora da inicialização
+    from jose import jwt, JWTError
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
@@ -74,8 +106,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     )
 
     try:
-        # Obter a chave pública para validação
-        public_key = get_keycloak_public_key()
+        # Obter a chave pública para validação; a busca na rede (apenas sem
+        # a chave em cache) não pode bloquear o laço de eventos
+        public_key = cached_keycloak_public_key()
+        if public_key is None:
+            public_key = await run_in_threadpool(get_keycloak_public_key)
 
         # Verificar e decodificar o token JWT sem verificar audience específica
         # e usando options mais flexíveis para compatibilidade
@@ -90,8 +125,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             }
         )
         
-        # Para debug
-        logger.info(f"Token decodificado com sucesso para o usuário: {payload.get('preferred_username')}")
+        logger.debug(f"Token decodificado com sucesso para o usuário: {payload.get('preferred_username')}")
 
         username: str = payload.get("preferred_username")
         if username is None:
@@ -128,9 +162,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         )
 
         return user
+    except HTTPException:
+        raise
     except JWTError as jwt_error:
         logger.error(f"Erro na validação do JWT: {str(jwt_error)}")
         raise credentials_exception
+    except KeycloakUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Serviço de autenticação indisponível: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Erro ao processar autenticação: {str(e)}")
         raise HTTPException(
@@ -138,6 +179,22 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             detail=f"Erro ao processar autenticação: {str(e)}"
         )
 
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[User]:
+    """
+    Retorna o usuário autenticado, se houver um token válido, ou None.
+    Usado em endpoints públicos cujas respostas variam com os papéis do
+    usuário (por exemplo, na chave do cache de respostas). Falhas que não
+    são do token (Keycloak indisponível) são propagadas.
+    """
+    if not token:
+        return None
+    try:
+        return await get_current_user(token)
+    except HTTPException as e:
+        if e.status_code != status.HTTP_401_UNAUTHORIZED:
+            raise
+        return None
+
 def has_role(required_roles: List[str]):
     """
     Verificador de papel (role) a ser usado com Depends.
@@ -4,10 +4,26 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _read_secret_file(path: Optional[str]) -> str:
+    """Ler um segredo de arquivo (por exemplo, o arquivo de senha do vault)"""
+    if not path:
+        return ""
+    with open(path) as secret_file:
+        return secret_file.read().strip()
+
+
 class Settings:
     PROJECT_NAME: str = os.getenv("PROJECT_NAME", "Ansible Inventory API")
     API_VERSION: str = os.getenv("API_VERSION", "v1")
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+
+    # Modo de inicialização: "development" cria as tabelas e reconstrói os
+    # dados derivados a cada início; "production" não executa DDL (use
+    # `python -m app.db.init_db` antes da implantação) e aquece os caches em
+    # segundo plano, aceitando requisições imediatamente
+    STARTUP_MODE: str = os.getenv("STARTUP_MODE", "development").lower()
 
     # Configuração de banco de dados
     DATABASE_TYPE: str = os.getenv("DATABASE_TYPE", "sqlite")
@@ -20,11 +36,98 @@ class Settings:
         else:
             return os.getenv("DATABASE_URL_SQLITE", "sqlite:///./ansible_inventory.db")
 
+    # Pool de conexões do PostgreSQL, por worker
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+    # Servidor de produção (python -m app.server): "gunicorn" (com workers
+    # do uvicorn e preload), "uvicorn" ou "auto" (gunicorn, se instalado)
+    SERVER_BACKEND: str = os.getenv("SERVER_BACKEND", "auto").lower()
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    # 0: um worker por CPU
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "0"))
+    # Laço de eventos e parser HTTP: "auto" usa uvloop e httptools se instalados
+    SERVER_LOOP: str = os.getenv("SERVER_LOOP", "auto").lower()
+    SERVER_HTTP: str = os.getenv("SERVER_HTTP", "auto").lower()
+    # Importar e aquecer a aplicação no processo mestre antes do fork. Com
+    # preload, `kill -HUP` não carrega código novo (ver app/server.py)
+    SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "False").lower() == "true"
+    SERVER_KEEPALIVE: int = int(os.getenv("SERVER_KEEPALIVE", "5"))
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+    SERVER_TIMEOUT: int = int(os.getenv("SERVER_TIMEOUT", "60"))
+    # Reciclar cada worker após N requisições (0 desativa), com variação aleatória
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+    SERVER_MAX_REQUESTS_JITTER: int = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_FORWARDED_ALLOW_IPS: str = os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+    # Modo de armazenamento das variáveis de host/grupo:
+    # "rows" (uma linha por variável) ou "json" (um documento JSON tipado por dono)
+    VARS_STORAGE_MODE: str = os.getenv("VARS_STORAGE_MODE", "rows").lower()
+
+    # Notificações de alterações (Server-Sent Events)
+    EVENTS_SUBSCRIBER_BUFFER: int = int(os.getenv("EVENTS_SUBSCRIBER_BUFFER", "1000"))
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+    # Grafo do inventário em memória como caminho de leitura principal
+    INVENTORY_GRAPH_ENABLED: bool = os.getenv("INVENTORY_GRAPH_ENABLED", "False").lower() == "true"
+
+    # Invalidação entre workers: "auto" (NOTIFY no PostgreSQL, polling no
+    # SQLite), "notify", "poll" ou "none"; intervalo do polling em segundos
+    INVALIDATION_BACKEND: str = os.getenv("INVALIDATION_BACKEND", "none").lower()
+    INVALIDATION_POLL_INTERVAL: float = float(os.getenv("INVALIDATION_POLL_INTERVAL", "0.5"))
+
+    # Cache de respostas de GET /hosts e /groups (número de entradas; 0 desativa)
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "0"))
+
+    # Coalescência de exportações idênticas simultâneas do inventário: uma
+    # única montagem atende todas as requisições em andamento
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "True").lower() == "true"
+
+    # Arquivos estáticos do inventário (JSON, YAML e INI) regenerados a cada
+    # revisão; vazio desativa. Intervalo de agrupamento das escritas em segundos
+    INVENTORY_ARTIFACTS_DIR: str = os.getenv("INVENTORY_ARTIFACTS_DIR", "")
+    INVENTORY_ARTIFACTS_DEBOUNCE: float = float(os.getenv("INVENTORY_ARTIFACTS_DEBOUNCE", "1.0"))
+
+    # Falhar em carregamentos preguiçosos de relacionamentos (detecção de N+1)
+    ORM_RAISELOAD: bool = os.getenv("ORM_RAISELOAD", "False").lower() == "true"
+
+    # Métricas no formato do Prometheus em /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+
+    # Contagem das consultas SQL por requisição (cabeçalhos X-DB-Query-*) e
+    # alerta de N+1 quando a mesma consulta se repete a partir do limite
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", "False").lower() == "true"
+    QUERY_STATS_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("QUERY_STATS_N_PLUS_ONE_THRESHOLD", "10"))
+
+    # Captura sob demanda de CPU (amostragem) e memória (tracemalloc) de uma
+    # requisição, com o cabeçalho X-Profile e um token de administrador.
+    # Desligada por padrão: com ela, cada requisição com X-Profile valida o token
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    PROFILING_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+    PROFILING_MAX_PROFILES: int = int(os.getenv("PROFILING_MAX_PROFILES", "20"))
+    PROFILING_MEMORY_TOP: int = int(os.getenv("PROFILING_MEMORY_TOP", "10"))
+    PROFILING_MEMORY_FRAMES: int = int(os.getenv("PROFILING_MEMORY_FRAMES", "1"))
+
+    # Ansible Vault: senha (ou arquivo de senha), processos para criptografia
+    # em lote e tamanho do cache de valores descriptografados
+    VAULT_PASSWORD: str = os.getenv("VAULT_PASSWORD") or _read_secret_file(os.getenv("VAULT_PASSWORD_FILE"))
+    VAULT_WORKERS: int = int(os.getenv("VAULT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    VAULT_CACHE_SIZE: int = int(os.getenv("VAULT_CACHE_SIZE", "10000"))
+
     # Configurações do Keycloak
     KEYCLOAK_SERVER_URL: str = os.getenv("KEYCLOAK_SERVER_URL", "http://localhost:8080/auth")
     KEYCLOAK_REALM: str = os.getenv("KEYCLOAK_REALM", "your-realm")
     KEYCLOAK_CLIENT_ID: str = os.getenv("KEYCLOAK_CLIENT_ID", "your-client-id")
     KEYCLOAK_CLIENT_SECRET: str = os.getenv("KEYCLOAK_CLIENT_SECRET", "your-client-secret")
     KEYCLOAK_SSL_VERIFY: bool = os.getenv("KEYCLOAK_SSL_VERIFY", "False").lower() == "true"
+    # Tempo limite (segundos) da busca da chave pública e intervalo até uma
+    # nova tentativa depois de uma falha
+    KEYCLOAK_TIMEOUT: float = float(os.getenv("KEYCLOAK_TIMEOUT", "5"))
+    KEYCLOAK_RETRY_INTERVAL: float = float(os.getenv("KEYCLOAK_RETRY_INTERVAL", "30"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,112 @@
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Chaves usadas em session.info para acompanhar as alterações da transação
+_PENDING_KEY = "inventory_changes_pending"
+_FLUSHED_KEY = "inventory_changes_flushed"
+
+# Ouvintes que recebem as alterações confirmadas (lista de dicionários)
+_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+_listeners_lock = threading.Lock()
+
+# Quantidade de ouvintes que precisam do escopo de grupos das alterações
+_scope_requests = 0
+
+
+def subscribe(listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+    """Registrar um ouvinte para as alterações confirmadas no inventário."""
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def unsubscribe(listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def request_group_scope(enabled: bool) -> None:
+    """
+    Indicar que há (ou deixou de haver) um ouvinte que filtra alterações por
+    grupo. Enquanto houver, as escritas calculam os grupos afetados.
+    """
+    global _scope_requests
+    with _listeners_lock:
+        _scope_requests = max(0, _scope_requests + (1 if enabled else -1))
+
+
+def needs_group_scope() -> bool:
+    return _scope_requests > 0
+
+
+def dispatch(changes: List[Dict[str, Any]]) -> None:
+    """Entregar alterações a todos os ouvintes registrados."""
+    if not changes:
+        return
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(changes)
+        except Exception as e:
+            logger.error(f"Erro ao notificar alterações do inventário: {str(e)}")
+
+
+def track_change(session: Session, change: Any, group_ids: Optional[List[int]] = None) -> None:
+    """
+    Acompanhar uma alteração registrada na sessão; ela será notificada aos
+    ouvintes somente depois do commit da transação.
+    """
+    session.info.setdefault(_PENDING_KEY, []).append((change, group_ids))
+
+
+def flushed_changes(session: Session) -> List[Dict[str, Any]]:
+    """Alterações já gravadas (com revisão) na transação atual, ainda sem commit"""
+    return session.info.get(_FLUSHED_KEY, [])
+
+
+# Eventos de sessão: as revisões só existem após o flush, e a notificação só
+# pode acontecer após o commit (sem acesso ao banco nesse momento)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _collect_flushed_changes(session: Session, flush_context) -> None:
+    pending = session.info.get(_PENDING_KEY)
+    if not pending:
+        return
+    remaining = []
+    flushed = session.info.setdefault(_FLUSHED_KEY, [])
+    for change, group_ids in pending:
+        if change.revision is None:
+            remaining.append((change, group_ids))
+            continue
+        flushed.append({
+            "revision": change.revision,
+            "entity_type": change.entity_type,
+            "entity_id": change.entity_id,
+            "related_id": change.related_id,
+            "action": change.action,
+            "group_ids": group_ids,
+        })
+    session.info[_PENDING_KEY] = remaining
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed_changes(session: Session) -> None:
+    flushed = session.info.pop(_FLUSHED_KEY, None)
+    session.info.pop(_PENDING_KEY, None)
+    if flushed:
+        dispatch(flushed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_FLUSHED_KEY, None)
+    session.info.pop(_PENDING_KEY, None)
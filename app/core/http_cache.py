@@ -0,0 +1,86 @@
+from typing import Any, Dict, Optional, Tuple
+import gzip
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+# Respostas menores que isso não compensam a compressão
+GZIP_MINIMUM_SIZE = 1024
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fraca derivada das partes informadas (revisão, parâmetros, etc.)"""
+    digest = hashlib.sha1(
+        "\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Verificar o If-None-Match da requisição (comparação fraca)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque
+               for candidate in header.split(","))
+
+
+def accepts_encoding(header: str, encoding: str) -> bool:
+    """
+    Verificar se um Accept-Encoding aceita a codificação, considerando os
+    q-values: `gzip;q=0` recusa o gzip, e `*` vale para as codificações não
+    citadas.
+    """
+    wildcard = False
+    for item in header.lower().split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == encoding:
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return wildcard
+
+
+def accepts_gzip(request: Request) -> bool:
+    return accepts_encoding(request.headers.get("accept-encoding", ""), "gzip")
+
+
+def encode_json(content: Any, use_gzip: bool) -> Tuple[bytes, Optional[str]]:
+    """Serializar em JSON e comprimir com gzip, se pedido e compensar"""
+    body = json.dumps(content, separators=(",", ":")).encode("utf-8")
+    if use_gzip and len(body) >= GZIP_MINIMUM_SIZE:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+def encoded_json_response(body: bytes, content_encoding: Optional[str], etag: str,
+                          headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta com um corpo já produzido por `encode_json`"""
+    headers = {**(headers or {}), "ETag": etag, "Vary": "Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def conditional_json(request: Request, content: Any, etag: str,
+                     headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Resposta JSON com ETag: 304 sem corpo quando o cliente já tem a versão
+    atual, e corpo comprimido com gzip quando aceito e grande o suficiente.
+    """
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={
+            **(headers or {}), "ETag": etag, "Vary": "Accept-Encoding"})
+    body, content_encoding = encode_json(content, accepts_gzip(request))
+    return encoded_json_response(body, content_encoding, etag, headers)
@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Optional
+from collections import deque
+import json
+import logging
+import select as select_module
+import threading
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core import events
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "inventory_changes"
+# Limite de payload do NOTIFY no PostgreSQL (8000 bytes), com folga
+_MAX_PAYLOAD = 7500
+# Tempo durante o qual lacunas na sequência de revisões são reconsultadas
+_GAP_TTL_SECONDS = 60.0
+_MAX_TRACKED_GAPS = 1000
+_CHANGE_FIELDS = ("revision", "entity_type", "entity_id", "related_id", "action")
+
+
+class InvalidationBus:
+    """
+    Barramento de invalidação entre processos. As alterações confirmadas por
+    um worker são entregues aos ouvintes de `app.core.events` dos demais
+    (grafo em memória, caches, assinaturas SSE) em poucos milissegundos.
+
+    - PostgreSQL: cada worker publica as alterações com NOTIFY após o commit
+      e recebe as dos demais com LISTEN em uma conexão dedicada.
+    - SQLite (ou PostgreSQL sem psycopg2): cada worker consulta
+      periodicamente a revisão mais recente do registro de alterações (a
+      chave primária de inventory_changes) e busca apenas as novas entradas.
+
+    As alterações recebidas de outros processos não têm escopo de grupos
+    calculado (`group_ids` é None).
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.backend: Optional[str] = None
+        self._engine: Optional[Engine] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Revisões notificadas localmente, ignoradas pelo polling
+        self._local_revisions: deque = deque(maxlen=10000)
+        self._local_lock = threading.Lock()
+        self._last_revision = 0
+        self._gaps: Dict[int, float] = {}
+        # Marca a thread que está repassando alterações recebidas de fora
+        self._remote = threading.local()
+
+    @staticmethod
+    def resolve_backend(engine: Engine) -> Optional[str]:
+        backend = settings.INVALIDATION_BACKEND
+        if backend in ("", "none"):
+            return None
+        is_postgresql = engine.dialect.name == "postgresql"
+        if backend == "auto":
+            backend = "notify" if is_postgresql else "poll"
+        if backend == "notify" and (not is_postgresql or engine.dialect.driver != "psycopg2"):
+            logger.warning(
+                "LISTEN/NOTIFY requer PostgreSQL com psycopg2; usando polling de revisão")
+            backend = "poll"
+        if backend not in ("notify", "poll"):
+            raise ValueError(f"INVALIDATION_BACKEND inválido: '{backend}'")
+        return backend
+
+    def start(self, engine: Engine) -> None:
+        self.backend = self.resolve_backend(engine)
+        if self.backend is None or self._thread is not None:
+            return
+        self._engine = engine
+        self._stop.clear()
+        self._last_revision = self._current_revision()
+        events.subscribe(self._on_local_changes)
+        target = self._listen if self.backend == "notify" else self._poll
+        self._thread = threading.Thread(
+            target=target, name="inventory-invalidation", daemon=True)
+        self._thread.start()
+        logger.info(f"Barramento de invalidação iniciado ({self.backend})")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        events.unsubscribe(self._on_local_changes)
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    # Publicação (alterações confirmadas neste processo)
+
+    def _on_local_changes(self, changes: List[Dict[str, Any]]) -> None:
+        # Alterações repassadas pelo próprio barramento já vieram de fora
+        if getattr(self._remote, "active", False):
+            return
+        with self._local_lock:
+            self._local_revisions.extend(change["revision"] for change in changes)
+        if self.backend == "notify":
+            self._notify(changes)
+
+    def _notify(self, changes: List[Dict[str, Any]]) -> None:
+        rows = [[change[field] for field in _CHANGE_FIELDS] for change in changes]
+        payload = json.dumps({"origin": self.origin, "changes": rows})
+        if len(payload) > _MAX_PAYLOAD:
+            # Lote grande: apenas as revisões; os receptores buscam as entradas
+            payload = json.dumps({"origin": self.origin,
+                                  "revisions": [row[0] for row in rows]})
+        if len(payload) > _MAX_PAYLOAD:
+            revisions = [row[0] for row in rows]
+            payload = json.dumps({"origin": self.origin,
+                                  "range": [min(revisions), max(revisions)]})
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                   {"channel": NOTIFY_CHANNEL, "payload": payload})
+        except Exception as e:
+            logger.error(f"Erro ao publicar invalidação: {str(e)}")
+
+    # Recepção
+
+    def _dispatch_remote(self, changes: List[Dict[str, Any]]) -> None:
+        for change in changes:
+            change.setdefault("group_ids", None)
+        self._remote.active = True
+        try:
+            events.dispatch(changes)
+        finally:
+            self._remote.active = False
+
+    def _fetch_entries(self, condition: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        statement = text(
+            f"SELECT {', '.join(_CHANGE_FIELDS)} FROM inventory_changes "
+            f"WHERE {condition} ORDER BY revision")
+        with self._engine.connect() as connection:
+            return [dict(zip(_CHANGE_FIELDS, row))
+                    for row in connection.execute(statement, parameters)]
+
+    def _current_revision(self) -> int:
+        with self._engine.connect() as connection:
+            return connection.execute(
+                text("SELECT MAX(revision) FROM inventory_changes")).scalar() or 0
+
+    def handle_notification(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("origin") == self.origin:
+            return
+        if "changes" in message:
+            changes = [dict(zip(_CHANGE_FIELDS, row)) for row in message["changes"]]
+        elif "revisions" in message:
+            revisions = {int(revision) for revision in message["revisions"]}
+            changes = [entry for entry in self._fetch_entries(
+                "revision >= :low AND revision <= :high",
+                {"low": min(revisions), "high": max(revisions)})
+                if entry["revision"] in revisions]
+        else:
+            low, high = message["range"]
+            changes = self._fetch_entries(
+                "revision >= :low AND revision <= :high", {"low": low, "high": high})
+        if changes:
+            self._dispatch_remote(changes)
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            try:
+                raw = self._engine.raw_connection()
+                try:
+                    connection = raw.driver_connection
+                    connection.autocommit = True
+                    connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    while not self._stop.is_set():
+                        ready, _, _ = select_module.select([connection], [], [], 1.0)
+                        if not ready:
+                            continue
+                        connection.poll()
+                        while connection.notifies:
+                            notification = connection.notifies.pop(0)
+                            self.handle_notification(notification.payload)
+                finally:
+                    raw.invalidate()
+            except Exception as e:
+                logger.error(f"Erro no LISTEN de invalidação: {str(e)}")
+                self._stop.wait(1.0)
+
+    def poll_once(self) -> None:
+        """Buscar as entradas novas (e lacunas recentes) do registro de alterações"""
+        now = time.monotonic()
+        self._gaps = {revision: expiry for revision, expiry in self._gaps.items()
+                      if expiry > now}
+        if self._current_revision() <= self._last_revision and not self._gaps:
+            return
+
+        condition, parameters = "revision > :last", {"last": self._last_revision}
+        if self._gaps:
+            gaps = sorted(self._gaps)
+            condition = "revision > :last OR (revision >= :low AND revision <= :high)"
+            parameters.update({"low": gaps[0], "high": gaps[-1]})
+        entries = [entry for entry in self._fetch_entries(condition, parameters)
+                   if entry["revision"] > self._last_revision or entry["revision"] in self._gaps]
+        if not entries:
+            return
+
+        # Revisões puladas podem pertencer a transações ainda não confirmadas
+        seen = {entry["revision"] for entry in entries}
+        highest = max(seen)
+        if highest - self._last_revision <= _MAX_TRACKED_GAPS:
+            for revision in range(self._last_revision + 1, highest):
+                if revision not in seen and revision not in self._gaps:
+                    self._gaps[revision] = now + _GAP_TTL_SECONDS
+        for revision in seen:
+            self._gaps.pop(revision, None)
+        self._last_revision = max(self._last_revision, highest)
+
+        with self._local_lock:
+            local = set(self._local_revisions)
+        remote = [entry for entry in entries if entry["revision"] not in local]
+        if remote:
+            self._dispatch_remote(remote)
+
+    def _poll(self) -> None:
+        while not self._stop.wait(settings.INVALIDATION_POLL_INTERVAL):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Erro no polling de invalidação: {str(e)}")
+
+
+bus = InvalidationBus()
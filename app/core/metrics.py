@@ -0,0 +1,285 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import bisect
+import threading
+import time
+
+from sqlalchemy.engine import Engine
+
+from app.core import query_stats
+from app.core.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Intervalos padrão do cliente Prometheus (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Valor acumulado; com `callback`, lido da fonte no momento da coleta"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                for labels, value in self.callback():
+                    self.set(value, *labels)
+            except Exception:
+                # Uma fonte indisponível não impede a coleta das demais métricas
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge(Counter):
+    """Valor instantâneo"""
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Por conjunto de rótulos: contagens por intervalo (não cumulativas), soma
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0]))
+                           for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = (),
+                callback=None) -> Counter:
+        return self.register(Counter(name, documentation, labels, callback))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (),
+              callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            samples = metric.samples()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Requisições HTTP atendidas", ("method", "route", "status"))
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP", ("method", "route"))
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento", ("method",))
+db_queries = registry.counter(
+    "db_queries_total", "Consultas SQL executadas")
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Duração das consultas SQL")
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "Consultas SQL por requisição HTTP", ("route",), COUNT_BUCKETS)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds", "Tempo de banco por requisição HTTP", ("route",))
+export_duration = registry.histogram(
+    "inventory_export_build_seconds", "Tempo de montagem do inventário Ansible", ("source",))
+export_size = registry.histogram(
+    "inventory_export_bytes", "Tamanho do inventário serializado", ("kind",), SIZE_BUCKETS)
+
+
+def is_enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+def _observe_query(statement: str, elapsed: float) -> None:
+    db_queries.inc()
+    db_query_duration.observe(elapsed)
+
+
+query_stats.add_observer(_observe_query, is_enabled)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede latência, status e requisições em andamento por
+    rota (o modelo do caminho, como /api/v1/hosts/{host_id}, para manter a
+    cardinalidade baixa), além das consultas SQL de cada requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        with query_stats.request_scope() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - started
+                http_in_flight.dec(method)
+                route = scope.get("route")
+                route_path = getattr(route, "path", None) or "unmatched"
+                http_requests.inc(method, route_path, str(status_holder["status"]))
+                http_duration.observe(elapsed, method, route_path)
+                db_queries_per_request.observe(stats.queries, route_path)
+                db_time_per_request.observe(stats.seconds, route_path)
+
+
+def observe_export_build(source: str, seconds: float) -> None:
+    """Tempo de montagem do inventário (source: "db" ou "graph")"""
+    if is_enabled():
+        export_duration.observe(seconds, source)
+
+
+def observe_export_size(kind: str, size: int) -> None:
+    """Tamanho do inventário serializado (resposta da API ou arquivo gerado)"""
+    if is_enabled():
+        export_size.observe(size, kind)
+
+
+def _pool_stats(engine: Engine):
+    pool = engine.pool
+    for state, method in (("size", "size"), ("checked_in", "checkedin"),
+                          ("checked_out", "checkedout"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            yield (state,), getattr(pool, method)()
+
+
+def _cache_stats():
+    from app.core.response_cache import response_cache
+    from app.core.vault import vault
+
+    yield ("response", "hit"), response_cache.hits
+    yield ("response", "miss"), response_cache.misses
+    yield ("vault", "hit"), vault.cache_hits
+    yield ("vault", "miss"), vault.cache_misses
+
+
+def _flight_stats():
+    from app.core.single_flight import flight_stats
+
+    return flight_stats()
+
+
+def register_collectors(get_engine: Callable[[], Engine]) -> None:
+    """
+    Métricas lidas no momento da coleta: pool de conexões e caches. O engine
+    é obtido na coleta, para não ser criado na importação da aplicação.
+    """
+    registry.gauge("db_pool_connections", "Conexões do pool do banco por estado",
+                   ("state",), callback=lambda: _pool_stats(get_engine()))
+    registry.counter("cache_requests_total", "Consultas aos caches por resultado",
+                     ("cache", "result"), callback=_cache_stats)
+    registry.counter("coalesced_requests_total",
+                     "Requisições coalescidas: montagens executadas e resultados compartilhados",
+                     ("flight", "result"), callback=_flight_stats)
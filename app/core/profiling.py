@@ -0,0 +1,316 @@
+from typing import Any, Callable, Dict, List, Optional
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Pilhas de threads ociosas (à espera de trabalho ou de E/S), descartadas
+_IDLE_FRAMES = {
+    ("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"),
+    ("thread.py", "_worker"), ("base_events.py", "_run_once"),
+}
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace(os.sep, "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+class Sampler:
+    """
+    Profiler por amostragem: a cada `interval` segundos, registra a pilha de
+    cada thread ocupada do processo no formato "folded" (quadros da raiz
+    para a folha separados por ";"), aceito por flamegraph.pl, speedscope e
+    inferno.
+
+    As amostras cobrem todas as threads do worker; outras requisições
+    atendidas ao mesmo tempo também aparecem no resultado.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or _is_idle(frame):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+@dataclass
+class Profile:
+    """Resultado da captura de uma requisição"""
+    id: str
+    method: str
+    path: str
+    started_at: float
+    cpu: bool
+    memory: bool
+    duration: float = 0.0
+    status: Optional[int] = None
+    samples: int = 0
+    folded: str = ""
+    # Um relatório por chamada do InventoryService rastreada
+    memory_reports: List[Dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "method": self.method, "path": self.path,
+            "started_at": self.started_at, "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status, "cpu": self.cpu, "memory": self.memory,
+            "samples": self.samples, "memory_reports": self.memory_reports,
+        }
+
+
+_current: ContextVar[Optional[Profile]] = ContextVar("profile", default=None)
+# Se já há uma chamada rastreada em andamento neste contexto
+_tracing: ContextVar[bool] = ContextVar("profile_tracing", default=False)
+
+
+class Profiler:
+    """
+    Captura sob demanda, por requisição, ativada pelo cabeçalho X-Profile
+    ("cpu", "memory" ou "cpu,memory") de um administrador. Pode ser ligada,
+    desligada e ajustada em execução (PUT /api/v1/profiling), sem reiniciar
+    o worker; quando nenhuma captura está em andamento o custo é a leitura
+    de um cabeçalho por requisição.
+    """
+
+    def __init__(self):
+        self.enabled = settings.PROFILING_ENABLED
+        self.sample_interval = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        self.memory_top = settings.PROFILING_MEMORY_TOP
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Apenas uma captura de CPU por vez no processo
+        self._cpu_lock = threading.Lock()
+        self._memory_users = 0
+        self._started_tracemalloc = False
+
+    def configure(self, enabled: Optional[bool] = None, sample_interval_ms: Optional[float] = None,
+                  memory_top: Optional[int] = None) -> None:
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_interval_ms is not None:
+            self.sample_interval = sample_interval_ms / 1000
+        if memory_top is not None:
+            self.memory_top = memory_top
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            profiles = [profile.id for profile in self._profiles.values()]
+        return {
+            "enabled": self.enabled,
+            "sample_interval_ms": self.sample_interval * 1000,
+            "memory_top": self.memory_top,
+            "tracemalloc": tracemalloc.is_tracing(),
+            "profiles": profiles,
+        }
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def _store(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > settings.PROFILING_MAX_PROFILES:
+                self._profiles.popitem(last=False)
+
+    # tracemalloc é global: ligado enquanto houver capturas de memória
+
+    def _acquire_tracemalloc(self) -> None:
+        with self._lock:
+            if self._memory_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(settings.PROFILING_MEMORY_FRAMES)
+                self._started_tracemalloc = True
+            self._memory_users += 1
+
+    def _release_tracemalloc(self) -> None:
+        with self._lock:
+            self._memory_users -= 1
+            if self._memory_users == 0 and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def begin(self, method: str, path: str, cpu: bool, memory: bool) -> Optional[Profile]:
+        if cpu and not self._cpu_lock.acquire(blocking=False):
+            logger.warning(f"Captura de CPU já em andamento; ignorando {method} {path}")
+            cpu = False
+        if not cpu and not memory:
+            return None
+        profile = Profile(id=uuid.uuid4().hex[:16], method=method, path=path,
+                          started_at=time.time(), cpu=cpu, memory=memory)
+        if memory:
+            self._acquire_tracemalloc()
+        return profile
+
+    def finish(self, profile: Profile, sampler: Optional[Sampler]) -> None:
+        if sampler is not None:
+            profile.samples = sampler.samples
+            profile.folded = sampler.folded()
+            self._cpu_lock.release()
+        if profile.memory:
+            self._release_tracemalloc()
+        self._store(profile)
+        logger.info(f"Perfil {profile.id} de {profile.method} {profile.path}: "
+                    f"{profile.duration * 1000:.1f} ms, {profile.samples} amostras")
+
+
+profiler = Profiler()
+
+
+def parse_profile_header(value: str) -> Dict[str, bool]:
+    modes = {part.strip().lower() for part in value.split(",") if part.strip()}
+    if modes & {"1", "true", "yes"}:
+        modes.add("cpu")
+    return {"cpu": "cpu" in modes, "memory": "memory" in modes}
+
+
+def trace_memory(name: str) -> Callable:
+    """
+    Decorador para os métodos do InventoryService: numa requisição com
+    captura de memória, registra as alocações da chamada (diferença entre
+    snapshots do tracemalloc antes e depois, agrupada por linha) e o pico.
+    Chamadas aninhadas em outra rastreada não geram relatório próprio: o
+    reset do pico e as alocações contadas duas vezes distorceriam o externo.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if (profile is None or not profile.memory or _tracing.get()
+                    or not tracemalloc.is_tracing()):
+                return function(*args, **kwargs)
+
+            exclude = (tracemalloc.Filter(False, tracemalloc.__file__),)
+            before = tracemalloc.take_snapshot().filter_traces(exclude)
+            tracemalloc.reset_peak()
+            current_before, _ = tracemalloc.get_traced_memory()
+            started = time.perf_counter()
+            tracing = _tracing.set(True)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _tracing.reset(tracing)
+                elapsed = time.perf_counter() - started
+                current_after, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot().filter_traces(exclude)
+                top = after.compare_to(before, "lineno")[:profiler.memory_top]
+                profile.memory_reports.append({
+                    "call": name,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "allocated_bytes": current_after - current_before,
+                    "peak_bytes": peak - current_before,
+                    "top": [{"location": str(stat.traceback[0]), "size_diff": stat.size_diff,
+                             "count_diff": stat.count_diff} for stat in top],
+                })
+        return wrapper
+    return decorator
+
+
+async def _is_admin(scope) -> bool:
+    from app.core.auth import get_current_user
+
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = await get_current_user(token)
+    except Exception:
+        return False
+    return "admin" in user.roles
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que ativa a captura quando a requisição traz o cabeçalho
+    X-Profile e um token de administrador; a resposta informa o
+    identificador do perfil em X-Profile-Id
+    (GET /api/v1/profiling/profiles/{id}).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        header = dict(scope["headers"]).get(PROFILE_HEADER.lower().encode())
+        if header is None or not await _is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+
+        modes = parse_profile_header(header.decode("latin-1"))
+        profile = profiler.begin(scope["method"], scope["path"], **modes)
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), profile.id.encode())]
+            await send(message)
+
+        sampler = Sampler(profiler.sample_interval) if profile.cpu else None
+        token = _current.set(profile)
+        started = time.perf_counter()
+        if sampler is not None:
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            profile.duration = time.perf_counter() - started
+            _current.reset(token)
+            profiler.finish(profile, sampler)
@@ -0,0 +1,175 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+
+@dataclass
+class QueryStats:
+    """Consultas SQL de uma requisição (ou de um bloco de código)"""
+    queries: int = 0
+    seconds: float = 0.0
+    # Texto da consulta (parametrizado) -> número de execuções
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.seconds += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Consultas idênticas executadas `threshold` vezes ou mais: o padrão
+        de um carregamento N+1 (a mesma consulta por item de uma lista).
+        """
+        return sorted(((statement, count) for statement, count in self.statements.items()
+                       if count >= threshold), key=lambda item: -item[1])
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+# Capturas globais (independentes de contexto), usadas pelos testes
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+# Observadores de todas as consultas (por exemplo, as métricas), cada um
+# com a função que diz se está ativo
+_observers: List[Tuple[Callable[[str, float], None], Callable[[], bool]]] = []
+
+
+def add_observer(observer: Callable[[str, float], None],
+                 enabled: Callable[[], bool] = lambda: True) -> None:
+    _observers.append((observer, enabled))
+
+
+def _is_needed() -> bool:
+    """Se alguém usa a medição: um escopo de requisição, uma captura ou um observador ativo"""
+    return (_current.get() is not None or bool(_captures)
+            or any(enabled() for _, enabled in _observers))
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[QueryStats]:
+    """
+    Contabilizar as consultas do bloco no contexto atual (herdado pelas
+    threads do threadpool). Um escopo já aberto é reutilizado.
+    """
+    stats = _current.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Contabilizar todas as consultas do processo durante o bloco"""
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+# Sem medição ativa, os eventos retornam logo no início: o custo por
+# consulta é a verificação de _is_needed
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _is_needed():
+        conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, elapsed)
+    for observer, enabled in _observers:
+        if enabled():
+            observer(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Consulta com erro: after_cursor_execute não é chamado
+    if context.connection is not None:
+        context.connection.info.pop("query_start", None)
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que conta e mede as consultas SQL de cada requisição
+    (QUERY_STATS_ENABLED): adiciona os cabeçalhos X-DB-Query-Count e
+    X-DB-Query-Time-Ms, registra o resumo no log em modo DEBUG e alerta sobre
+    consultas repetidas QUERY_STATS_N_PLUS_ONE_THRESHOLD vezes ou mais.
+
+    Os cabeçalhos refletem as consultas feitas até o início da resposta; em
+    respostas transmitidas (streaming), as consultas posteriores entram
+    apenas no log.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        with request_scope() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (QUERY_COUNT_HEADER.lower().encode(), str(stats.queries).encode()),
+                        (QUERY_TIME_HEADER.lower().encode(),
+                         f"{stats.seconds * 1000:.2f}".encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope, stats: QueryStats) -> None:
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        if settings.DEBUG:
+            logger.info(f"{scope['method']} {route}: {stats.queries} consultas SQL "
+                        f"em {stats.seconds * 1000:.2f} ms")
+        for statement, count in stats.repeated(settings.QUERY_STATS_N_PLUS_ONE_THRESHOLD):
+            logger.warning(f"Possível N+1 em {scope['method']} {route}: consulta executada "
+                           f"{count} vezes: {' '.join(statement.split())[:300]}")
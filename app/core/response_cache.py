@@ -0,0 +1,185 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+import threading
+
+from fastapi import Depends, Request
+from fastapi.responses import JSONResponse
+
+from app.core import events
+from app.core.auth import get_optional_user, optional_oauth2_scheme
+from app.core.config import settings
+
+Tag = Tuple[Any, ...]
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...], Tuple[str, ...]]
+
+
+def tags_for_change(change: Dict[str, Any]) -> List[Tag]:
+    """
+    Tags invalidadas por uma alteração do inventário:
+
+    - ("host", id) / ("group", id): respostas que incluem a entidade;
+    - ("host_vars", id) / ("group_vars", id): respostas que incluem as
+      variáveis do host/grupo;
+    - ("hosts",) / ("groups",): listas e detalhes de grupo cuja composição
+      depende de inclusões, exclusões ou da árvore de grupos;
+    - ("host_vars",): listas de hosts filtradas por variável.
+    """
+    entity_type, entity_id = change["entity_type"], change["entity_id"]
+    related_id = change.get("related_id")
+    if entity_type == "host":
+        return [("host", entity_id), ("hosts",)]
+    if entity_type == "group":
+        return [("group", entity_id), ("groups",)]
+    if entity_type == "host_var":
+        return [("host_vars", related_id), ("host_vars",)]
+    if entity_type == "group_var":
+        return [("group_vars", related_id)]
+    if entity_type == "membership":
+        return [("host", entity_id), ("group", related_id)]
+    return []
+
+
+class ResponseCache:
+    """
+    Cache LRU limitado das respostas dos endpoints de leitura de hosts e
+    grupos, indexado pela rota, pelos parâmetros de consulta e pelo conjunto
+    de papéis do usuário.
+
+    Cada entrada guarda as tags das entidades presentes na resposta e é
+    removida quando uma alteração confirmada (local ou recebida pelo
+    barramento de invalidação) atinge uma dessas tags. Uma resposta calculada
+    enquanto houve invalidação não é armazenada, para não guardar dados
+    lidos antes da escrita.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, Set[Tag]]]" = OrderedDict()
+        self._keys_by_tag: Dict[Tag, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        events.subscribe(self.on_changes)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.RESPONSE_CACHE_SIZE > 0
+
+    @staticmethod
+    def make_key(request: Request, roles: Iterable[str] = ()) -> CacheKey:
+        return (request.url.path,
+                tuple(sorted(request.query_params.multi_items())),
+                tuple(sorted(set(roles))))
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, content: Any, tags: Iterable[Tag], generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._discard(key)
+            tags = set(tags)
+            self._entries[key] = (content, tags)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > settings.RESPONSE_CACHE_SIZE:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, tags: Iterable[Tag]) -> None:
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._discard(key)
+
+    def on_changes(self, changes: List[Dict[str, Any]]) -> None:
+        self.invalidate(tag for change in changes for tag in tags_for_change(change))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def serve(self, request: Request, roles: Iterable[str], compute: Callable[[], Any],
+              tags: Callable[[Any], Iterable[Tag]]) -> JSONResponse:
+        """
+        Responder a partir do cache ou calcular o conteúdo (já serializado
+        para JSON) com `compute`, armazenando-o com as tags de `tags`.
+        """
+        if not self.is_enabled():
+            return JSONResponse(compute())
+        key = self.make_key(request, roles)
+        content = self.get(key)
+        if content is None:
+            generation = self.generation
+            content = compute()
+            self.put(key, content, tags(content), generation)
+        return JSONResponse(content)
+
+
+def host_tags(content: Dict[str, Any]) -> List[Tag]:
+    """Tags do detalhe de um host: o host, suas variáveis e os seus grupos"""
+    return [("host", content["id"]), ("host_vars", content["id"])] + [
+        ("group", group["id"]) for group in content["groups"]]
+
+
+def group_tags(content: Dict[str, Any]) -> List[Tag]:
+    """
+    Tags do detalhe de um grupo: o grupo, o pai, os subgrupos e os hosts de
+    toda a subárvore; novos subgrupos alteram a árvore, daí ("groups",).
+    """
+    tags: List[Tag] = [("groups",)]
+    pending = [content]
+    while pending:
+        group = pending.pop()
+        tags.extend([("group", group["id"]), ("group_vars", group["id"])])
+        tags.extend(("host", host["id"]) for host in group["hosts"])
+        if group.get("parent"):
+            tags.append(("group", group["parent"]["id"]))
+        pending.extend(group["children"])
+    return tags
+
+
+def list_tags(entity_type: str, *base: Tag) -> Callable[[List[Dict[str, Any]]], List[Tag]]:
+    """Tags de uma lista: as tags da consulta e as entidades retornadas"""
+    def tags(content: List[Dict[str, Any]]) -> List[Tag]:
+        return list(base) + [(entity_type, item["id"]) for item in content]
+    return tags
+
+
+response_cache = ResponseCache()
+
+
+async def cache_roles(token: Optional[str] = Depends(optional_oauth2_scheme)) -> List[str]:
+    """
+    Dependência com os papéis do usuário para a chave do cache de respostas.
+    Com o cache desativado a resposta não depende deles, e o token nem é
+    validado.
+    """
+    if not response_cache.is_enabled():
+        return []
+    user = await get_optional_user(token)
+    return user.roles if user else []
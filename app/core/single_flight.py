@@ -0,0 +1,69 @@
+from typing import Callable, Dict, Hashable, List, TypeVar
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Instâncias criadas, para as métricas
+flights: List["SingleFlight"] = []
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições idênticas simultâneas: enquanto uma chamada
+    com a mesma chave está em andamento, as demais aguardam e recebem o seu
+    resultado (ou a sua exceção), em vez de repetir o trabalho.
+
+    A função é executada no threadpool; a espera acontece no laço de eventos,
+    sem ocupar uma thread por requisição. Quem desiste (cliente
+    desconectado) não cancela a chamada compartilhada. Nada é guardado
+    depois que a chamada termina: isto não é um cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.shared = 0
+        flights.append(self)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.SINGLE_FLIGHT_ENABLED
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        if not self.is_enabled():
+            self.executions += 1
+            return await run_in_threadpool(function)
+
+        future = self._calls.get(key)
+        # Chamadas de outro laço de eventos (por exemplo, do TestClient) não
+        # podem ser aguardadas aqui
+        if future is None or future.get_loop() is not asyncio.get_running_loop():
+            self.executions += 1
+            future = asyncio.ensure_future(run_in_threadpool(function))
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Evitar o aviso de exceção não lida quando todos desistiram
+        if not future.cancelled():
+            future.exception()
+
+
+def flight_stats():
+    """Execuções e requisições atendidas por uma chamada compartilhada"""
+    for flight in flights:
+        yield (flight.name, "executed"), flight.executions
+        yield (flight.name, "shared"), flight.shared
@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import logging
+import threading
+
+from app.core import events
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Marcador enfileirado quando um assinante lento perde notificações
+LAGGED = {"type": "lagged"}
+
+
+class Subscription:
+    """
+    Assinatura de um consumidor de eventos, com buffer limitado.
+
+    Se o consumidor não acompanhar o ritmo e o buffer encher, as notificações
+    pendentes são descartadas e substituídas por um único marcador LAGGED; o
+    consumidor deve então sincronizar pelo endpoint de delta a partir da
+    última revisão recebida.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, group_ids: Optional[Set[int]] = None,
+                 maxsize: int = 1000):
+        self.loop = loop
+        self.group_ids = group_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def matches(self, change: Dict[str, Any]) -> bool:
+        if self.group_ids is None:
+            return True
+        scope = change.get("group_ids")
+        # Sem escopo conhecido, a notificação é entregue por segurança
+        if scope is None:
+            return True
+        if not self.group_ids.intersection(scope):
+            return False
+        # Novos subgrupos dentro da subárvore passam a fazer parte do filtro
+        if change["entity_type"] == "group" and change["action"] != "deleted":
+            self.group_ids.add(change["entity_id"])
+        return True
+
+    def deliver(self, changes: List[Dict[str, Any]]) -> None:
+        """Enfileirar alterações; executado na thread do event loop."""
+        for change in changes:
+            if not self.matches(change):
+                continue
+            if self.lagged:
+                # O consumidor ainda não leu o marcador; ele fará a ressincronização
+                continue
+            if self.queue.full():
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.queue.put_nowait(LAGGED)
+                self.lagged = True
+                continue
+            self.queue.put_nowait(change)
+
+    async def get(self) -> Dict[str, Any]:
+        item = await self.queue.get()
+        if item is LAGGED:
+            self.lagged = False
+        return item
+
+
+class SubscriptionBroker:
+    """Distribui as alterações confirmadas entre os assinantes conectados."""
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, group_ids: Optional[Set[int]] = None) -> Subscription:
+        subscription = Subscription(
+            asyncio.get_running_loop(), group_ids,
+            maxsize=settings.EVENTS_SUBSCRIBER_BUFFER)
+        with self._lock:
+            if not self._subscriptions:
+                events.subscribe(self.publish)
+            self._subscriptions.append(subscription)
+        if group_ids is not None:
+            events.request_group_scope(True)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.remove(subscription)
+            if not self._subscriptions:
+                events.unsubscribe(self.publish)
+        if subscription.group_ids is not None:
+            events.request_group_scope(False)
+
+    def publish(self, changes: List[Dict[str, Any]]) -> None:
+        """Publicar alterações; pode ser chamado de qualquer thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, changes)
+            except RuntimeError:
+                # Event loop já encerrado
+                self.unsubscribe(subscription)
+
+
+broker = SubscriptionBroker()
@@ -0,0 +1,281 @@
+from typing import Any, Dict, Iterable, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import binascii
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Formato Ansible Vault 1.1 (AES256), compatível com `ansible-vault`
+VAULT_HEADER = "$ANSIBLE_VAULT;1.1;AES256"
+VAULT_PREFIX = "$ANSIBLE_VAULT;"
+# Chave usada pelo Ansible para representar valores vault em JSON
+VAULT_JSON_KEY = "__ansible_vault"
+
+_KDF_ITERATIONS = 10000
+_KEY_LENGTH = 32
+_IV_LENGTH = 16
+
+
+class VaultError(Exception):
+    """Erro ao criptografar ou descriptografar um valor vault."""
+
+
+def is_vault_value(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(VAULT_PREFIX)
+
+
+def _derive_keys(password: str, salt: bytes):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=2 * _KEY_LENGTH + _IV_LENGTH,
+        salt=salt,
+        iterations=_KDF_ITERATIONS,
+    )
+    derived = kdf.derive(password.encode("utf-8"))
+    return (derived[:_KEY_LENGTH], derived[_KEY_LENGTH:2 * _KEY_LENGTH],
+            derived[2 * _KEY_LENGTH:])
+
+
+def encrypt(plaintext: str, password: str) -> str:
+    """Criptografar um valor no formato Ansible Vault 1.1."""
+    try:
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        raise VaultError("O pacote 'cryptography' é necessário para usar o Ansible Vault")
+
+    salt = os.urandom(32)
+    cipher_key, hmac_key, iv = _derive_keys(password, salt)
+
+    padder = padding.PKCS7(algorithms.AES.block_size).padder()
+    padded = padder.update(plaintext.encode("utf-8")) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(cipher_key), modes.CTR(iv)).encryptor()
+    ciphertext = encryptor.update(padded) + encryptor.finalize()
+    signature = hmac.new(hmac_key, ciphertext, hashlib.sha256).hexdigest()
+
+    body = b"\n".join([
+        binascii.hexlify(salt),
+        signature.encode("ascii"),
+        binascii.hexlify(ciphertext),
+    ])
+    hexed = binascii.hexlify(body).decode("ascii")
+    lines = [hexed[i:i + 80] for i in range(0, len(hexed), 80)]
+    return "\n".join([VAULT_HEADER] + lines)
+
+
+def decrypt(vault_text: str, password: str) -> str:
+    """Descriptografar um valor no formato Ansible Vault 1.1."""
+    try:
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        raise VaultError("O pacote 'cryptography' é necessário para usar o Ansible Vault")
+
+    lines = vault_text.strip().splitlines()
+    header = lines[0].strip().split(";")
+    if len(header) < 3 or header[2].strip() != "AES256":
+        raise VaultError("Formato vault não suportado")
+    try:
+        body = binascii.unhexlify("".join(line.strip() for line in lines[1:]))
+        salt_hex, signature, ciphertext_hex = body.split(b"\n", 2)
+        salt = binascii.unhexlify(salt_hex)
+        ciphertext = binascii.unhexlify(ciphertext_hex)
+    except (binascii.Error, ValueError):
+        raise VaultError("Valor vault malformado")
+
+    cipher_key, hmac_key, iv = _derive_keys(password, salt)
+    expected = hmac.new(hmac_key, ciphertext, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected.encode("ascii"), signature.strip()):
+        raise VaultError("Senha do vault inválida ou valor corrompido")
+
+    decryptor = Cipher(algorithms.AES(cipher_key), modes.CTR(iv)).decryptor()
+    padded = decryptor.update(ciphertext) + decryptor.finalize()
+    unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+    return (unpadder.update(padded) + unpadder.finalize()).decode("utf-8")
+
+
+def _decrypt_or_error(vault_text: str, password: str):
+    """Descriptografar no pool de processos, devolvendo o erro em vez de lançá-lo."""
+    try:
+        return decrypt(vault_text, password), None
+    except (VaultError, UnicodeDecodeError, ValueError) as e:
+        return None, str(e)
+
+
+def _process_context():
+    # Sem fork: o processo da API tem threads (threadpool, sampler, pool de
+    # conexões), e um fork herdaria locks em estado inconsistente
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class Vault:
+    """
+    Criptografia de variáveis com Ansible Vault usando a senha configurada.
+
+    A derivação de chave (PBKDF2) é cara em CPU, por isso as operações em lote
+    são distribuídas em um pool de processos, e os valores descriptografados
+    ficam em um cache LRU limitado, indexado pelo hash do texto cifrado.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return bool(settings.VAULT_PASSWORD)
+
+    def _password(self) -> str:
+        if not self.is_enabled():
+            raise VaultError("Senha do vault não configurada (VAULT_PASSWORD)")
+        return settings.VAULT_PASSWORD
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if settings.VAULT_WORKERS <= 0:
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.VAULT_WORKERS, mp_context=_process_context())
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    # Cache de valores descriptografados
+
+    @staticmethod
+    def _cache_key(vault_text: str) -> str:
+        return hashlib.sha256(vault_text.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return value
+
+    def _cache_put(self, key: str, value: str) -> None:
+        if settings.VAULT_CACHE_SIZE <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > settings.VAULT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    # Operações
+
+    def encrypt(self, plaintext: str) -> str:
+        vault_text = encrypt(plaintext, self._password())
+        self._cache_put(self._cache_key(vault_text), plaintext)
+        return vault_text
+
+    def decrypt(self, vault_text: str) -> str:
+        key = self._cache_key(vault_text)
+        plaintext = self._cache_get(key)
+        if plaintext is None:
+            plaintext = decrypt(vault_text, self._password())
+            self._cache_put(key, plaintext)
+        return plaintext
+
+    def decrypt_many(self, vault_texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Descriptografar vários valores, usando o cache e o pool de processos.
+        Cada valor é tratado isoladamente: os que não puderem ser
+        descriptografados são registrados no log e omitidos do resultado.
+        """
+        password = self._password()
+        results: Dict[str, str] = {}
+        missing: List[str] = []
+        for vault_text in set(vault_texts):
+            cached = self._cache_get(self._cache_key(vault_text))
+            if cached is None:
+                missing.append(vault_text)
+            else:
+                results[vault_text] = cached
+
+        if missing:
+            executor = self._get_executor() if len(missing) > 1 else None
+            if executor is None:
+                outcomes = [_decrypt_or_error(text, password) for text in missing]
+            else:
+                chunksize = max(1, len(missing) // (settings.VAULT_WORKERS * 4))
+                outcomes = list(executor.map(
+                    _decrypt_or_error, missing, [password] * len(missing), chunksize=chunksize))
+            failures = 0
+            for vault_text, (plaintext, error) in zip(missing, outcomes):
+                if error is not None:
+                    failures += 1
+                    logger.error(f"Falha ao descriptografar valor vault "
+                                 f"{self._cache_key(vault_text)[:12]}: {error}")
+                    continue
+                self._cache_put(self._cache_key(vault_text), plaintext)
+                results[vault_text] = plaintext
+            if failures:
+                logger.warning(f"{failures} de {len(missing)} valores vault mantidos criptografados")
+        return results
+
+    def prepare_value(self, var_value: str, is_encrypted: bool) -> str:
+        """
+        Ajustar o valor armazenado ao status de criptografia da variável:
+        criptografa valores em texto puro marcados como criptografados e
+        descriptografa valores vault que deixaram de ser criptografados.
+        Sem senha configurada, o valor é mantido como está.
+        """
+        if not self.is_enabled() or var_value is None:
+            return var_value
+        if is_encrypted and not is_vault_value(var_value):
+            return self.encrypt(var_value)
+        if not is_encrypted and is_vault_value(var_value):
+            return self.decrypt(var_value)
+        return var_value
+
+    def reveal(self, variables: Iterable[Dict[str, Any]]) -> None:
+        """
+        Substituir, nos dicionários de variáveis informados, os valores
+        {"__ansible_vault": ...} pelo texto descriptografado (em lote). Os
+        valores que não puderem ser descriptografados permanecem cifrados.
+        """
+        variables = list(variables)
+        vault_texts = [
+            value[VAULT_JSON_KEY]
+            for values in variables for value in values.values()
+            if isinstance(value, dict) and VAULT_JSON_KEY in value
+        ]
+        if not vault_texts:
+            return
+        plaintexts = self.decrypt_many(vault_texts)
+        for values in variables:
+            for name, value in values.items():
+                if isinstance(value, dict) and value.get(VAULT_JSON_KEY) in plaintexts:
+                    values[name] = plaintexts[value[VAULT_JSON_KEY]]
+
+
+vault = Vault()
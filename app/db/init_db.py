@@ -0,0 +1,43 @@
+"""
+Preparação do banco de dados, separada da inicialização da API.
+
+No modo de inicialização "production" (STARTUP_MODE), a API não executa
+DDL; este comando deve rodar antes da implantação (por exemplo, em um job
+ou init container):
+
+    python -m app.db.init_db
+"""
+from sqlmodel import Session, SQLModel
+
+# Registrar todos os modelos no metadata antes do create_all
+import app.models.inventory  # noqa: F401
+from app.db.session import get_engine
+from app.services.var_document_service import VarDocumentService
+
+
+def create_tables() -> None:
+    SQLModel.metadata.create_all(get_engine())
+
+
+def rebuild_var_documents() -> None:
+    """Reconstruir os documentos JSON de variáveis quando o modo "json" está ativo"""
+    with Session(get_engine()) as session:
+        VarDocumentService.rebuild(session)
+
+
+def init_db() -> None:
+    create_tables()
+    if VarDocumentService.is_enabled():
+        rebuild_var_documents()
+
+
+def main() -> None:
+    import logging
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    logging.getLogger(__name__).info("Banco de dados pronto")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,94 @@
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, raiseload
+from sqlalchemy.orm import Session as SASession
 from sqlmodel import Session, SQLModel, create_engine
 import logging
+import os
+import threading
 
 from app.core.config import settings
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Opções de conexão específicas para PostgreSQL
-connect_args = {}
-if settings.DATABASE_TYPE.lower() == "postgresql":
-    # Adicionar opções específicas para PostgreSQL se necessário
-    logger.info(f"Configurando conexão para PostgreSQL: {settings.DATABASE_URL}")
-else:
-    # SQLite precisa desta configuração para suportar múltiplas threads
-    connect_args = {"check_same_thread": False}
-    logger.info(f"Configurando conexão para SQLite: {settings.DATABASE_URL}")
-
-# Criar engine do banco de dados
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    connect_args=connect_args
-)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def _create_engine() -> Engine:
+    # Opções de conexão específicas para PostgreSQL
+    connect_args = {}
+    pool_options = {}
+    if settings.DATABASE_TYPE.lower() == "postgresql":
+        # Pool de conexões por processo: com N workers, o servidor recebe
+        # até N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexões
+        pool_options = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        }
+        logger.info(f"Configurando conexão para PostgreSQL: {settings.DATABASE_URL}")
+    else:
+        # SQLite precisa desta configuração para suportar múltiplas threads
+        connect_args = {"check_same_thread": False}
+        logger.info(f"Configurando conexão para SQLite: {settings.DATABASE_URL}")
+
+    return create_engine(
+        settings.DATABASE_URL,
+        echo=settings.DEBUG,
+        connect_args=connect_args,
+        **pool_options
+    )
+
+
+def get_engine() -> Engine:
+    """Engine do banco de dados, criado no primeiro uso (não na importação)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def reset_engine_after_fork() -> None:
+    """
+    Descartar, no processo filho, as conexões herdadas do processo pai
+    (sem fechá-las, pois ainda pertencem ao pai): cada worker abre o próprio
+    pool na primeira consulta.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_engine_after_fork)
+
+
+def __getattr__(name: str):
+    # Compatibilidade com `from app.db.session import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Modo "raiseload": qualquer carregamento preguiçoso de relacionamento que
+# emitiria SQL gera erro, expondo padrões N+1 (ativado nos testes)
+
+
+@event.listens_for(SASession, "do_orm_execute")
+def _apply_raiseload(execute_state: ORMExecuteState) -> None:
+    if not settings.ORM_RAISELOAD or not execute_state.is_select:
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    # Opções de carregamento explícitas (selectinload etc.) têm precedência
+    execute_state.statement = execute_state.statement.options(
+        raiseload("*", sql_only=True))
+
 
 def get_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
\ No newline at end of file
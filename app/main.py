@@ -1,18 +1,59 @@
-from fastapi import FastAPI, APIRouter, Depends
-from sqlmodel import SQLModel
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
+from sqlmodel import Session
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import logging
+import threading
+import time
 
 from app.core.config import settings
-from app.core.auth import get_current_user, User, has_role
-from app.db.session import engine
-from app.api.endpoints import groups, hosts, group_vars, host_vars, inventory, auth
+from app.core.auth import get_current_user, get_keycloak_public_key, User, has_role
+from app.core import metrics, profiling, query_stats
+from app.core.invalidation import bus
+from app.core.vault import vault
+from app.db.init_db import init_db
+from app.db.session import get_engine
+from app.api.endpoints import groups, hosts, group_vars, host_vars, inventory, auth, profiling as profiling_endpoints
+from app.services.artifact_service import artifacts
+from app.services.inventory_graph_service import inventory_graph
 
-# Criar as tabelas no banco de dados
+logger = logging.getLogger(__name__)
 
 
-def create_tables():
-    SQLModel.metadata.create_all(engine)
+def configure_logging():
+    # Configurado na inicialização da aplicação, não na importação dos módulos
+    logging.basicConfig(level=settings.LOG_LEVEL)
+
+
+def is_production() -> bool:
+    return settings.STARTUP_MODE == "production"
+
+# Carregar o grafo do inventário em memória
+
+
+def load_inventory_graph():
+    with Session(get_engine()) as session:
+        inventory_graph.ensure_current(session)
+
+
+def warm_caches():
+    """
+    Aquecimento em segundo plano no modo "production": conexão do pool,
+    chave pública do Keycloak e grafo do inventário. As requisições que
+    chegam antes disso apenas fazem o mesmo trabalho sob demanda.
+    """
+    started = time.perf_counter()
+    tasks = [("conexão com o banco", lambda: get_engine().connect().close()),
+             ("chave pública do Keycloak", get_keycloak_public_key)]
+    if inventory_graph.is_enabled():
+        tasks.append(("grafo do inventário", load_inventory_graph))
+    for name, task in tasks:
+        try:
+            task()
+        except Exception as e:
+            logger.warning(f"Falha no aquecimento ({name}): {e}")
+    logger.info(f"Aquecimento concluído em {time.perf_counter() - started:.2f}s")
 
 # Definir o contexto lifespan para substituir on_event
 
@@ -20,10 +61,26 @@ def create_tables():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Código executado na inicialização (substitui @app.on_event("startup"))
-    create_tables()
+    configure_logging()
+    engine = get_engine()
+    if is_production():
+        # Sem DDL: o esquema é preparado por `python -m app.db.init_db`
+        threading.Thread(target=warm_caches, name="cache-warmup", daemon=True).start()
+    else:
+        init_db()
+        if inventory_graph.is_enabled():
+            load_inventory_graph()
+    # Receber as alterações confirmadas por outros workers
+    bus.start(engine)
+    # Gerar os arquivos estáticos do inventário e mantê-los atualizados
+    # (no modo "production", a geração inicial fica em segundo plano)
+    artifacts.start(engine, background=is_production())
     yield
     # Código executado no encerramento (substitui @app.on_event("shutdown"))
-    # Coloque aqui qualquer limpeza necessária
+    artifacts.stop()
+    bus.stop()
+    # Encerrar o pool de processos do Ansible Vault
+    vault.shutdown()
 
 # Inicializar a aplicação FastAPI
 app = FastAPI(
@@ -45,6 +102,14 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir todos os headers
 )
 
+# Métricas de latência, requisições em andamento e consultas SQL por rota
+app.add_middleware(metrics.MetricsMiddleware)
+# Contagem de consultas SQL por requisição e detecção de N+1
+app.add_middleware(query_stats.QueryStatsMiddleware)
+# Captura de CPU e memória sob demanda (cabeçalho X-Profile de um admin)
+app.add_middleware(profiling.ProfilingMiddleware)
+metrics.register_collectors(get_engine)
+
 # Agrupar as rotas sob um prefixo comum
 api_router = APIRouter()
 
@@ -66,6 +131,8 @@ api_router.include_router(
     host_vars.router, prefix="/host-vars", tags=["host-vars"])
 api_router.include_router(
     inventory.router, prefix="/inventory", tags=["inventory"])
+api_router.include_router(
+    profiling_endpoints.router, prefix="/profiling", tags=["profiling"])
 
 # Adicionar o prefixo global da API
 app.include_router(api_router, prefix=f"/api/{settings.API_VERSION}")
@@ -75,4 +142,15 @@ app.include_router(api_router, prefix=f"/api/{settings.API_VERSION}")
 def root():
     return {"message": f"Bem-vindo à {settings.PROJECT_NAME}! Use /api/docs para acessar a documentação."}
 
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    if not metrics.is_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Métricas desativadas (METRICS_ENABLED)"
+        )
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # Removido o on_event("startup") depreciado - substituído pelo lifespan acima
@@ -1,7 +1,12 @@
-from typing import List, Optional, Set
+from typing import Any, Dict, List, Optional, Set
 from datetime import datetime
+from sqlalchemy import JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Field, Relationship, SQLModel, Column, DateTime
 
+# Tipo JSON usado nos documentos de variáveis (JSONB no PostgreSQL)
+VarsJSON = JSON().with_variant(JSONB(), "postgresql")
+
 # Tabela de relacionamento muitos-para-muitos entre hosts e groups
 
 
@@ -120,3 +125,77 @@ class HostVar(HostVarBase, table=True):
     host: Host = Relationship(
         back_populates="variables"
     )
+
+
+# Documentos de variáveis tipadas (modo de armazenamento "json"):
+# um único documento JSON por host/grupo em vez de uma linha por variável
+
+
+class HostVarDocument(SQLModel, table=True):
+    __tablename__ = "host_var_documents"
+    __table_args__ = (
+        # Índice GIN para consultas por chave/valor no PostgreSQL
+        Index("ix_host_var_documents_vars", "vars",
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+    host_id: int = Field(foreign_key="hosts.id", primary_key=True)
+    vars: Dict[str, Any] = Field(
+        default_factory=dict, sa_column=Column(VarsJSON, nullable=False))
+    updated_at: datetime = Field(
+        default_factory=datetime.now, sa_column=Column(DateTime(timezone=True)))
+
+
+class GroupVarDocument(SQLModel, table=True):
+    __tablename__ = "group_var_documents"
+    __table_args__ = (
+        Index("ix_group_var_documents_vars", "vars",
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+    group_id: int = Field(foreign_key="groups.id", primary_key=True)
+    vars: Dict[str, Any] = Field(
+        default_factory=dict, sa_column=Column(VarsJSON, nullable=False))
+    updated_at: datetime = Field(
+        default_factory=datetime.now, sa_column=Column(DateTime(timezone=True)))
+
+
+# Registro de alterações (append-only) com número de revisão global
+
+
+class InventoryChange(SQLModel, table=True):
+    __tablename__ = "inventory_changes"
+
+    # A revisão é a chave primária autoincremental: cada alteração gera uma nova
+    revision: Optional[int] = Field(default=None, primary_key=True)
+    # host, group, host_var, group_var ou membership
+    entity_type: str = Field(max_length=20)
+    # Para "membership" é o ID do host
+    entity_id: int
+    # Dono da variável (host/grupo) ou, para "membership", o ID do grupo
+    related_id: Optional[int] = Field(default=None)
+    # created, updated ou deleted
+    action: str = Field(max_length=10)
+    created_at: datetime = Field(
+        default_factory=datetime.now, sa_column=Column(DateTime(timezone=True)))
+
+
+# Regras de grupos dinâmicos: um grupo com regras tem a sua associação de
+# hosts materializada automaticamente em host_group_membership
+
+
+class DynamicGroupRuleBase(SQLModel):
+    # Campo do host (hostname, ansible_host, ansible_port, ansible_user,
+    # ansible_connection) ou variável do host no formato "vars.<nome>"
+    field: str = Field(max_length=255)
+    # eq, ne, regex, contains ou exists
+    operator: str = Field(default="eq", max_length=20)
+    value: Optional[str] = Field(default=None)
+
+
+class DynamicGroupRule(DynamicGroupRuleBase, table=True):
+    __tablename__ = "dynamic_group_rules"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    group_id: int = Field(foreign_key="groups.id", index=True)
+    created_at: Optional[datetime] = Field(default=None)
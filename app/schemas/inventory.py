@@ -2,7 +2,7 @@ from typing import List, Optional
 from datetime import datetime
 from sqlmodel import SQLModel
 
-from app.models.inventory import GroupBase, HostBase, GroupVarBase, HostVarBase
+from app.models.inventory import GroupBase, HostBase, GroupVarBase, HostVarBase, DynamicGroupRuleBase
 
 # Esquemas para criar e atualizar entidades
 
@@ -50,6 +50,9 @@ class HostVarUpdate(SQLModel):
     var_value: Optional[str] = None
     is_encrypted: Optional[bool] = None
 
+class DynamicGroupRuleCreate(DynamicGroupRuleBase):
+    pass
+
 # Esquema para associar hosts a grupos
 
 
@@ -83,6 +86,11 @@ class HostVarRead(HostVarBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+class DynamicGroupRuleRead(DynamicGroupRuleBase):
+    id: int
+    group_id: int
+    created_at: Optional[datetime] = None
+
 # Esquemas para respostas incluindo relacionamentos
 
 
@@ -97,6 +105,53 @@ class HostWithDetails(HostRead):
     groups: List[GroupRead] = []
     variables: List[HostVarRead] = []
 
+# Esquemas para o delta de alterações do inventário
+
+
+class HostDelta(SQLModel):
+    upserted: List[HostRead] = []
+    deleted: List[int] = []
+
+
+class GroupDelta(SQLModel):
+    upserted: List[GroupRead] = []
+    deleted: List[int] = []
+
+
+class HostVarDelta(SQLModel):
+    upserted: List[HostVarRead] = []
+    deleted: List[int] = []
+
+
+class GroupVarDelta(SQLModel):
+    upserted: List[GroupVarRead] = []
+    deleted: List[int] = []
+
+
+class MembershipDelta(SQLModel):
+    added: List[HostGroupAssociation] = []
+    removed: List[HostGroupAssociation] = []
+
+
+class InventoryDelta(SQLModel):
+    since: int
+    revision: int
+    hosts: HostDelta = HostDelta()
+    groups: GroupDelta = GroupDelta()
+    host_vars: HostVarDelta = HostVarDelta()
+    group_vars: GroupVarDelta = GroupVarDelta()
+    memberships: MembershipDelta = MembershipDelta()
+
+# Esquema para a resolução de padrões de hosts
+
+
+class HostPatternResult(SQLModel):
+    pattern: str
+    revision: int
+    count: int
+    hosts: List[str] = []
+    host_ids: List[int] = []
+
 # Esquema para exportação de inventário no formato Ansible
 
 
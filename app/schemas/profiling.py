@@ -0,0 +1,9 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class ProfilingSettings(SQLModel):
+    """Ajustes da captura de perfis, aplicados ao worker que atende a requisição"""
+    enabled: Optional[bool] = None
+    sample_interval_ms: Optional[float] = Field(default=None, ge=0.5, le=1000)
+    memory_top: Optional[int] = Field(default=None, ge=1, le=200)
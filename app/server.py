@@ -0,0 +1,212 @@
+"""
+Servidor de produção, configurado pelas variáveis SERVER_* de `Settings`:
+
+    python -m app.server
+    python -m app.server --print-config
+
+Com o gunicorn instalado (SERVER_BACKEND=auto ou gunicorn), o processo
+mestre gerencia workers do uvicorn:
+
+- SERVER_PRELOAD: a aplicação é importada e aquecida no mestre antes do
+  fork, e os objetos resultantes são congelados (`gc.freeze`) para que a
+  coleta de lixo dos workers não toque nessas páginas (copy-on-write);
+- cada worker descarta as conexões herdadas e abre o próprio pool de
+  conexões (`app.db.session.reset_engine_after_fork`);
+- reinício gradual: `kill -HUP <mestre>` substitui os workers, que terminam
+  as requisições em andamento dentro de SERVER_GRACEFUL_TIMEOUT segundos;
+  `TTIN`/`TTOU` aumentam ou reduzem o número de workers. Com SERVER_PRELOAD
+  os novos workers são cópias do mestre e não carregam código novo: uma
+  nova versão exige reiniciar o mestre. (O `USR2` do gunicorn não funciona
+  com `python -m`: o mestre é reexecutado a partir do caminho do script.)
+
+Sem o gunicorn, os workers são iniciados pelo próprio uvicorn (sem preload
+quando há mais de um worker).
+"""
+from typing import Any, Dict, Optional
+import argparse
+import gc
+import importlib.util
+import json
+import logging
+import os
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def resolve_backend(value: str) -> str:
+    if value == "auto":
+        return "gunicorn" if _installed("gunicorn") and os.name != "nt" else "uvicorn"
+    if value not in ("gunicorn", "uvicorn"):
+        raise ValueError(f"SERVER_BACKEND inválido: '{value}'")
+    return value
+
+
+def resolve_workers(value: int) -> int:
+    return value if value > 0 else os.cpu_count() or 1
+
+
+def resolve_loop(value: str) -> str:
+    if value == "auto":
+        return "uvloop" if _installed("uvloop") else "asyncio"
+    return value
+
+
+def resolve_http(value: str) -> str:
+    if value == "auto":
+        return "httptools" if _installed("httptools") else "h11"
+    return value
+
+
+def server_options() -> Dict[str, Any]:
+    """Configuração efetiva do servidor a partir de `Settings`"""
+    return {
+        "backend": resolve_backend(settings.SERVER_BACKEND),
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": resolve_workers(settings.SERVER_WORKERS),
+        "loop": resolve_loop(settings.SERVER_LOOP),
+        "http": resolve_http(settings.SERVER_HTTP),
+        "preload": settings.SERVER_PRELOAD,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "timeout": settings.SERVER_TIMEOUT,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "backlog": settings.SERVER_BACKLOG,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+    }
+
+
+def preload_application():
+    """
+    Importar e aquecer a aplicação no processo mestre. O que é carregado
+    aqui é compartilhado pelos workers: as importações adiadas na
+    inicialização (requests, python-jose) e o esquema OpenAPI.
+    """
+    from app.main import app, configure_logging
+
+    configure_logging()
+    import requests  # noqa: F401
+    from jose import jwt  # noqa: F401
+
+    app.openapi()
+    # Mover os objetos sobreviventes para a geração permanente: a coleta nos
+    # workers não escreve nas páginas herdadas do mestre
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Aplicação pré-carregada ({gc.get_freeze_count()} objetos congelados)")
+    return app
+
+
+def gunicorn_config(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Configuração do gunicorn (exceto a classe de worker)"""
+    return {
+        "bind": f"{options['host']}:{options['port']}",
+        "workers": options["workers"],
+        "preload_app": options["preload"],
+        "keepalive": options["keepalive"],
+        "graceful_timeout": options["graceful_timeout"],
+        "timeout": options["timeout"],
+        "max_requests": options["max_requests"],
+        "max_requests_jitter": options["max_requests_jitter"],
+        "backlog": options["backlog"],
+        "forwarded_allow_ips": options["forwarded_allow_ips"],
+        "post_fork": _post_fork,
+    }
+
+
+def _post_fork(server, worker) -> None:
+    # As conexões herdadas já foram descartadas pelo os.register_at_fork
+    # de app.db.session; o pool do worker é aberto na primeira consulta
+    server.log.info(f"Worker {worker.pid} iniciado")
+
+
+def _worker_class(options: Dict[str, Any]):
+    from uvicorn.workers import UvicornWorker
+
+    class InventoryWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": options["loop"],
+            "http": options["http"],
+            "timeout_graceful_shutdown": options["graceful_timeout"],
+        }
+
+    return InventoryWorker
+
+
+def run_gunicorn(options: Dict[str, Any]) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    config = {**gunicorn_config(options), "worker_class": _worker_class(options)}
+
+    class InventoryApplication(BaseApplication):
+        def load_config(self):
+            for key, value in config.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Com preload_app, chamado uma vez no mestre; senão, em cada worker
+            if options["preload"]:
+                return preload_application()
+            from app.main import app
+            return app
+
+    InventoryApplication().run()
+
+
+def run_uvicorn(options: Dict[str, Any]) -> None:
+    import uvicorn
+
+    app: Any = APP_PATH
+    if options["workers"] > 1:
+        if options["preload"]:
+            logger.warning("Preload requer o gunicorn; os workers do uvicorn importam a aplicação")
+    elif options["preload"]:
+        app = preload_application()
+
+    uvicorn.run(
+        app,
+        host=options["host"],
+        port=options["port"],
+        workers=options["workers"],
+        loop=options["loop"],
+        http=options["http"],
+        timeout_keep_alive=options["keepalive"],
+        timeout_graceful_shutdown=options["graceful_timeout"],
+        limit_max_requests=options["max_requests"] or None,
+        backlog=options["backlog"],
+        proxy_headers=True,
+        forwarded_allow_ips=options["forwarded_allow_ips"],
+    )
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Servidor de produção da Ansible Inventory API")
+    parser.add_argument("--print-config", action="store_true",
+                        help="mostrar a configuração efetiva e sair")
+    args = parser.parse_args(argv)
+
+    options = server_options()
+    if args.print_config:
+        print(json.dumps(options, indent=2))
+        return
+
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    logger.info(f"Iniciando com {options['backend']}: {options['workers']} workers, "
+                f"loop {options['loop']}, http {options['http']}")
+    if options["backend"] == "gunicorn":
+        run_gunicorn(options)
+    else:
+        run_uvicorn(options)
+
+
+if __name__ == "__main__":
+    main()
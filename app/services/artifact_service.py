@@ -0,0 +1,254 @@
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core import events, metrics
+from app.core.config import settings
+from app.services.change_log_service import ChangeLogService
+from app.services.inventory_service import InventoryService
+
+logger = logging.getLogger(__name__)
+
+# Formato -> (nome do arquivo, media type)
+ARTIFACT_FORMATS: Dict[str, tuple] = {
+    "json": ("inventory.json", "application/json"),
+    "yaml": ("hosts.yml", "application/yaml"),
+    "ini": ("hosts.ini", "text/plain; charset=utf-8"),
+}
+_REVISION_FILE = "REVISION"
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _is_vault(value: Any) -> bool:
+    return isinstance(value, dict) and set(value) == {"__ansible_vault"}
+
+
+def render_json(inventory: Dict[str, Any]) -> bytes:
+    """O mesmo documento retornado por GET /inventory/ansible-format"""
+    return json.dumps(inventory, separators=(",", ":")).encode("utf-8")
+
+
+def _yaml_groups(inventory: Dict[str, Any]) -> Dict[str, Any]:
+    children = {}
+    for name in inventory["all"]["children"]:
+        group = inventory[name]
+        entry: Dict[str, Any] = {}
+        if group["hosts"]:
+            entry["hosts"] = group["hosts"]
+        if group["vars"]:
+            entry["vars"] = group["vars"]
+        if group.get("children"):
+            entry["children"] = {child: {} for child in group["children"]}
+        children[name] = entry
+    return {"all": {"children": children}}
+
+
+def render_yaml(inventory: Dict[str, Any]) -> bytes:
+    """
+    Inventário no formato YAML do Ansible (plugin `yaml`), com valores vault
+    emitidos com a tag `!vault`. Requer o pacote PyYAML.
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise ArtifactError("O pacote 'PyYAML' é necessário para gerar o inventário YAML")
+
+    class InventoryDumper(yaml.SafeDumper):
+        pass
+
+    def represent_dict(dumper, value):
+        if _is_vault(value):
+            return dumper.represent_scalar("!vault", value["__ansible_vault"], style="|")
+        return dumper.represent_dict(value.items())
+
+    InventoryDumper.add_representer(dict, represent_dict)
+    return yaml.dump(_yaml_groups(inventory), Dumper=InventoryDumper,
+                     default_flow_style=False, sort_keys=False,
+                     allow_unicode=True).encode("utf-8")
+
+
+def _ini_value(value: Any) -> str:
+    if isinstance(value, str):
+        return json.dumps(value) if (not value or any(c.isspace() for c in value)) else value
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _ini_entry(name: str, values: Dict[str, Any]) -> str:
+    # O formato INI não representa valores vault; essas variáveis ficam de fora
+    pairs = [f"{key}={_ini_value(value)}" for key, value in values.items()
+             if value is not None and not _is_vault(value)]
+    return " ".join([name] + pairs)
+
+
+def render_ini(inventory: Dict[str, Any]) -> bytes:
+    """
+    Inventário no formato INI do Ansible: `[grupo]` com uma linha por host,
+    `[grupo:vars]` e `[grupo:children]`. Variáveis vault não são
+    representáveis em INI e são omitidas (use o YAML ou o JSON).
+    """
+    lines: List[str] = []
+    for name in inventory["all"]["children"]:
+        group = inventory[name]
+        lines.append(f"[{name}]")
+        lines.extend(_ini_entry(hostname, values)
+                     for hostname, values in group["hosts"].items())
+        lines.append("")
+        if group["vars"]:
+            lines.append(f"[{name}:vars]")
+            lines.extend(f"{key}={_ini_value(value)}"
+                         for key, value in group["vars"].items()
+                         if value is not None and not _is_vault(value))
+            lines.append("")
+        if group.get("children"):
+            lines.append(f"[{name}:children]")
+            lines.extend(group["children"])
+            lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+_RENDERERS = {"json": render_json, "yaml": render_yaml, "ini": render_ini}
+
+
+def _write_atomic(directory: str, filename: str, data: bytes) -> None:
+    # Arquivo temporário no mesmo diretório + os.replace: leitores veem o
+    # arquivo anterior ou o novo, nunca um arquivo parcial
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f".{filename}.")
+    try:
+        with os.fdopen(descriptor, "wb") as artifact:
+            artifact.write(data)
+            artifact.flush()
+            os.fsync(artifact.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, os.path.join(directory, filename))
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+class InventoryArtifacts:
+    """
+    Arquivos estáticos do inventário (JSON, YAML e INI) gerados a partir de
+    `InventoryService` a cada revisão e gravados atomicamente em
+    INVENTORY_ARTIFACTS_DIR, para serem servidos diretamente do disco.
+
+    As alterações confirmadas (locais ou recebidas pelo barramento de
+    invalidação) agendam uma nova geração em uma thread própria, agrupando
+    as escritas de um intervalo de INVENTORY_ARTIFACTS_DEBOUNCE segundos.
+    A revisão gravada no diretório evita que vários workers gerem os mesmos
+    arquivos novamente.
+    """
+
+    def __init__(self):
+        self.revision: Optional[int] = None
+        self._engine: Optional[Engine] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return bool(settings.INVENTORY_ARTIFACTS_DIR)
+
+    @staticmethod
+    def directory() -> str:
+        return settings.INVENTORY_ARTIFACTS_DIR
+
+    def path(self, artifact_format: str) -> Optional[str]:
+        """Caminho do arquivo de um formato, ou None se ainda não foi gerado"""
+        filename, _ = ARTIFACT_FORMATS[artifact_format]
+        path = os.path.join(self.directory(), filename)
+        return path if os.path.exists(path) else None
+
+    def written_revision(self) -> Optional[int]:
+        try:
+            with open(os.path.join(self.directory(), _REVISION_FILE)) as revision_file:
+                return int(revision_file.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def render(self, session: Session, force: bool = False) -> int:
+        """Gerar os arquivos da revisão atual, se ainda não estiverem gravados"""
+        with self._lock:
+            directory = self.directory()
+            os.makedirs(directory, exist_ok=True)
+            # A revisão é lida antes dos dados: no pior caso, a geração
+            # seguinte regrava um conteúdo já atualizado
+            revision = ChangeLogService.current_revision(session)
+            written = self.written_revision()
+            if not force and written == revision and self.path("json") is not None:
+                self.revision = revision
+                return revision
+
+            inventory = InventoryService.export_ansible_inventory(session=session)
+            for name, (filename, _) in ARTIFACT_FORMATS.items():
+                try:
+                    data = _RENDERERS[name](inventory)
+                except ArtifactError as e:
+                    logger.warning(str(e))
+                    continue
+                _write_atomic(directory, filename, data)
+                metrics.observe_export_size(f"artifact-{name}", len(data))
+            _write_atomic(directory, _REVISION_FILE, str(revision).encode("ascii"))
+            self.revision = revision
+            return revision
+
+    def _on_changes(self, changes: List[Dict[str, Any]]) -> None:
+        self._pending.set()
+
+    def start(self, engine: Engine, background: bool = False) -> None:
+        """
+        Gerar os arquivos e acompanhar as alterações. Com `background` (modo
+        "production"), a geração inicial também ocorre na thread, sem atrasar
+        a inicialização do worker.
+        """
+        if not self.is_enabled() or self._thread is not None:
+            return
+        self._engine = engine
+        self._stop.clear()
+        if not background:
+            with Session(engine) as session:
+                self.render(session)
+        events.subscribe(self._on_changes)
+        self._thread = threading.Thread(
+            target=self._run, args=(background,), name="inventory-artifacts", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        events.unsubscribe(self._on_changes)
+        self._stop.set()
+        self._pending.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _render_current(self) -> None:
+        try:
+            with Session(self._engine) as session:
+                self.render(session)
+        except Exception as e:
+            logger.error(f"Erro ao gerar os arquivos do inventário: {str(e)}")
+
+    def _run(self, initial: bool) -> None:
+        if initial:
+            self._render_current()
+        while not self._stop.is_set():
+            self._pending.wait()
+            if self._stop.wait(settings.INVENTORY_ARTIFACTS_DEBOUNCE):
+                return
+            self._pending.clear()
+            self._render_current()
+
+
+artifacts = InventoryArtifacts()
@@ -0,0 +1,182 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from sqlalchemy import text
+from sqlmodel import Session, select, func
+
+from app.core import events
+from app.models.inventory import (
+    Group, GroupVar, Host, HostGroupLink, HostVar, InventoryChange
+)
+
+# Chave do advisory lock que serializa a alocação de revisões no PostgreSQL
+REVISION_LOCK_KEY = 0x1A7E_C4A6
+
+ENTITY_TYPES = ("host", "group", "host_var", "group_var", "membership")
+ACTIONS = ("created", "updated", "deleted")
+
+# Modelo e chave do delta para cada tipo de entidade com estado próprio
+_ENTITY_MODELS = {
+    "host": (Host, "hosts"),
+    "group": (Group, "groups"),
+    "host_var": (HostVar, "host_vars"),
+    "group_var": (GroupVar, "group_vars"),
+}
+
+
+class ChangeLogService:
+    """
+    Registro append-only das alterações do inventário. Cada entrada recebe uma
+    revisão global crescente e é gravada na mesma transação da alteração.
+
+    A exclusão de um host ou grupo implica a remoção das suas variáveis e
+    associações, que não são registradas individualmente.
+
+    As revisões ficam visíveis em ordem: no PostgreSQL, a transação que
+    registra uma alteração obtém um advisory lock até o commit, de modo que
+    nenhuma revisão menor é confirmada depois de uma maior (um consumidor que
+    leu a revisão 7 nunca perde a 6). No SQLite, as escritas já são
+    serializadas pelo banco.
+
+    Após o commit, as alterações são notificadas aos ouvintes de
+    `app.core.events` (por exemplo, as assinaturas de eventos).
+    """
+
+    @staticmethod
+    def _group_scope(session: Session, entity_type: str, entity_id: int,
+                     related_id: Optional[int]) -> List[int]:
+        """Grupos afetados por uma alteração, usados para filtrar notificações"""
+        if entity_type in ("membership", "group_var"):
+            return [related_id]
+        if entity_type == "group":
+            parent_id = session.exec(
+                select(Group.parent_group_id).where(Group.id == entity_id)).first()
+            return [entity_id] if parent_id is None else [entity_id, parent_id]
+        host_id = entity_id if entity_type == "host" else related_id
+        return list(session.exec(
+            select(HostGroupLink.group_id).where(HostGroupLink.host_id == host_id)
+        ).all())
+
+    @staticmethod
+    def _lock_revisions(session: Session) -> None:
+        """Serializar a alocação de revisões até o fim da transação atual"""
+        if session.get_bind().dialect.name != "postgresql":
+            return
+        transaction = session.get_transaction()
+        if transaction is not None and session.info.get("revision_lock") is transaction:
+            return
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": REVISION_LOCK_KEY})
+        session.info["revision_lock"] = session.get_transaction()
+
+    @staticmethod
+    def record(session: Session, entity_type: str, action: str, entity_id: int,
+               related_id: Optional[int] = None) -> InventoryChange:
+        """Registrar uma alteração na transação atual (sem commit)"""
+        if entity_type not in ENTITY_TYPES or action not in ACTIONS:
+            raise ValueError(
+                f"Alteração inválida: {entity_type}/{action}")
+        # Antes do INSERT que aloca a revisão
+        ChangeLogService._lock_revisions(session)
+        change = InventoryChange(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            related_id=related_id,
+            action=action
+        )
+        session.add(change)
+
+        # Calcular o escopo de grupos apenas se algum ouvinte filtra por grupo
+        group_ids = None
+        if events.needs_group_scope():
+            group_ids = ChangeLogService._group_scope(
+                session, entity_type, entity_id, related_id)
+        events.track_change(session, change, group_ids)
+        return change
+
+    @staticmethod
+    def record_many(session: Session, entity_type: str, action: str,
+                    entity_ids: Iterable[int], related_id: Optional[int] = None) -> None:
+        for entity_id in entity_ids:
+            ChangeLogService.record(
+                session, entity_type, action, entity_id, related_id)
+
+    @staticmethod
+    def current_revision(session: Session) -> int:
+        """Obter a revisão mais recente (0 se não houver alterações)"""
+        revision = session.exec(
+            select(func.max(InventoryChange.revision))).one()
+        return revision or 0
+
+    @staticmethod
+    def has_changes(session: Session, entity_type: Union[str, Iterable[str]],
+                    since: int, until: int) -> bool:
+        """Se há alterações do(s) tipo(s) com revisão em (since, until]"""
+        entity_types = [entity_type] if isinstance(entity_type, str) else list(entity_type)
+        statement = select(InventoryChange.revision).where(
+            InventoryChange.revision > since,
+            InventoryChange.revision <= until,
+            InventoryChange.entity_type.in_(entity_types),
+        ).limit(1)
+        return session.exec(statement).first() is not None
+
+    @staticmethod
+    def get_entries(session: Session, since: int, limit: Optional[int] = None) -> List[InventoryChange]:
+        """Entradas posteriores à revisão, em ordem (no máximo `limit`)"""
+        statement = (
+            select(InventoryChange)
+            .where(InventoryChange.revision > since)
+            .order_by(InventoryChange.revision)
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+
+    @staticmethod
+    def get_entries_by_revision(session: Session, revisions: Iterable[int]) -> List[InventoryChange]:
+        statement = (
+            select(InventoryChange)
+            .where(InventoryChange.revision.in_(list(revisions)))
+            .order_by(InventoryChange.revision)
+        )
+        return session.exec(statement).all()
+
+    @staticmethod
+    def get_changes(session: Session, since: int = 0) -> Dict[str, Any]:
+        """
+        Calcular o delta compacto desde a revisão informada: para cada entidade
+        vale apenas a última ação, e as entidades incluídas/alteradas são
+        retornadas com o estado atual, buscado em lote.
+        """
+        entries = ChangeLogService.get_entries(session, since)
+        revision = entries[-1].revision if entries else max(
+            since, ChangeLogService.current_revision(session))
+
+        last_action: Dict[str, Dict[int, str]] = {
+            entity_type: {} for entity_type in _ENTITY_MODELS}
+        memberships: Dict[Tuple[int, int], str] = {}
+        for entry in entries:
+            if entry.entity_type == "membership":
+                memberships[(entry.entity_id, entry.related_id)] = entry.action
+            else:
+                last_action[entry.entity_type][entry.entity_id] = entry.action
+
+        delta: Dict[str, Any] = {"since": since, "revision": revision}
+        for entity_type, (model, key) in _ENTITY_MODELS.items():
+            actions = last_action[entity_type]
+            deleted = {entity_id for entity_id,
+                       action in actions.items() if action == "deleted"}
+            upserted_ids = [
+                entity_id for entity_id in actions if entity_id not in deleted]
+            upserted = []
+            if upserted_ids:
+                upserted = session.exec(
+                    select(model).where(model.id.in_(upserted_ids)).order_by(model.id)
+                ).all()
+                # Entidades removidas em cascata deixam de existir
+                deleted.update(set(upserted_ids) - {item.id for item in upserted})
+            delta[key] = {"upserted": upserted, "deleted": sorted(deleted)}
+
+        delta["memberships"] = {
+            "added": [{"host_id": host_id, "group_id": group_id}
+                      for (host_id, group_id), action in memberships.items() if action == "created"],
+            "removed": [{"host_id": host_id, "group_id": group_id}
+                        for (host_id, group_id), action in memberships.items() if action == "deleted"],
+        }
+        return delta
@@ -0,0 +1,303 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+import json
+import re
+import threading
+from sqlmodel import Session, select, delete
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from app.core import events
+from app.models.inventory import DynamicGroupRule, Host, HostGroupLink, HostVar
+from app.schemas.inventory import DynamicGroupRuleCreate
+from app.services.change_log_service import ChangeLogService
+from app.services.var_document_service import VarDocumentService
+
+HOST_FIELDS = ("hostname", "ansible_host", "ansible_port",
+               "ansible_user", "ansible_connection")
+VAR_PREFIX = "vars."
+OPERATORS = ("eq", "ne", "regex", "contains", "exists")
+# Limite do tamanho das expressões regulares das regras
+MAX_REGEX_LENGTH = 256
+
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+
+def _has_nested_quantifier(parsed, outer: Optional[bool] = None) -> bool:
+    """
+    Se a expressão repete um trecho que já tem um quantificador, com um dos
+    dois sem limite (como `(a+)+` ou `(a*b?)*`): a forma que leva ao
+    backtracking catastrófico. `outer` indica se há uma repetição externa e
+    se ela é ilimitada; repetições limitadas (`(\\d{1,3}\\.){3}`) são aceitas.
+    """
+    for op, av in parsed:
+        if op in _REPEATS:
+            _, high, subpattern = av
+            unbounded = high == sre_parse.MAXREPEAT
+            if outer is not None and high > 1 and (outer or unbounded):
+                return True
+            inner = outer
+            if high > 1:
+                inner = unbounded if outer is None else outer or unbounded
+            if _has_nested_quantifier(subpattern, inner):
+                return True
+        elif op == sre_parse.SUBPATTERN:
+            if _has_nested_quantifier(av[-1], outer):
+                return True
+        elif op == sre_parse.BRANCH:
+            if any(_has_nested_quantifier(branch, outer) for branch in av[1]):
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _has_nested_quantifier(av[1], outer):
+                return True
+    return False
+
+
+def compile_safe_regex(value: str) -> "re.Pattern":
+    """
+    Compilar uma expressão regular fornecida pelo usuário, recusando com
+    ValueError as longas demais ou com quantificadores aninhados.
+    """
+    if len(value) > MAX_REGEX_LENGTH:
+        raise ValueError(
+            f"Expressão regular com mais de {MAX_REGEX_LENGTH} caracteres")
+    try:
+        parsed = sre_parse.parse(value)
+        compiled = re.compile(value)
+    except re.error as e:
+        raise ValueError(f"Expressão regular inválida: {str(e)}")
+    if _has_nested_quantifier(parsed):
+        raise ValueError(
+            "Expressão regular com quantificadores aninhados não é permitida")
+    return compiled
+
+
+def _as_text(value: Any) -> Optional[str]:
+    """Representação textual usada na comparação (valores JSON tipados)"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _compile_rule(rule: DynamicGroupRule) -> Callable[[Dict[str, Any]], bool]:
+    """Converter uma regra em uma função que avalia os atributos de um host"""
+    field, operator, expected = rule.field, rule.operator, rule.value
+    if operator == "exists":
+        return lambda attributes: attributes.get(field) is not None
+    if operator == "regex":
+        pattern = re.compile(expected or "")
+        return lambda attributes: attributes.get(field) is not None and bool(
+            pattern.search(_as_text(attributes[field])))
+    if operator == "contains":
+        return lambda attributes: attributes.get(field) is not None and (
+            expected or "") in _as_text(attributes[field])
+    if operator == "ne":
+        return lambda attributes: _as_text(attributes.get(field)) != expected
+    return lambda attributes: _as_text(attributes.get(field)) == expected
+
+
+class DynamicGroupService:
+    """
+    Grupos dinâmicos definidos por regras sobre os campos e variáveis dos
+    hosts. As regras de um grupo são combinadas com E; um grupo com regras tem
+    a sua associação materializada em host_group_membership e é exportado como
+    qualquer grupo estático.
+
+    A associação é mantida de forma incremental: uma alteração em um host (ou
+    nas suas variáveis) reavalia apenas esse host; a alteração das regras de um
+    grupo reavalia todos os hosts apenas para esse grupo.
+
+    As regras compiladas ficam em cache por processo, associadas a uma
+    revisão do registro de alterações. Toda alteração de regras registra uma
+    alteração do grupo, então o cache vale enquanto não houver alteração de
+    grupo depois dessa revisão.
+    """
+
+    # (revisão, regras compiladas por grupo, se alguma usa variáveis)
+    _cache: Optional[Tuple[int, Dict[int, List[Callable]], bool]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def validate_rule(rule: DynamicGroupRuleCreate) -> None:
+        if rule.field not in HOST_FIELDS and not (
+                rule.field.startswith(VAR_PREFIX) and len(rule.field) > len(VAR_PREFIX)):
+            raise ValueError(f"Campo inválido para regra: '{rule.field}'")
+        if rule.operator not in OPERATORS:
+            raise ValueError(f"Operador inválido para regra: '{rule.operator}'")
+        if rule.operator != "exists" and rule.value is None:
+            raise ValueError(f"O operador '{rule.operator}' requer um valor")
+        if rule.operator == "regex":
+            compile_safe_regex(rule.value)
+
+    @staticmethod
+    def get_rules(session: Session, group_id: int) -> List[DynamicGroupRule]:
+        statement = select(DynamicGroupRule).where(
+            DynamicGroupRule.group_id == group_id).order_by(DynamicGroupRule.id)
+        return session.exec(statement).all()
+
+    @staticmethod
+    def get_dynamic_group_ids(session: Session) -> Set[int]:
+        return set(DynamicGroupService._cached_rules(session)[0])
+
+    @staticmethod
+    def set_rules(session: Session, group_id: int, rules: List[DynamicGroupRuleCreate]) -> List[DynamicGroupRule]:
+        """Substituir as regras do grupo e rematerializar a sua associação"""
+        for rule in rules:
+            DynamicGroupService.validate_rule(rule)
+
+        session.exec(delete(DynamicGroupRule).where(
+            DynamicGroupRule.group_id == group_id))
+        now = datetime.now()
+        for rule in rules:
+            session.add(DynamicGroupRule(
+                group_id=group_id, created_at=now, **rule.model_dump()))
+        session.flush()
+        ChangeLogService.record(session, "group", "updated", group_id)
+
+        if rules:
+            DynamicGroupService.evaluate_group(session, group_id)
+        session.commit()
+        return DynamicGroupService.get_rules(session, group_id)
+
+    @staticmethod
+    def clear_rules(session: Session, group_id: int) -> None:
+        """Remover as regras; a associação atual permanece como estática"""
+        session.exec(delete(DynamicGroupRule).where(
+            DynamicGroupRule.group_id == group_id))
+        ChangeLogService.record(session, "group", "updated", group_id)
+        session.commit()
+
+    # Avaliação
+
+    @staticmethod
+    def _load_compiled_rules(session: Session, group_ids: Optional[Iterable[int]] = None) -> Tuple[Dict[int, List[Callable]], bool]:
+        """Regras compiladas por grupo e se alguma delas usa variáveis"""
+        statement = select(DynamicGroupRule).order_by(DynamicGroupRule.id)
+        if group_ids is not None:
+            statement = statement.where(
+                DynamicGroupRule.group_id.in_(list(group_ids)))
+        compiled: Dict[int, List[Callable]] = {}
+        uses_vars = False
+        for rule in session.exec(statement):
+            compiled.setdefault(rule.group_id, []).append(_compile_rule(rule))
+            uses_vars = uses_vars or rule.field.startswith(VAR_PREFIX)
+        return compiled, uses_vars
+
+    @staticmethod
+    def _cached_rules(session: Session) -> Tuple[Dict[int, List[Callable]], bool]:
+        """Regras compiladas de todos os grupos, a partir do cache quando válido"""
+        current = ChangeLogService.current_revision(session)
+        own = events.flushed_changes(session)
+        # Regras alteradas nesta transação (ainda sem commit) não entram no cache
+        if any(change["entity_type"] == "group" for change in own):
+            return DynamicGroupService._load_compiled_rules(session)
+        # Última revisão confirmada: as desta transação são as mais recentes
+        revision = min(change["revision"] for change in own) - 1 if own else current
+
+        cached = DynamicGroupService._cache
+        if cached is not None and cached[0] <= revision and (
+                cached[0] == revision
+                or not ChangeLogService.has_changes(session, "group", cached[0], revision)):
+            DynamicGroupService._cache = (revision, cached[1], cached[2])
+            return cached[1], cached[2]
+
+        with DynamicGroupService._lock:
+            compiled, uses_vars = DynamicGroupService._load_compiled_rules(session)
+            DynamicGroupService._cache = (revision, compiled, uses_vars)
+        return compiled, uses_vars
+
+    @staticmethod
+    def invalidate() -> None:
+        """Descartar o cache de regras (por exemplo, após escritas fora dos serviços)"""
+        DynamicGroupService._cache = None
+
+    @staticmethod
+    def _load_attributes(session: Session, host_ids: Optional[List[int]], with_vars: bool) -> Dict[int, Dict[str, Any]]:
+        """Atributos de avaliação por host: campos do host e "vars.<nome>" """
+        statement = select(Host.id, *[getattr(Host, name) for name in HOST_FIELDS])
+        if host_ids is not None:
+            statement = statement.where(Host.id.in_(host_ids))
+        attributes = {
+            row[0]: dict(zip(HOST_FIELDS, row[1:])) for row in session.exec(statement)
+        }
+        if not with_vars:
+            return attributes
+
+        if VarDocumentService.is_enabled():
+            for host_id, values in VarDocumentService.get_host_vars(session, host_ids).items():
+                if host_id in attributes:
+                    attributes[host_id].update(
+                        {VAR_PREFIX + name: value for name, value in values.items()})
+        else:
+            statement = select(HostVar.host_id, HostVar.var_name, HostVar.var_value)
+            if host_ids is not None:
+                statement = statement.where(HostVar.host_id.in_(host_ids))
+            for host_id, var_name, var_value in session.exec(statement):
+                if host_id in attributes:
+                    attributes[host_id][VAR_PREFIX + var_name] = var_value
+        return attributes
+
+    @staticmethod
+    def evaluate_host(session: Session, host_id: int) -> None:
+        """Reavaliar um único host contra todas as regras (sem commit)"""
+        compiled, uses_vars = DynamicGroupService._cached_rules(session)
+        if not compiled:
+            return
+        attributes = DynamicGroupService._load_attributes(
+            session, [host_id], uses_vars).get(host_id)
+        if attributes is None:
+            return
+
+        matching = {group_id for group_id, predicates in compiled.items()
+                    if all(predicate(attributes) for predicate in predicates)}
+        current = set(session.exec(
+            select(HostGroupLink.group_id).where(
+                HostGroupLink.host_id == host_id,
+                HostGroupLink.group_id.in_(list(compiled)))
+        ).all())
+
+        removed = current - matching
+        if removed:
+            session.exec(delete(HostGroupLink).where(
+                HostGroupLink.host_id == host_id,
+                HostGroupLink.group_id.in_(removed)))
+            for group_id in removed:
+                ChangeLogService.record(
+                    session, "membership", "deleted", host_id, group_id)
+        for group_id in matching - current:
+            session.add(HostGroupLink(host_id=host_id, group_id=group_id))
+            ChangeLogService.record(
+                session, "membership", "created", host_id, group_id)
+
+    @staticmethod
+    def evaluate_group(session: Session, group_id: int) -> None:
+        """Rematerializar a associação de um grupo dinâmico (sem commit)"""
+        compiled, uses_vars = DynamicGroupService._load_compiled_rules(
+            session, [group_id])
+        predicates = compiled.get(group_id)
+        if not predicates:
+            return
+        attributes = DynamicGroupService._load_attributes(session, None, uses_vars)
+        matching = {host_id for host_id, values in attributes.items()
+                    if all(predicate(values) for predicate in predicates)}
+        current = set(session.exec(
+            select(HostGroupLink.host_id).where(HostGroupLink.group_id == group_id)
+        ).all())
+
+        removed = current - matching
+        if removed:
+            session.exec(delete(HostGroupLink).where(
+                HostGroupLink.group_id == group_id,
+                HostGroupLink.host_id.in_(removed)))
+            for host_id in removed:
+                ChangeLogService.record(
+                    session, "membership", "deleted", host_id, group_id)
+        added = matching - current
+        session.add_all([HostGroupLink(host_id=host_id, group_id=group_id)
+                         for host_id in added])
+        for host_id in added:
+            ChangeLogService.record(
+                session, "membership", "created", host_id, group_id)
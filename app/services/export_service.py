@@ -0,0 +1,83 @@
+from typing import Any, Dict, Iterable, Iterator, List
+from datetime import datetime
+import json
+import zlib
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.http_cache import accepts_gzip
+from app.services.projection import columns
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Linhas buscadas por vez do cursor e tamanho aproximado de cada bloco enviado
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+class ExportService:
+    """
+    Exportação em massa em NDJSON (um objeto JSON por linha). As linhas são
+    lidas de um cursor no servidor com `yield_per` (colunas, sem instâncias
+    ORM) e enviadas em blocos, com memória constante independente do tamanho
+    da tabela.
+    """
+
+    @staticmethod
+    def iter_rows(bind: Engine, model, fields: List[str]) -> Iterator[Dict[str, Any]]:
+        # Sessão própria: a resposta é transmitida depois que a sessão da
+        # requisição já foi encerrada
+        with Session(bind) as session:
+            statement = (
+                select(*columns(model, fields))
+                .order_by(model.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            for row in session.exec(statement):
+                yield dict(zip(fields, row))
+
+    @staticmethod
+    def iter_ndjson(rows: Iterable[Dict[str, Any]], compress: bool = False) -> Iterator[bytes]:
+        """Serializar as linhas em blocos NDJSON, opcionalmente com gzip"""
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer: List[bytes] = []
+        size = 0
+
+        def emit(data: bytes) -> bytes:
+            if compressor is None:
+                return data
+            # Z_SYNC_FLUSH: cada bloco comprimido pode ser descomprimido de imediato
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        for row in rows:
+            line = json.dumps(row, default=_json_default,
+                              separators=(",", ":")).encode("utf-8") + b"\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield emit(b"".join(buffer))
+                buffer, size = [], 0
+        if buffer:
+            yield emit(b"".join(buffer))
+        if compressor is not None:
+            yield compressor.flush()
+
+    @staticmethod
+    def stream(session: Session, request: Request, model, fields: List[str]) -> StreamingResponse:
+        """
+        Resposta NDJSON transmitida à medida que as linhas são lidas, comprimida
+        com gzip quando o cliente aceita (Accept-Encoding).
+        """
+        compress = accepts_gzip(request)
+        rows = ExportService.iter_rows(session.get_bind(), model, fields)
+        headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"} if compress else {}
+        return StreamingResponse(ExportService.iter_ndjson(rows, compress),
+                                 media_type=NDJSON_MEDIA_TYPE, headers=headers)
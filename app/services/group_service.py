@@ -1,9 +1,29 @@
-from typing import List, Optional
+from typing import List, Optional, Set
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select, update, delete
 
-from app.models.inventory import Group, HostGroupLink
-from app.schemas.inventory import GroupCreate, GroupUpdate
+from app.models.inventory import DynamicGroupRule, Group, GroupVar, GroupVarDocument, HostGroupLink
+from app.schemas.inventory import (
+    GroupCreate, GroupRead, GroupUpdate, GroupVarRead, GroupWithDetails, HostRead
+)
+from app.services.change_log_service import ChangeLogService
+from app.services.projection import columns, rows_to_dicts
+
+# Relações que podem ser incluídas no detalhe de um grupo
+GROUP_DETAIL_INCLUDES = ("hosts", "variables", "children")
+
+
+def parse_group_includes(include: Optional[str]) -> Set[str]:
+    """Interpretar o seletor include= (separado por vírgulas; None = todas)"""
+    if include is None:
+        return set(GROUP_DETAIL_INCLUDES)
+    selected = {name.strip() for name in include.split(",") if name.strip()}
+    invalid = selected - set(GROUP_DETAIL_INCLUDES)
+    if invalid:
+        raise ValueError(
+            f"Relações inválidas em include: {', '.join(sorted(invalid))}")
+    return selected
 
 
 class GroupService:
@@ -18,6 +38,8 @@ class GroupService:
         group.updated_at = datetime.now()
 
         session.add(group)
+        session.flush()  # Para obter o ID antes de commit
+        ChangeLogService.record(session, "group", "created", group.id)
         session.commit()
         session.refresh(group)
         return group
@@ -38,7 +60,79 @@ class GroupService:
         return session.exec(statement).all()
 
     @staticmethod
-    def get_all(session: Session, skip: int = 0, limit: int = 100) -> List[Group]:
+    def get_descendant_ids(session: Session, group_id: int) -> Set[int]:
+        """Obter os IDs do grupo e de toda a sua subárvore (uma consulta por nível)"""
+        descendant_ids = {group_id}
+        frontier = [group_id]
+        while frontier:
+            frontier = [
+                child_id for child_id in session.exec(
+                    select(Group.id).where(Group.parent_group_id.in_(frontier))).all()
+                if child_id not in descendant_ids
+            ]
+            descendant_ids.update(frontier)
+        return descendant_ids
+
+    @staticmethod
+    def get_details(session: Session, group_id: int, depth: Optional[int] = None,
+                    include: Optional[Set[str]] = None) -> Optional[GroupWithDetails]:
+        """
+        Montar o detalhe do grupo com a subárvore limitada a `depth` níveis
+        (None = árvore completa) e apenas as relações de `include`.
+        As relações são carregadas com selectinload, nível a nível: um número
+        constante de consultas por nível, sem carregamentos preguiçosos.
+        """
+        if include is None:
+            include = set(GROUP_DETAIL_INCLUDES)
+        options = [selectinload(getattr(Group, name))
+                   for name in ("hosts", "variables") if name in include]
+        root = session.exec(
+            select(Group).where(Group.id == group_id).options(
+                selectinload(Group.parent), *options)
+        ).first()
+        if root is None:
+            return None
+
+        # Percorrer a árvore por níveis, uma consulta de grupos por nível
+        levels = [[root]]
+        children_by_parent = {}
+        visited = {root.id}
+        while "children" in include and (depth is None or len(levels) <= depth):
+            parent_ids = [group.id for group in levels[-1]]
+            children = [group for group in session.exec(
+                select(Group).where(Group.parent_group_id.in_(parent_ids))
+                .options(*options).order_by(Group.id)
+            ).all() if group.id not in visited]
+            if not children:
+                break
+            for child in children:
+                visited.add(child.id)
+                children_by_parent.setdefault(child.parent_group_id, []).append(child)
+            levels.append(children)
+
+        def build(group: Group, parent: Optional[Group]) -> GroupWithDetails:
+            return GroupWithDetails(
+                **GroupRead.model_validate(group).model_dump(),
+                hosts=[HostRead.model_validate(host) for host in group.hosts]
+                if "hosts" in include else [],
+                variables=[GroupVarRead.model_validate(var) for var in group.variables]
+                if "variables" in include else [],
+                parent=GroupRead.model_validate(parent) if parent is not None else None,
+                children=[build(child, group)
+                          for child in children_by_parent.get(group.id, [])],
+            )
+
+        return build(root, root.parent)
+
+    @staticmethod
+    def get_all(session: Session, skip: int = 0, limit: int = 100,
+                fields: Optional[List[str]] = None) -> List[Group]:
+        if fields is not None:
+            # Projeção no SQL: linhas simples, sem instâncias ORM. A ordenação
+            # explícita evita que um índice de cobertura mude a ordem das linhas
+            statement = (select(*columns(Group, fields))
+                         .order_by(Group.id).offset(skip).limit(limit))
+            return rows_to_dicts(session.exec(statement))
         statement = select(Group).offset(skip).limit(limit)
         return session.exec(statement).all()
 
@@ -64,42 +158,57 @@ class GroupService:
         db_group.updated_at = datetime.now()
 
         session.add(db_group)
+        ChangeLogService.record(session, "group", "updated", group_id)
         session.commit()
         session.refresh(db_group)
         return db_group
 
     @staticmethod
     def delete(session: Session, group_id: int) -> bool:
-        db_group = session.get(Group, group_id)
-        if not db_group:
+        # Buscar apenas o pai do grupo, sem carregar o objeto completo
+        row = session.exec(
+            select(Group.id, Group.parent_group_id).where(Group.id == group_id)
+        ).first()
+        if not row:
             return False
+        parent_group_id = row[1]
+
+        # Mover os grupos filhos para o pai do grupo atual (ou para None)
+        # com um único UPDATE, sem carregar os filhos na sessão
+        child_ids = session.exec(
+            select(Group.id).where(Group.parent_group_id == group_id)).all()
+        session.exec(
+            update(Group)
+            .where(Group.parent_group_id == group_id)
+            .values(parent_group_id=parent_group_id)
+        )
 
-        # Verificar se há grupos filhos e mover para o mesmo nível ou para o pai do grupo atual
-        child_groups = session.exec(select(Group).where(
-            Group.parent_group_id == group_id)).all()
-        for child in child_groups:
-            # Move para o mesmo nível ou para None
-            child.parent_group_id = db_group.parent_group_id
-            session.add(child)
-
-        # Excluir variáveis de grupo associadas
-        for var in db_group.variables:
-            session.delete(var)
-
-        # Excluir associações de host-grupo, não os hosts em si
-        host_group_links = session.exec(
-            select(HostGroupLink).where(HostGroupLink.group_id == group_id)
-        ).all()
-        for link in host_group_links:
-            session.delete(link)
+        # Excluir variáveis de grupo e associações host-grupo em lote
+        # (os hosts em si não são excluídos)
+        session.exec(delete(GroupVar).where(GroupVar.group_id == group_id))
+        session.exec(delete(GroupVarDocument).where(
+            GroupVarDocument.group_id == group_id))
+        session.exec(
+            delete(HostGroupLink).where(HostGroupLink.group_id == group_id)
+        )
+        session.exec(delete(DynamicGroupRule).where(
+            DynamicGroupRule.group_id == group_id))
 
         # Agora é seguro excluir o grupo
-        session.delete(db_group)
+        session.exec(delete(Group).where(Group.id == group_id))
+
+        ChangeLogService.record_many(session, "group", "updated", child_ids)
+        ChangeLogService.record(session, "group", "deleted", group_id)
         session.commit()
         return True
 
     @staticmethod
     def add_host(session: Session, group_id: int, host_id: int) -> bool:
+        # A associação com grupos dinâmicos é definida pelas regras
+        if session.exec(select(DynamicGroupRule.id).where(
+                DynamicGroupRule.group_id == group_id)).first() is not None:
+            return False
+
         # Verificar se a associação já existe
         existing = session.exec(
             select(HostGroupLink)
@@ -112,6 +221,8 @@ class GroupService:
         # Criar nova associação
         link = HostGroupLink(host_id=host_id, group_id=group_id)
         session.add(link)
+        ChangeLogService.record(
+            session, "membership", "created", host_id, group_id)
         session.commit()
         return True
 
@@ -127,6 +238,8 @@ class GroupService:
             return False
 
         session.delete(result)
+        ChangeLogService.record(
+            session, "membership", "deleted", host_id, group_id)
         session.commit()
         return True
 
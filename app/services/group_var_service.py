@@ -1,9 +1,12 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete
 
+from app.core.vault import vault, is_vault_value
 from app.models.inventory import GroupVar
 from app.schemas.inventory import GroupVarCreate, GroupVarUpdate
+from app.services.change_log_service import ChangeLogService
+from app.services.var_document_service import VarDocumentService
 
 
 class GroupVarService:
@@ -13,11 +16,25 @@ class GroupVarService:
         group_var_data = group_var_create.model_dump()
         group_var = GroupVar(**group_var_data)
 
+        # Criptografar o valor com o Ansible Vault, se marcado como criptografado
+        group_var.var_value = vault.prepare_value(
+            group_var.var_value, group_var.is_encrypted)
+
         # Definir timestamps
         group_var.created_at = datetime.now()
         group_var.updated_at = datetime.now()
 
         session.add(group_var)
+        session.flush()  # Para obter o ID antes de commit
+        ChangeLogService.record(
+            session, "group_var", "created", group_var.id, group_var.group_id)
+
+        # Manter o documento JSON do grupo sincronizado
+        if VarDocumentService.is_enabled():
+            VarDocumentService.put_group_var(
+                session, group_var.group_id, group_var.var_name,
+                group_var.var_value, group_var.is_encrypted)
+
         session.commit()
         session.refresh(group_var)
         return group_var
@@ -39,20 +56,94 @@ class GroupVarService:
         statement = select(GroupVar).where(GroupVar.group_id == group_id)
         return session.exec(statement).all()
 
+    @staticmethod
+    def get_all_by_groups(session: Session, group_ids: Iterable[int]) -> List[GroupVar]:
+        """Obter as variáveis de vários grupos em uma única consulta"""
+        statement = (
+            select(GroupVar)
+            .where(GroupVar.group_id.in_(list(group_ids)))
+            .order_by(GroupVar.group_id, GroupVar.id)
+        )
+        return session.exec(statement).all()
+
+    @staticmethod
+    def replace_all(session: Session, group_id: int, values: Dict[str, str]) -> List[GroupVar]:
+        """
+        Substituir todo o conjunto de variáveis de um grupo. Calcula a diferença
+        com o estado atual e aplica apenas as inclusões, alterações e exclusões
+        necessárias em uma única transação.
+        """
+        existing = {var.var_name: var for var in GroupVarService.get_all_by_group(session, group_id)}
+        now = datetime.now()
+
+        # Excluir em lote as variáveis que não estão no novo conjunto
+        removed_ids = [var.id for name, var in existing.items() if name not in values]
+        if removed_ids:
+            session.exec(delete(GroupVar).where(GroupVar.id.in_(removed_ids)))
+            ChangeLogService.record_many(
+                session, "group_var", "deleted", removed_ids, group_id)
+
+        # Incluir as novas variáveis e alterar apenas as que mudaram
+        created = []
+        for var_name, var_value in values.items():
+            db_var = existing.get(var_name)
+            if db_var is None:
+                created.append(GroupVar(var_name=var_name, var_value=var_value,
+                                        group_id=group_id, created_at=now, updated_at=now))
+            elif db_var.is_encrypted and vault.is_enabled() and not is_vault_value(var_value):
+                # Comparar com o valor descriptografado e criptografar o novo valor
+                if vault.decrypt(db_var.var_value) != var_value:
+                    db_var.var_value = vault.encrypt(var_value)
+                    db_var.updated_at = now
+                    session.add(db_var)
+                    ChangeLogService.record(
+                        session, "group_var", "updated", db_var.id, group_id)
+            elif db_var.var_value != var_value:
+                db_var.var_value = var_value
+                db_var.updated_at = now
+                session.add(db_var)
+                ChangeLogService.record(
+                    session, "group_var", "updated", db_var.id, group_id)
+
+        if created:
+            session.add_all(created)
+            session.flush()  # Para obter os IDs antes de commit
+            ChangeLogService.record_many(
+                session, "group_var", "created", [var.id for var in created], group_id)
+
+        if VarDocumentService.is_enabled():
+            stored = {var.var_name: var for var in created}
+            stored.update(existing)
+            VarDocumentService.replace_group_vars(session, group_id, {
+                name: (stored[name].var_value, stored[name].is_encrypted) for name in values
+            })
+
+        session.commit()
+        return GroupVarService.get_all_by_group(session, group_id)
+
     @staticmethod
     def update(session: Session, var_id: int, var_update: GroupVarUpdate) -> Optional[GroupVar]:
         db_var = session.get(GroupVar, var_id)
         if not db_var:
             return None
 
+        previous_name = db_var.var_name
         var_data = var_update.model_dump(exclude_unset=True)
         for key, value in var_data.items():
             setattr(db_var, key, value)
+        db_var.var_value = vault.prepare_value(db_var.var_value, db_var.is_encrypted)
 
         # Atualizar timestamp
         db_var.updated_at = datetime.now()
 
         session.add(db_var)
+        ChangeLogService.record(
+            session, "group_var", "updated", var_id, db_var.group_id)
+        if VarDocumentService.is_enabled():
+            VarDocumentService.put_group_var(
+                session, db_var.group_id, db_var.var_name, db_var.var_value,
+                db_var.is_encrypted, previous_name=previous_name)
+
         session.commit()
         session.refresh(db_var)
         return db_var
@@ -64,6 +155,11 @@ class GroupVarService:
             return False
 
         session.delete(db_var)
+        ChangeLogService.record(
+            session, "group_var", "deleted", var_id, db_var.group_id)
+        if VarDocumentService.is_enabled():
+            VarDocumentService.remove_group_var(
+                session, db_var.group_id, db_var.var_name)
         session.commit()
         return True
 
@@ -75,9 +171,17 @@ class GroupVarService:
             return None
 
         db_var.is_encrypted = is_encrypted
+        db_var.var_value = vault.prepare_value(db_var.var_value, is_encrypted)
         db_var.updated_at = datetime.now()
 
         session.add(db_var)
+        ChangeLogService.record(
+            session, "group_var", "updated", var_id, db_var.group_id)
+        if VarDocumentService.is_enabled():
+            VarDocumentService.put_group_var(
+                session, db_var.group_id, db_var.var_name, db_var.var_value,
+                db_var.is_encrypted)
+
         session.commit()
         session.refresh(db_var)
         return db_var
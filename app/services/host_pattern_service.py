@@ -0,0 +1,221 @@
+from typing import Dict, List, Optional, Tuple
+import fnmatch
+import threading
+from sqlmodel import Session, select
+
+from app.core import events
+from app.models.inventory import Group, Host, HostGroupLink
+from app.services.change_log_service import ChangeLogService
+from app.services.dynamic_group_service import compile_safe_regex
+
+_WILDCARD_CHARS = ("*", "?", "[")
+# Limite do tamanho de um padrão de hosts recebido na API
+MAX_PATTERN_LENGTH = 1024
+# Tipos de alteração que mudam o índice; as demais (variáveis) só avançam a revisão
+INDEX_ENTITY_TYPES = ("host", "group", "membership")
+
+
+class PatternError(ValueError):
+    """Padrão de hosts inválido."""
+
+
+def split_pattern(pattern: str) -> List[str]:
+    """
+    Separar um padrão no formato do `ansible --limit` em termos. A vírgula é o
+    separador preferencial; sem vírgula, usa-se ':' (exceto em expressões
+    regulares iniciadas por '~').
+    """
+    pattern = pattern.strip()
+    if "," in pattern:
+        terms = pattern.split(",")
+    elif pattern.startswith("~"):
+        terms = [pattern]
+    else:
+        terms = pattern.split(":")
+    return [term.strip() for term in terms if term.strip()]
+
+
+def order_terms(terms: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Ordenar os termos como o Ansible: primeiro as uniões, depois as
+    interseções ('&') e por fim as exclusões ('!'). Sem nenhuma união, o
+    ponto de partida é 'all'.
+    """
+    union = [term for term in terms if term[0] not in "&!"]
+    intersection = [term[1:] for term in terms if term[0] == "&"]
+    exclusion = [term[1:] for term in terms if term[0] == "!"]
+    if not union:
+        union = ["all"]
+    return union, intersection, exclusion
+
+
+class MembershipIndex:
+    """
+    Índice em memória da associação entre hosts e grupos. Cada host recebe
+    uma posição fixa e cada grupo é representado por um bitset (um `int`)
+    com os hosts do grupo e de todos os seus subgrupos, de modo que uniões,
+    interseções e exclusões são operações sobre inteiros.
+    """
+
+    def __init__(self, revision: int, hosts: List[Tuple[int, str]],
+                 groups: List[Tuple[int, str, Optional[int]]],
+                 memberships: List[Tuple[int, int]]):
+        self.revision = revision
+        self.host_ids = [host_id for host_id, _ in hosts]
+        self.hostnames = [hostname for _, hostname in hosts]
+        self.position_by_name: Dict[str, int] = {
+            hostname: position for position, hostname in enumerate(self.hostnames)}
+        self.all_bits = (1 << len(self.host_ids)) - 1
+
+        position_by_id = {host_id: position for position,
+                          host_id in enumerate(self.host_ids)}
+        positions_by_group: Dict[int, List[int]] = {
+            group_id: [] for group_id, _, _ in groups}
+        for host_id, group_id in memberships:
+            position = position_by_id.get(host_id)
+            if position is not None and group_id in positions_by_group:
+                positions_by_group[group_id].append(position)
+        direct_bits = {group_id: self._to_bits(positions)
+                       for group_id, positions in positions_by_group.items()}
+
+        # Propagar os hosts dos subgrupos para os ancestrais
+        children: Dict[int, List[int]] = {}
+        for group_id, _, parent_id in groups:
+            if parent_id is not None and parent_id in direct_bits:
+                children.setdefault(parent_id, []).append(group_id)
+        subtree_bits: Dict[int, int] = {}
+        for group_id in direct_bits:
+            bits, visited, stack = 0, set(), [group_id]
+            while stack:
+                current = stack.pop()
+                if current in visited:
+                    continue
+                visited.add(current)
+                if current in subtree_bits:
+                    bits |= subtree_bits[current]
+                    continue
+                bits |= direct_bits[current]
+                stack.extend(children.get(current, []))
+            subtree_bits[group_id] = bits
+
+        self.group_bits: Dict[str, int] = {
+            name: subtree_bits[group_id] for group_id, name, _ in groups}
+
+    def _to_bits(self, positions: List[int]) -> int:
+        # Montar o bitset em um buffer evita recriar o inteiro a cada host
+        buffer = bytearray((len(self.host_ids) + 7) // 8)
+        for position in positions:
+            buffer[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(buffer, "little")
+
+    @classmethod
+    def build(cls, session: Session, revision: int) -> "MembershipIndex":
+        hosts = session.exec(
+            select(Host.id, Host.hostname).order_by(Host.id)).all()
+        groups = session.exec(
+            select(Group.id, Group.name, Group.parent_group_id)).all()
+        memberships = session.exec(
+            select(HostGroupLink.host_id, HostGroupLink.group_id)).all()
+        return cls(revision, hosts, groups, memberships)
+
+    def _match_term(self, term: str) -> int:
+        if term in ("all", "*"):
+            return self.all_bits
+        if term.startswith("~"):
+            # Mesma validação das regras de grupos dinâmicos (evita ReDoS)
+            try:
+                regex = compile_safe_regex(term[1:])
+            except ValueError as e:
+                raise PatternError(f"Padrão '{term}': {str(e)}")
+            names = [name for name in self.group_bits if regex.match(name)]
+            hostnames = [name for name in self.position_by_name if regex.match(name)]
+        elif any(char in term for char in _WILDCARD_CHARS):
+            names = fnmatch.filter(self.group_bits, term)
+            hostnames = fnmatch.filter(self.position_by_name, term)
+        else:
+            if term in self.group_bits:
+                return self.group_bits[term]
+            position = self.position_by_name.get(term)
+            return 0 if position is None else 1 << position
+
+        bits = self._to_bits(
+            [self.position_by_name[hostname] for hostname in hostnames])
+        for name in names:
+            bits |= self.group_bits[name]
+        return bits
+
+    def resolve(self, pattern: str) -> int:
+        """Resolver o padrão para o bitset dos hosts selecionados"""
+        terms = split_pattern(pattern)
+        if not terms:
+            raise PatternError("Padrão de hosts vazio")
+        union, intersection, exclusion = order_terms(terms)
+        for term in intersection + exclusion:
+            if not term:
+                raise PatternError("Operador '&' ou '!' sem termo")
+
+        bits = 0
+        for term in union:
+            bits |= self._match_term(term)
+        for term in intersection:
+            bits &= self._match_term(term)
+        for term in exclusion:
+            bits &= ~self._match_term(term)
+        return bits
+
+    def positions(self, bits: int) -> List[int]:
+        # Percorrer a representação binária é linear no número de hosts
+        return [position for position, bit in enumerate(reversed(bin(bits)[2:]))
+                if bit == "1"]
+
+
+class HostPatternService:
+    """
+    Resolução de padrões de hosts do Ansible (`web:&prod:!maintenance`) sobre
+    o índice de bitsets. O índice é mantido por processo e reconstruído quando
+    há alterações de hosts, grupos ou associações desde a sua revisão.
+    """
+
+    _index: Optional[MembershipIndex] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_index(session: Session) -> MembershipIndex:
+        current = ChangeLogService.current_revision(session)
+        index = HostPatternService._index
+        if index is not None and index.revision == current:
+            return index
+
+        own = events.flushed_changes(session)
+        # Alterações desta transação (ainda sem commit) não entram no índice mantido
+        if any(change["entity_type"] in INDEX_ENTITY_TYPES for change in own):
+            return MembershipIndex.build(session, current)
+        # Última revisão confirmada: as desta transação são as mais recentes
+        revision = min(change["revision"] for change in own) - 1 if own else current
+
+        with HostPatternService._lock:
+            index = HostPatternService._index
+            if index is not None and index.revision == revision:
+                return index
+            if index is not None and index.revision < revision and not ChangeLogService.has_changes(
+                    session, INDEX_ENTITY_TYPES, index.revision, revision):
+                # Apenas variáveis mudaram: o índice continua válido
+                index.revision = revision
+                return index
+            index = MembershipIndex.build(session, revision)
+            HostPatternService._index = index
+        return index
+
+    @staticmethod
+    def invalidate() -> None:
+        """Descartar o índice (por exemplo, após escritas fora dos serviços)"""
+        HostPatternService._index = None
+
+    @staticmethod
+    def resolve(session: Session, pattern: str) -> Tuple[int, List[int], List[str]]:
+        """Resolver o padrão e retornar (revisão, IDs dos hosts, hostnames)"""
+        index = HostPatternService.get_index(session)
+        positions = index.positions(index.resolve(pattern))
+        return (index.revision,
+                [index.host_ids[position] for position in positions],
+                [index.hostnames[position] for position in positions])
@@ -1,9 +1,27 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
-from sqlmodel import Session, select, or_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select, delete, or_
 
-from app.models.inventory import Host, Group, HostGroupLink
+from app.models.inventory import Host, Group, HostGroupLink, HostVar, HostVarDocument
 from app.schemas.inventory import HostCreate, HostUpdate
+from app.services.change_log_service import ChangeLogService
+from app.services.dynamic_group_service import DynamicGroupService
+from app.services.projection import columns, rows_to_dicts
+from app.services.var_document_service import ANY_VALUE, VarDocumentService, coerce_var_value
+
+
+def _select_hosts(fields: Optional[List[str]]):
+    # Com fields, a projeção é feita no SQL e o resultado são linhas simples;
+    # a ordenação explícita evita que um índice de cobertura mude a ordem
+    if fields is None:
+        return select(Host)
+    return select(*columns(Host, fields)).order_by(Host.id)
+
+
+def _fetch_hosts(session: Session, statement, fields: Optional[List[str]]) -> Union[List[Host], List[Dict[str, Any]]]:
+    result = session.exec(statement)
+    return result.all() if fields is None else rows_to_dicts(result)
 
 
 class HostService:
@@ -25,13 +43,23 @@ class HostService:
 
         session.add(host)
         session.flush()  # Para obter o ID antes de commit
+        ChangeLogService.record(session, "host", "created", host.id)
 
         # Associar aos grupos se group_ids foram fornecidos
+        # (grupos dinâmicos são definidos apenas pelas suas regras)
         if group_ids:
+            dynamic_ids = DynamicGroupService.get_dynamic_group_ids(session)
             for group_id in group_ids:
+                if group_id in dynamic_ids:
+                    continue
                 host_group_link = HostGroupLink(
                     host_id=host.id, group_id=group_id)
                 session.add(host_group_link)
+                ChangeLogService.record(
+                    session, "membership", "created", host.id, group_id)
+
+        # Avaliar as regras dos grupos dinâmicos para o novo host
+        DynamicGroupService.evaluate_host(session, host.id)
 
         session.commit()
         session.refresh(host)
@@ -41,6 +69,20 @@ class HostService:
     def get_by_id(session: Session, host_id: int) -> Optional[Host]:
         return session.get(Host, host_id)
 
+    @staticmethod
+    def get_with_details(session: Session, host_id: int) -> Optional[Host]:
+        """
+        Obter o host com grupos e variáveis carregados antecipadamente
+        (selectinload: três consultas fixas, sem multiplicar linhas como um
+        JOIN das duas coleções faria).
+        """
+        statement = (
+            select(Host)
+            .where(Host.id == host_id)
+            .options(selectinload(Host.groups), selectinload(Host.variables))
+        )
+        return session.exec(statement).first()
+
     @staticmethod
     def get_by_hostname(session: Session, hostname: str) -> Optional[Host]:
         statement = select(Host).where(Host.hostname == hostname)
@@ -48,21 +90,23 @@ class HostService:
         return result
 
     @staticmethod
-    def get_all(session: Session, skip: int = 0, limit: int = 100) -> List[Host]:
-        statement = select(Host).offset(skip).limit(limit)
-        return session.exec(statement).all()
+    def get_all(session: Session, skip: int = 0, limit: int = 100,
+                fields: Optional[List[str]] = None) -> List[Host]:
+        statement = _select_hosts(fields).offset(skip).limit(limit)
+        return _fetch_hosts(session, statement, fields)
 
     @staticmethod
-    def get_by_group(session: Session, group_id: int, skip: int = 0, limit: int = 100) -> List[Host]:
+    def get_by_group(session: Session, group_id: int, skip: int = 0, limit: int = 100,
+                     fields: Optional[List[str]] = None) -> List[Host]:
         # Buscar todos os hosts associados a um grupo específico
         statement = (
-            select(Host)
+            _select_hosts(fields)
             .join(HostGroupLink, Host.id == HostGroupLink.host_id)
             .where(HostGroupLink.group_id == group_id)
             .offset(skip)
             .limit(limit)
         )
-        return session.exec(statement).all()
+        return _fetch_hosts(session, statement, fields)
 
     @staticmethod
     def get_by_ansible_connection(session: Session, connection_type: str, skip: int = 0, limit: int = 100) -> List[Host]:
@@ -74,6 +118,27 @@ class HostService:
         )
         return session.exec(statement).all()
 
+    @staticmethod
+    def get_by_var(session: Session, var_name: str, var_value: Optional[str] = None, skip: int = 0, limit: int = 100,
+                   fields: Optional[List[str]] = None) -> List[Host]:
+        # Buscar hosts que possuem uma variável (opcionalmente com um valor)
+        if VarDocumentService.is_enabled():
+            # var_value=null busca o valor null; sem var_value, apenas a chave
+            value = ANY_VALUE if var_value is None else coerce_var_value(var_value)
+            host_ids = VarDocumentService.find_host_ids_by_var(
+                session, var_name, value)
+            statement = _select_hosts(fields).where(Host.id.in_(host_ids))
+        else:
+            conditions = [HostVar.var_name == var_name]
+            if var_value is not None:
+                conditions.append(HostVar.var_value == var_value)
+            statement = (
+                _select_hosts(fields)
+                .join(HostVar, Host.id == HostVar.host_id)
+                .where(*conditions)
+            )
+        return _fetch_hosts(session, statement.offset(skip).limit(limit), fields)
+
     @staticmethod
     def search_hosts(session: Session, search_term: str, skip: int = 0, limit: int = 100) -> List[Host]:
         # Buscar hosts por hostname ou ansible_host
@@ -111,42 +176,65 @@ class HostService:
         # Atualizar timestamp
         db_host.updated_at = datetime.now()
 
-        # Atualizar associações de grupo se fornecidas
+        ChangeLogService.record(session, "host", "updated", host_id)
+
+        # Atualizar associações de grupo se fornecidas, aplicando apenas a diferença
+        # (as associações com grupos dinâmicos são mantidas pelas regras)
         if group_ids is not None:
-            # Remover associações existentes
-            session.exec(
-                select(HostGroupLink).where(HostGroupLink.host_id == host_id)
-            ).delete()
-            session.flush()
+            dynamic_ids = DynamicGroupService.get_dynamic_group_ids(session)
+            current_ids = set(session.exec(
+                select(HostGroupLink.group_id).where(HostGroupLink.host_id == host_id)
+            ).all()) - dynamic_ids
+            new_ids = set(group_ids) - dynamic_ids
+
+            # Remover associações que não estão mais na lista
+            removed_ids = current_ids - new_ids
+            if removed_ids:
+                session.exec(
+                    delete(HostGroupLink).where(
+                        HostGroupLink.host_id == host_id,
+                        HostGroupLink.group_id.in_(removed_ids))
+                )
+                for group_id in removed_ids:
+                    ChangeLogService.record(
+                        session, "membership", "deleted", host_id, group_id)
 
             # Adicionar novas associações
-            for group_id in group_ids:
+            for group_id in new_ids - current_ids:
                 host_group_link = HostGroupLink(
                     host_id=host_id, group_id=group_id)
                 session.add(host_group_link)
+                ChangeLogService.record(
+                    session, "membership", "created", host_id, group_id)
 
         session.add(db_host)
+        # Reavaliar apenas este host contra as regras dos grupos dinâmicos
+        DynamicGroupService.evaluate_host(session, host_id)
         session.commit()
         session.refresh(db_host)
         return db_host
 
     @staticmethod
     def delete(session: Session, host_id: int) -> bool:
-        db_host = session.get(Host, host_id)
-        if not db_host:
+        # Verificar a existência do host sem carregar o objeto completo
+        exists = session.exec(select(Host.id).where(Host.id == host_id)).first()
+        if exists is None:
             return False
 
-        # Excluir variáveis associadas
-        for var in db_host.variables:
-            session.delete(var)
+        # Registrar a exclusão antes de remover as associações, para que o
+        # escopo de grupos da notificação ainda possa ser calculado
+        ChangeLogService.record(session, "host", "deleted", host_id)
 
-        # Excluir associações de grupo
+        # Excluir variáveis e associações de grupo em lote
+        session.exec(delete(HostVar).where(HostVar.host_id == host_id))
+        session.exec(delete(HostVarDocument).where(
+            HostVarDocument.host_id == host_id))
         session.exec(
-            select(HostGroupLink).where(HostGroupLink.host_id == host_id)
-        ).delete()
+            delete(HostGroupLink).where(HostGroupLink.host_id == host_id)
+        )
 
         # Finalmente excluir o host
-        session.delete(db_host)
+        session.exec(delete(Host).where(Host.id == host_id))
         session.commit()
         return True
 
@@ -158,6 +246,10 @@ class HostService:
         if not host or not group:
             return False
 
+        # A associação com grupos dinâmicos é definida pelas regras
+        if group_id in DynamicGroupService.get_dynamic_group_ids(session):
+            return False
+
         # Verificar se a associação já existe
         existing = session.exec(
             select(HostGroupLink)
@@ -170,6 +262,8 @@ class HostService:
         # Criar nova associação
         link = HostGroupLink(host_id=host_id, group_id=group_id)
         session.add(link)
+        ChangeLogService.record(
+            session, "membership", "created", host_id, group_id)
         session.commit()
         return True
 
@@ -185,5 +279,7 @@ class HostService:
             return False
 
         session.delete(result)
+        ChangeLogService.record(
+            session, "membership", "deleted", host_id, group_id)
         session.commit()
         return True
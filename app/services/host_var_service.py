@@ -1,9 +1,13 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete
 
+from app.core.vault import vault, is_vault_value
 from app.models.inventory import HostVar
 from app.schemas.inventory import HostVarCreate, HostVarUpdate
+from app.services.change_log_service import ChangeLogService
+from app.services.dynamic_group_service import DynamicGroupService
+from app.services.var_document_service import VarDocumentService
 
 
 class HostVarService:
@@ -13,11 +17,27 @@ class HostVarService:
         host_var_data = host_var_create.model_dump()
         host_var = HostVar(**host_var_data)
 
+        # Criptografar o valor com o Ansible Vault, se marcado como criptografado
+        host_var.var_value = vault.prepare_value(
+            host_var.var_value, host_var.is_encrypted)
+
         # Definir timestamps
         host_var.created_at = datetime.now()
         host_var.updated_at = datetime.now()
 
         session.add(host_var)
+        session.flush()  # Para obter o ID antes de commit
+        ChangeLogService.record(
+            session, "host_var", "created", host_var.id, host_var.host_id)
+
+        # Manter o documento JSON do host sincronizado
+        if VarDocumentService.is_enabled():
+            VarDocumentService.put_host_var(
+                session, host_var.host_id, host_var.var_name,
+                host_var.var_value, host_var.is_encrypted)
+
+        # Reavaliar os grupos dinâmicos que dependem das variáveis do host
+        DynamicGroupService.evaluate_host(session, host_var.host_id)
         session.commit()
         session.refresh(host_var)
         return host_var
@@ -39,20 +59,96 @@ class HostVarService:
         statement = select(HostVar).where(HostVar.host_id == host_id)
         return session.exec(statement).all()
 
+    @staticmethod
+    def get_all_by_hosts(session: Session, host_ids: Iterable[int]) -> List[HostVar]:
+        """Obter as variáveis de vários hosts em uma única consulta"""
+        statement = (
+            select(HostVar)
+            .where(HostVar.host_id.in_(list(host_ids)))
+            .order_by(HostVar.host_id, HostVar.id)
+        )
+        return session.exec(statement).all()
+
+    @staticmethod
+    def replace_all(session: Session, host_id: int, values: Dict[str, str]) -> List[HostVar]:
+        """
+        Substituir todo o conjunto de variáveis de um host. Calcula a diferença
+        com o estado atual e aplica apenas as inclusões, alterações e exclusões
+        necessárias em uma única transação.
+        """
+        existing = {var.var_name: var for var in HostVarService.get_all_by_host(session, host_id)}
+        now = datetime.now()
+
+        # Excluir em lote as variáveis que não estão no novo conjunto
+        removed_ids = [var.id for name, var in existing.items() if name not in values]
+        if removed_ids:
+            session.exec(delete(HostVar).where(HostVar.id.in_(removed_ids)))
+            ChangeLogService.record_many(
+                session, "host_var", "deleted", removed_ids, host_id)
+
+        # Incluir as novas variáveis e alterar apenas as que mudaram
+        created = []
+        for var_name, var_value in values.items():
+            db_var = existing.get(var_name)
+            if db_var is None:
+                created.append(HostVar(var_name=var_name, var_value=var_value,
+                                       host_id=host_id, created_at=now, updated_at=now))
+            elif db_var.is_encrypted and vault.is_enabled() and not is_vault_value(var_value):
+                # Comparar com o valor descriptografado e criptografar o novo valor
+                if vault.decrypt(db_var.var_value) != var_value:
+                    db_var.var_value = vault.encrypt(var_value)
+                    db_var.updated_at = now
+                    session.add(db_var)
+                    ChangeLogService.record(
+                        session, "host_var", "updated", db_var.id, host_id)
+            elif db_var.var_value != var_value:
+                db_var.var_value = var_value
+                db_var.updated_at = now
+                session.add(db_var)
+                ChangeLogService.record(
+                    session, "host_var", "updated", db_var.id, host_id)
+
+        if created:
+            session.add_all(created)
+            session.flush()  # Para obter os IDs antes de commit
+            ChangeLogService.record_many(
+                session, "host_var", "created", [var.id for var in created], host_id)
+
+        if VarDocumentService.is_enabled():
+            stored = {var.var_name: var for var in created}
+            stored.update(existing)
+            VarDocumentService.replace_host_vars(session, host_id, {
+                name: (stored[name].var_value, stored[name].is_encrypted) for name in values
+            })
+
+        DynamicGroupService.evaluate_host(session, host_id)
+        session.commit()
+        return HostVarService.get_all_by_host(session, host_id)
+
     @staticmethod
     def update(session: Session, var_id: int, var_update: HostVarUpdate) -> Optional[HostVar]:
         db_var = session.get(HostVar, var_id)
         if not db_var:
             return None
 
+        previous_name = db_var.var_name
         var_data = var_update.model_dump(exclude_unset=True)
         for key, value in var_data.items():
             setattr(db_var, key, value)
+        db_var.var_value = vault.prepare_value(db_var.var_value, db_var.is_encrypted)
 
         # Atualizar timestamp
         db_var.updated_at = datetime.now()
 
         session.add(db_var)
+        ChangeLogService.record(
+            session, "host_var", "updated", var_id, db_var.host_id)
+        if VarDocumentService.is_enabled():
+            VarDocumentService.put_host_var(
+                session, db_var.host_id, db_var.var_name, db_var.var_value,
+                db_var.is_encrypted, previous_name=previous_name)
+
+        DynamicGroupService.evaluate_host(session, db_var.host_id)
         session.commit()
         session.refresh(db_var)
         return db_var
@@ -64,6 +160,12 @@ class HostVarService:
             return False
 
         session.delete(db_var)
+        ChangeLogService.record(
+            session, "host_var", "deleted", var_id, db_var.host_id)
+        if VarDocumentService.is_enabled():
+            VarDocumentService.remove_host_var(
+                session, db_var.host_id, db_var.var_name)
+        DynamicGroupService.evaluate_host(session, db_var.host_id)
         session.commit()
         return True
 
@@ -75,9 +177,18 @@ class HostVarService:
             return None
 
         db_var.is_encrypted = is_encrypted
+        db_var.var_value = vault.prepare_value(db_var.var_value, is_encrypted)
         db_var.updated_at = datetime.now()
 
         session.add(db_var)
+        ChangeLogService.record(
+            session, "host_var", "updated", var_id, db_var.host_id)
+        if VarDocumentService.is_enabled():
+            VarDocumentService.put_host_var(
+                session, db_var.host_id, db_var.var_name, db_var.var_value,
+                db_var.is_encrypted)
+
+        DynamicGroupService.evaluate_host(session, db_var.host_id)
         session.commit()
         session.refresh(db_var)
         return db_var
@@ -0,0 +1,337 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+from sqlmodel import Session, select
+
+from app.core import events
+from app.core.config import settings
+from app.models.inventory import Group, GroupVar, Host, HostGroupLink, HostVar
+from app.schemas.inventory import (
+    GroupRead, GroupVarRead, GroupWithDetails, HostRead, HostVarRead, HostWithDetails
+)
+from app.services.change_log_service import ChangeLogService
+from app.services.var_document_service import VarDocumentService, coerce_var_value
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryGraph:
+    """
+    Cópia em memória do inventário (hosts, grupos, associações, variáveis e a
+    árvore de grupos), usada como caminho de leitura principal quando
+    INVENTORY_GRAPH_ENABLED está ativo.
+
+    O grafo guarda a revisão do registro de alterações que reflete. As
+    escritas confirmadas neste processo são notificadas por `app.core.events`
+    e elevam a revisão conhecida; antes de responder, o grafo aplica as
+    entradas do registro entre a sua revisão e a revisão conhecida, de modo
+    que uma leitura nunca é servida de uma revisão anterior a uma escrita já
+    confirmada e notificada.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.revision = 0
+        self._known_revision = 0
+        # Revisões confirmadas fora de ordem (já ultrapassadas pelo grafo)
+        self._missed: Set[int] = set()
+        self.hosts: Dict[int, HostRead] = {}
+        self.groups: Dict[int, GroupRead] = {}
+        self.host_vars: Dict[int, HostVarRead] = {}
+        self.group_vars: Dict[int, GroupVarRead] = {}
+        self._vars_by_host: Dict[int, Set[int]] = {}
+        self._vars_by_group: Dict[int, Set[int]] = {}
+        self._groups_by_host: Dict[int, Set[int]] = {}
+        self._hosts_by_group: Dict[int, Set[int]] = {}
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.INVENTORY_GRAPH_ENABLED
+
+    # Carga e sincronização
+
+    def load(self, session: Session) -> None:
+        """Carregar o inventário completo do banco de dados"""
+        with self._lock:
+            self._clear()
+            # A revisão é lida antes dos dados: entradas posteriores que já
+            # estejam refletidas serão apenas reaplicadas na sincronização
+            self.revision = ChangeLogService.current_revision(session)
+            self._known_revision = max(self._known_revision, self.revision)
+            for host in session.exec(select(Host)):
+                self._put_host(host)
+            for group in session.exec(select(Group)):
+                self._put_group(group)
+            for var in session.exec(select(HostVar)):
+                self._put_host_var(var)
+            for var in session.exec(select(GroupVar)):
+                self._put_group_var(var)
+            for host_id, group_id in session.exec(
+                    select(HostGroupLink.host_id, HostGroupLink.group_id)):
+                self._add_membership(host_id, group_id)
+            self._loaded = True
+            events.subscribe(self._on_changes)
+        logger.info(
+            f"Grafo do inventário carregado: {len(self.hosts)} hosts, "
+            f"{len(self.groups)} grupos (revisão {self.revision})")
+
+    def reset(self) -> None:
+        """Descartar o grafo; ele será recarregado na próxima leitura"""
+        with self._lock:
+            events.unsubscribe(self._on_changes)
+            self._clear()
+            self._loaded = False
+            self.revision = 0
+            self._known_revision = 0
+            self._missed.clear()
+
+    def _on_changes(self, changes: List[Dict[str, Any]]) -> None:
+        self.notify_revisions([change["revision"] for change in changes])
+
+    def notify_revisions(self, revisions: Iterable[int]) -> None:
+        """
+        Informar revisões confirmadas. No PostgreSQL, uma transação pode
+        confirmar uma revisão menor que outra já aplicada; essas revisões são
+        buscadas individualmente na próxima leitura.
+        """
+        with self._lock:
+            for revision in revisions:
+                if revision <= self.revision and self._loaded:
+                    self._missed.add(revision)
+                self._known_revision = max(self._known_revision, revision)
+
+    def ensure_current(self, session: Session) -> None:
+        """Carregar o grafo ou aplicar as alterações pendentes, se houver"""
+        with self._lock:
+            if not self._loaded:
+                self.load(session)
+                return
+            if self._missed:
+                self._apply_entries(session, ChangeLogService.get_entries_by_revision(
+                    session, self._missed))
+                self._missed.clear()
+            if self.revision < self._known_revision:
+                entries = ChangeLogService.get_entries(session, self.revision)
+                self._apply_entries(session, entries)
+                if entries:
+                    self.revision = entries[-1].revision
+                self.revision = max(self.revision, self._known_revision)
+
+    def _apply_entries(self, session: Session, entries: List[Any]) -> None:
+        upserts: Dict[str, Set[int]] = {
+            "host": set(), "group": set(), "host_var": set(), "group_var": set()}
+        for entry in entries:
+            if entry.entity_type == "membership":
+                if entry.action == "deleted":
+                    self._remove_membership(entry.entity_id, entry.related_id)
+                else:
+                    self._add_membership(entry.entity_id, entry.related_id)
+            elif entry.action == "deleted":
+                # Exclusões são aplicadas em ordem, com as remoções em cascata
+                upserts[entry.entity_type].discard(entry.entity_id)
+                self._remove(entry.entity_type, entry.entity_id)
+            else:
+                upserts[entry.entity_type].add(entry.entity_id)
+
+        # Buscar o estado atual das entidades incluídas/alteradas em lote
+        for entity_type, model, put in (
+            ("host", Host, self._put_host),
+            ("group", Group, self._put_group),
+            ("host_var", HostVar, self._put_host_var),
+            ("group_var", GroupVar, self._put_group_var),
+        ):
+            ids = upserts[entity_type]
+            if not ids:
+                continue
+            found = set()
+            for item in session.exec(select(model).where(model.id.in_(list(ids)))):
+                put(item)
+                found.add(item.id)
+            for missing_id in ids - found:
+                self._remove(entity_type, missing_id)
+
+    # Manutenção das estruturas
+
+    def _clear(self) -> None:
+        for collection in (self.hosts, self.groups, self.host_vars, self.group_vars,
+                           self._vars_by_host, self._vars_by_group,
+                           self._groups_by_host, self._hosts_by_group):
+            collection.clear()
+
+    def _put_host(self, host: Host) -> None:
+        self.hosts[host.id] = HostRead.model_validate(host)
+
+    def _put_group(self, group: Group) -> None:
+        self.groups[group.id] = GroupRead.model_validate(group)
+
+    def _put_host_var(self, var: HostVar) -> None:
+        previous = self.host_vars.get(var.id)
+        if previous is not None:
+            self._vars_by_host.get(previous.host_id, set()).discard(var.id)
+        self.host_vars[var.id] = HostVarRead.model_validate(var)
+        self._vars_by_host.setdefault(var.host_id, set()).add(var.id)
+
+    def _put_group_var(self, var: GroupVar) -> None:
+        previous = self.group_vars.get(var.id)
+        if previous is not None:
+            self._vars_by_group.get(previous.group_id, set()).discard(var.id)
+        self.group_vars[var.id] = GroupVarRead.model_validate(var)
+        self._vars_by_group.setdefault(var.group_id, set()).add(var.id)
+
+    def _add_membership(self, host_id: int, group_id: int) -> None:
+        self._groups_by_host.setdefault(host_id, set()).add(group_id)
+        self._hosts_by_group.setdefault(group_id, set()).add(host_id)
+
+    def _remove_membership(self, host_id: int, group_id: int) -> None:
+        self._groups_by_host.get(host_id, set()).discard(group_id)
+        self._hosts_by_group.get(group_id, set()).discard(host_id)
+
+    def _remove(self, entity_type: str, entity_id: int) -> None:
+        if entity_type == "host":
+            self.hosts.pop(entity_id, None)
+            for var_id in self._vars_by_host.pop(entity_id, set()):
+                self.host_vars.pop(var_id, None)
+            for group_id in self._groups_by_host.pop(entity_id, set()):
+                self._hosts_by_group.get(group_id, set()).discard(entity_id)
+        elif entity_type == "group":
+            self.groups.pop(entity_id, None)
+            for var_id in self._vars_by_group.pop(entity_id, set()):
+                self.group_vars.pop(var_id, None)
+            for host_id in self._hosts_by_group.pop(entity_id, set()):
+                self._groups_by_host.get(host_id, set()).discard(entity_id)
+        elif entity_type == "host_var":
+            var = self.host_vars.pop(entity_id, None)
+            if var is not None:
+                self._vars_by_host.get(var.host_id, set()).discard(entity_id)
+        elif entity_type == "group_var":
+            var = self.group_vars.pop(entity_id, None)
+            if var is not None:
+                self._vars_by_group.get(var.group_id, set()).discard(entity_id)
+
+    # Consultas
+
+    def _host_variables(self, host_id: int) -> List[HostVarRead]:
+        return [self.host_vars[var_id]
+                for var_id in sorted(self._vars_by_host.get(host_id, ()))]
+
+    def _group_variables(self, group_id: int) -> List[GroupVarRead]:
+        return [self.group_vars[var_id]
+                for var_id in sorted(self._vars_by_group.get(group_id, ()))]
+
+    def get_hosts(self, session: Session, skip: int = 0, limit: int = 100,
+                  group_id: Optional[int] = None, var_name: Optional[str] = None,
+                  var_value: Optional[str] = None) -> List[HostRead]:
+        """Listar hosts com os mesmos filtros de GET /hosts"""
+        with self._lock:
+            self.ensure_current(session)
+            if var_name:
+                host_ids = self._find_host_ids_by_var(var_name, var_value)
+            elif group_id:
+                host_ids = self._hosts_by_group.get(group_id, set())
+            else:
+                host_ids = self.hosts.keys()
+            return [self.hosts[host_id] for host_id in sorted(host_ids)
+                    if host_id in self.hosts][skip:skip + limit]
+
+    def _find_host_ids_by_var(self, var_name: str, var_value: Optional[str]) -> Set[int]:
+        # No modo "json" os valores são comparados já convertidos para JSON
+        typed = VarDocumentService.is_enabled()
+        expected = var_value
+        if typed and var_value is not None:
+            expected = coerce_var_value(var_value)
+        host_ids = set()
+        for var in self.host_vars.values():
+            if var.var_name != var_name:
+                continue
+            if var_value is not None:
+                value = coerce_var_value(var.var_value, var.is_encrypted) if typed else var.var_value
+                if value != expected:
+                    continue
+            host_ids.add(var.host_id)
+        return host_ids
+
+    def get_host(self, session: Session, host_id: int) -> Optional[HostWithDetails]:
+        with self._lock:
+            self.ensure_current(session)
+            host = self.hosts.get(host_id)
+            if host is None:
+                return None
+            return HostWithDetails(
+                **host.model_dump(),
+                groups=[self.groups[group_id] for group_id in
+                        sorted(self._groups_by_host.get(host_id, ())) if group_id in self.groups],
+                variables=self._host_variables(host_id),
+            )
+
+    def get_groups(self, session: Session, skip: int = 0, limit: int = 100) -> List[GroupRead]:
+        with self._lock:
+            self.ensure_current(session)
+            return [self.groups[group_id] for group_id in sorted(self.groups)][skip:skip + limit]
+
+    def get_group(self, session: Session, group_id: int, depth: Optional[int] = None,
+                  include: Optional[Set[str]] = None) -> Optional[GroupWithDetails]:
+        """Detalhe do grupo com as mesmas opções de GroupService.get_details"""
+        with self._lock:
+            self.ensure_current(session)
+            if group_id not in self.groups:
+                return None
+            children: Dict[int, List[int]] = {}
+            for group in self.groups.values():
+                if group.parent_group_id is not None:
+                    children.setdefault(group.parent_group_id, []).append(group.id)
+            if include is None:
+                include = {"hosts", "variables", "children"}
+            return self._group_details(group_id, children, set(), depth, include)
+
+    def _group_details(self, group_id: int, children: Dict[int, List[int]],
+                       visited: Set[int], depth: Optional[int],
+                       include: Set[str]) -> GroupWithDetails:
+        visited = visited | {group_id}
+        group = self.groups[group_id]
+        expand = "children" in include and (depth is None or depth > 0)
+        return GroupWithDetails(
+            **group.model_dump(),
+            hosts=[self.hosts[host_id] for host_id in
+                   sorted(self._hosts_by_group.get(group_id, ())) if host_id in self.hosts]
+            if "hosts" in include else [],
+            variables=self._group_variables(group_id) if "variables" in include else [],
+            parent=self.groups.get(group.parent_group_id),
+            children=[self._group_details(child_id, children, visited,
+                                          None if depth is None else depth - 1, include)
+                      for child_id in sorted(children.get(group_id, []))
+                      if child_id not in visited] if expand else [],
+        )
+
+    def export_data(self, session: Session) -> Tuple[list, list, list, Dict[int, Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+        """
+        Dados de entrada de InventoryService.build_inventory: grupos, hosts,
+        associações e variáveis por dono (dicionários novos a cada chamada).
+        """
+        with self._lock:
+            self.ensure_current(session)
+            typed = VarDocumentService.is_enabled()
+
+            def values(variables: Iterable[Any]) -> Dict[str, Any]:
+                return {
+                    var.var_name: coerce_var_value(var.var_value, var.is_encrypted)
+                    if typed or var.is_encrypted else var.var_value
+                    for var in variables
+                }
+
+            groups = [(group_id, self.groups[group_id].name)
+                      for group_id in sorted(self.groups)]
+            hosts = [(host_id, self.hosts[host_id].hostname, self.hosts[host_id].ansible_host)
+                     for host_id in sorted(self.hosts)]
+            memberships = sorted(
+                (host_id, group_id)
+                for host_id, group_ids in self._groups_by_host.items()
+                for group_id in group_ids)
+            group_vars = {group_id: values(self._group_variables(group_id))
+                          for group_id in self._vars_by_group}
+            host_vars = {host_id: values(self._host_variables(host_id))
+                         for host_id in self._vars_by_host}
+            return groups, hosts, memberships, group_vars, host_vars
+
+
+inventory_graph = InventoryGraph()
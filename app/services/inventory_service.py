@@ -1,22 +1,254 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+import time
+from sqlalchemy import exists, or_
 from sqlmodel import Session, select
 
+from app.core import metrics, profiling
+from app.core.vault import vault
 from app.models.inventory import Group, Host, GroupVar, HostVar, HostGroupLink
+from app.services.change_log_service import ChangeLogService
+from app.services.inventory_graph_service import inventory_graph
+from app.services.var_document_service import VarDocumentService, coerce_var_value
+
+
+# Acima deste número de entradas no registro, o delta é a exportação completa
+DELTA_MAX_ENTRIES = 10000
 
 
 class InventoryService:
     @staticmethod
-    def export_ansible_inventory(session: Session) -> Dict[str, Any]:
-        # Buscar todos os grupos
-        statement = select(Group)
-        groups = session.exec(statement).all()
+    def _load_row_vars(session: Session, owner_column, var_model,
+                       owner_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Agrupar as linhas de variáveis por dono em uma única consulta"""
+        values: Dict[int, Dict[str, Any]] = {}
+        statement = (
+            select(owner_column, var_model.var_name,
+                   var_model.var_value, var_model.is_encrypted)
+            .order_by(var_model.id)
+        )
+        if owner_ids is not None:
+            statement = statement.where(owner_column.in_(list(owner_ids)))
+        for owner_id, var_name, var_value, is_encrypted in session.exec(statement):
+            # Valores vault são exportados como {"__ansible_vault": ...}
+            if is_encrypted:
+                var_value = coerce_var_value(var_value, is_encrypted)
+            values.setdefault(owner_id, {})[var_name] = var_value
+        return values
+
+    @staticmethod
+    @profiling.trace_memory("InventoryService.export_ansible_inventory")
+    def export_ansible_inventory(session: Session, decrypt_vault: bool = False,
+                                 host_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        """
+        Exportar o inventário no formato Ansible. Valores vault são emitidos
+        como {"__ansible_vault": ...}, ou descriptografados em lote quando
+        `decrypt_vault` é verdadeiro (apenas para papéis privilegiados).
+
+        Com `host_ids`, exporta apenas o subconjunto desses hosts e dos grupos
+        que contêm algum deles.
+        """
+        started = time.perf_counter()
+        # Com o grafo em memória ativo, os dados vêm dele, sem acesso ao banco
+        if inventory_graph.is_enabled():
+            groups, hosts, memberships, group_vars, host_vars = inventory_graph.export_data(
+                session)
+            inventory = InventoryService._finish_export(
+                groups, hosts, memberships, group_vars, host_vars, decrypt_vault, host_ids)
+            metrics.observe_export_build("graph", time.perf_counter() - started)
+            return inventory
+
+        # Buscar grupos, hosts e associações com consultas de colunas,
+        # sem carregar os relacionamentos de cada objeto
+        groups = session.exec(
+            select(Group.id, Group.name).order_by(Group.id)).all()
+        hosts = session.exec(
+            select(Host.id, Host.hostname, Host.ansible_host).order_by(Host.id)).all()
+        memberships = session.exec(
+            select(HostGroupLink.host_id, HostGroupLink.group_id)).all()
+
+        # Variáveis: um documento por dono no modo "json", linhas no modo "rows"
+        if VarDocumentService.is_enabled():
+            group_vars = VarDocumentService.get_group_vars(session)
+            host_vars = VarDocumentService.get_host_vars(session)
+        else:
+            group_vars = InventoryService._load_row_vars(
+                session, GroupVar.group_id, GroupVar)
+            host_vars = InventoryService._load_row_vars(
+                session, HostVar.host_id, HostVar)
+
+        inventory = InventoryService._finish_export(
+            groups, hosts, memberships, group_vars, host_vars, decrypt_vault, host_ids)
+        metrics.observe_export_build("db", time.perf_counter() - started)
+        return inventory
+
+    @staticmethod
+    def _export_groups(session: Session, group_ids: Set[int]) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Lista completa de grupos (`children`) e o inventário apenas dos grupos
+        informados e de "ungrouped": associações, hosts e variáveis são
+        consultados só para eles.
+        """
+        groups = session.exec(select(Group.id, Group.name).order_by(Group.id)).all()
+        memberships = session.exec(
+            select(HostGroupLink.host_id, HostGroupLink.group_id)
+            .where(HostGroupLink.group_id.in_(list(group_ids)))).all()
+        member_ids = {host_id for host_id, _ in memberships}
+        grouped = exists().where(HostGroupLink.host_id == Host.id)
+        hosts = session.exec(
+            select(Host.id, Host.hostname, Host.ansible_host)
+            .where(or_(Host.id.in_(list(member_ids)), ~grouped))
+            .order_by(Host.id)).all()
+        host_ids = [host[0] for host in hosts]
+
+        if VarDocumentService.is_enabled():
+            group_vars = VarDocumentService.get_group_vars(session, group_ids)
+            host_vars = VarDocumentService.get_host_vars(session, host_ids)
+        else:
+            group_vars = InventoryService._load_row_vars(
+                session, GroupVar.group_id, GroupVar, group_ids)
+            host_vars = InventoryService._load_row_vars(
+                session, HostVar.host_id, HostVar, host_ids)
+
+        inventory = InventoryService.build_inventory(
+            [group for group in groups if group[0] in group_ids],
+            hosts, memberships, group_vars, host_vars)
+        children = list(dict.fromkeys(name for _, name in groups))
+        if "ungrouped" in inventory:
+            children.append("ungrouped")
+        return children, inventory
+
+    @staticmethod
+    def _affected_groups(session: Session, entries) -> Optional[Set[int]]:
+        """
+        IDs dos grupos cujo conteúdo exportado pode ter mudado com as entradas
+        do registro, ou None quando não é possível determiná-los (exclusão de
+        host: as associações removidas junto com ele não são registradas).
+        """
+        group_ids: Set[int] = set()
+        host_ids: Set[int] = set()
+        for entry in entries:
+            if entry.entity_type == "host":
+                if entry.action == "deleted":
+                    return None
+                host_ids.add(entry.entity_id)
+            elif entry.entity_type == "host_var":
+                host_ids.add(entry.related_id)
+            elif entry.entity_type == "group":
+                group_ids.add(entry.entity_id)
+            else:
+                # group_var (related_id é o grupo) e membership (idem)
+                group_ids.add(entry.related_id)
+        if host_ids:
+            # Hosts aparecem com suas variáveis em cada grupo que os contém
+            group_ids.update(session.exec(
+                select(HostGroupLink.group_id).where(HostGroupLink.host_id.in_(host_ids))
+            ).all())
+        return group_ids
+
+    @staticmethod
+    @profiling.trace_memory("InventoryService.export_delta")
+    def export_delta(session: Session, since: int) -> Dict[str, Any]:
+        """
+        Delta do inventário no formato Ansible desde uma revisão: os grupos
+        (com hosts e variáveis) que mudaram e a lista completa de grupos em
+        `children`; grupos fora dela foram removidos. Quando o delta não pode
+        ser calculado (revisão desconhecida, registro longo demais ou hosts
+        excluídos), `full` é verdadeiro e `groups` traz todos os grupos.
+
+        São lidas no máximo DELTA_MAX_ENTRIES + 1 entradas do registro, e só
+        os grupos afetados são montados a partir do banco (com o grafo em
+        memória ativo, a exportação completa é montada a partir dele).
+        """
+        revision = ChangeLogService.current_revision(session)
+        entries = None
+        if 0 < since <= revision:
+            entries = ChangeLogService.get_entries(session, since, limit=DELTA_MAX_ENTRIES + 1)
+        affected = None
+        if entries is not None and len(entries) <= DELTA_MAX_ENTRIES:
+            affected = InventoryService._affected_groups(session, entries)
+
+        if affected is None or inventory_graph.is_enabled():
+            inventory = InventoryService.export_ansible_inventory(session=session)
+            children = inventory["all"]["children"]
+        else:
+            children, inventory = InventoryService._export_groups(session, affected)
+
+        if affected is None:
+            names = children
+        else:
+            names = set(session.exec(
+                select(Group.name).where(Group.id.in_(affected))).all()) if affected else set()
+            # Hosts passam a (ou deixam de) ser "ungrouped" sem entrada própria
+            if any(entry.entity_type != "group_var" for entry in entries):
+                names.add("ungrouped")
+        return {
+            "since": since,
+            "revision": revision,
+            "full": affected is None,
+            "children": children,
+            "groups": {name: inventory[name] for name in children
+                       if name in names and name in inventory},
+        }
+
+    @staticmethod
+    def _finish_export(groups, hosts, memberships, group_vars, host_vars,
+                       decrypt_vault: bool, host_ids: Optional[Iterable[int]]) -> Dict[str, Any]:
+        if host_ids is not None:
+            groups, hosts, memberships, group_vars, host_vars = InventoryService._restrict(
+                set(host_ids), groups, hosts, memberships, group_vars, host_vars)
+
+        if decrypt_vault and vault.is_enabled():
+            vault.reveal(list(group_vars.values()) + list(host_vars.values()))
+
+        return InventoryService.build_inventory(
+            groups, hosts, memberships, group_vars, host_vars)
+
+    @staticmethod
+    def _restrict(host_ids, groups, hosts, memberships, group_vars, host_vars):
+        """Restringir os dados carregados aos hosts selecionados e seus grupos"""
+        memberships = [(host_id, group_id) for host_id, group_id in memberships
+                       if host_id in host_ids]
+        group_ids = {group_id for _, group_id in memberships}
+        return (
+            [group for group in groups if group[0] in group_ids],
+            [host for host in hosts if host[0] in host_ids],
+            memberships,
+            {group_id: values for group_id, values in group_vars.items()
+             if group_id in group_ids},
+            {host_id: values for host_id, values in host_vars.items()
+             if host_id in host_ids},
+        )
+
+    @staticmethod
+    def build_inventory(
+        groups: Iterable[Tuple[int, str]],
+        hosts: Iterable[Tuple[int, str, str]],
+        memberships: Iterable[Tuple[int, int]],
+        group_vars: Dict[int, Dict[str, Any]],
+        host_vars: Dict[int, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Montar o inventário no formato Ansible a partir de dados já carregados:
+        grupos (id, nome), hosts (id, hostname, ansible_host), associações
+        (host_id, group_id) e variáveis indexadas pelo ID do dono.
+        """
+        hosts_by_id = {host_id: (hostname, ansible_host)
+                       for host_id, hostname, ansible_host in hosts}
+        hosts_by_group: Dict[int, List[int]] = {}
+        grouped_host_ids = set()
+        for host_id, group_id in memberships:
+            hosts_by_group.setdefault(group_id, []).append(host_id)
+            grouped_host_ids.add(host_id)
+
+        def host_entry(host_id: int) -> Dict[str, Any]:
+            entry = {"ansible_host": hosts_by_id[host_id][1]}
+            entry.update(host_vars.get(host_id, {}))
+            return entry
 
         inventory = {}
 
         # Para cada grupo, adicionar ao inventário
-        for group in groups:
-            group_name = group.name
-
+        for group_id, group_name in groups:
             # Inicializar grupo no inventário
             if group_name not in inventory:
                 inventory[group_name] = {
@@ -26,29 +258,17 @@ class InventoryService:
                 }
 
             # Adicionar variáveis do grupo
-            for var in group.variables:
-                inventory[group_name]["vars"][var.var_name] = var.var_value
-
-            # Adicionar hosts do grupo
-            for host in group.hosts:
-                host_name = host.hostname
-
-                # Adicionar o host ao grupo
-                inventory[group_name]["hosts"][host_name] = {
-                    "ansible_host": host.ansible_host
-                }
+            inventory[group_name]["vars"].update(group_vars.get(group_id, {}))
 
-                # Adicionar variáveis do host
-                for var in host.variables:
-                    inventory[group_name]["hosts"][host_name][var.var_name] = var.var_value
+            # Adicionar hosts do grupo com suas variáveis
+            for host_id in hosts_by_group.get(group_id, []):
+                if host_id in hosts_by_id:
+                    inventory[group_name]["hosts"][hosts_by_id[host_id][0]] = host_entry(
+                        host_id)
 
         # Adicionar hosts sem grupo
-        # Subconsulta para obter IDs de hosts que têm grupos
-        host_ids_in_groups = select(HostGroupLink.host_id)
-
-        # Consulta para encontrar hosts que não estão na subconsulta (hosts sem grupos)
-        statement = select(Host).where(~Host.id.in_(host_ids_in_groups))
-        ungrouped_hosts = session.exec(statement).all()
+        ungrouped_hosts = [
+            host_id for host_id in hosts_by_id if host_id not in grouped_host_ids]
 
         if ungrouped_hosts:
             if "ungrouped" not in inventory:
@@ -57,17 +277,9 @@ class InventoryService:
                     "vars": {}
                 }
 
-            for host in ungrouped_hosts:
-                host_name = host.hostname
-
-                # Adicionar o host aos ungrouped
-                inventory["ungrouped"]["hosts"][host_name] = {
-                    "ansible_host": host.ansible_host
-                }
-
-                # Adicionar variáveis do host
-                for var in host.variables:
-                    inventory["ungrouped"]["hosts"][host_name][var.var_name] = var.var_value
+            for host_id in ungrouped_hosts:
+                inventory["ungrouped"]["hosts"][hosts_by_id[host_id][0]] = host_entry(
+                    host_id)
 
         return {
             "all": {
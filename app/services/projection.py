@@ -0,0 +1,49 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from fastapi import HTTPException, Query, status
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """
+    Interpretar o parâmetro fields= (nomes separados por vírgulas). Retorna
+    None quando não informado; o campo "id" é sempre incluído.
+    """
+    if fields is None:
+        return None
+    selected = ["id"]
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in selected:
+            selected.append(name)
+    invalid = [name for name in selected if name not in allowed]
+    if invalid:
+        raise ValueError(f"Campos inválidos em fields: {', '.join(invalid)}")
+    return selected
+
+
+def fields_param(schema) -> Callable[..., Optional[List[str]]]:
+    """
+    Dependência do parâmetro `fields` para os campos de `schema`: retorna os
+    campos selecionados (ou None) e responde 400 para nomes inválidos.
+    """
+    allowed = list(schema.model_fields)
+
+    def dependency(fields: Optional[str] = Query(
+            None, description="Campos retornados, separados por vírgulas")) -> Optional[List[str]]:
+        try:
+            return parse_fields(fields, allowed)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    return dependency
+
+
+def columns(model, fields: List[str]) -> list:
+    """Colunas do modelo correspondentes aos campos selecionados"""
+    return [getattr(model, name) for name in fields]
+
+
+def rows_to_dicts(result) -> List[Dict[str, Any]]:
+    """Converter linhas de uma consulta de colunas em dicionários simples"""
+    return [dict(row._mapping) for row in result]
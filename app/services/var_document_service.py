@@ -0,0 +1,224 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import and_, exists, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Session, select, delete, func
+
+from app.core.config import settings
+from app.core.vault import VAULT_JSON_KEY, is_vault_value
+from app.models.inventory import (
+    GroupVar, GroupVarDocument, HostVar, HostVarDocument
+)
+
+
+# Valor de busca que aceita qualquer valor (apenas a existência da chave);
+# None busca as variáveis com o valor JSON null
+ANY_VALUE = object()
+
+
+def coerce_var_value(var_value: str, is_encrypted: bool = False) -> Any:
+    """
+    Converte o valor textual de uma variável para o tipo JSON correspondente
+    (inteiros, booleanos, listas, dicionários). Valores que não são JSON
+    válido, e valores criptografados, são mantidos como string; valores vault
+    são representados como {"__ansible_vault": ...}, como no Ansible.
+    """
+    if is_encrypted and is_vault_value(var_value):
+        return {VAULT_JSON_KEY: var_value}
+    if is_encrypted or var_value is None:
+        return var_value
+    try:
+        return json.loads(var_value)
+    except (TypeError, ValueError):
+        return var_value
+
+
+class VarDocumentService:
+    """
+    Mantém um documento JSON tipado por host/grupo com todas as suas variáveis.
+
+    As linhas de `host_vars`/`group_vars` continuam sendo os registros usados
+    pela API de variáveis (IDs, timestamps); os documentos são a representação
+    tipada lida pela exportação, com uma única linha por dono.
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.VARS_STORAGE_MODE == "json"
+
+    # Operações genéricas sobre documentos
+
+    @staticmethod
+    def _get_document(session: Session, model, owner_id: int):
+        document = session.get(model, owner_id)
+        if document is None:
+            key = "host_id" if model is HostVarDocument else "group_id"
+            document = model(**{key: owner_id, "vars": {}})
+        return document
+
+    @staticmethod
+    def _put(session: Session, model, owner_id: int, var_name: str, var_value: str,
+             is_encrypted: bool = False, previous_name: Optional[str] = None) -> None:
+        document = VarDocumentService._get_document(session, model, owner_id)
+        # Reatribuir o dicionário para que a alteração seja detectada
+        values = dict(document.vars or {})
+        if previous_name and previous_name != var_name:
+            values.pop(previous_name, None)
+        values[var_name] = coerce_var_value(var_value, is_encrypted)
+        document.vars = values
+        document.updated_at = datetime.now()
+        session.add(document)
+
+    @staticmethod
+    def _remove(session: Session, model, owner_id: int, var_name: str) -> None:
+        document = session.get(model, owner_id)
+        if document is None or var_name not in (document.vars or {}):
+            return
+        values = dict(document.vars)
+        values.pop(var_name)
+        document.vars = values
+        document.updated_at = datetime.now()
+        session.add(document)
+
+    @staticmethod
+    def _replace(session: Session, model, owner_id: int, values: Dict[str, Tuple[str, bool]]) -> None:
+        document = VarDocumentService._get_document(session, model, owner_id)
+        document.vars = {
+            var_name: coerce_var_value(var_value, is_encrypted)
+            for var_name, (var_value, is_encrypted) in values.items()
+        }
+        document.updated_at = datetime.now()
+        session.add(document)
+
+    @staticmethod
+    def _load(session: Session, model, owner_column, owner_ids: Optional[Iterable[int]]) -> Dict[int, Dict[str, Any]]:
+        statement = select(owner_column, model.vars)
+        if owner_ids is not None:
+            statement = statement.where(owner_column.in_(list(owner_ids)))
+        return {owner_id: values or {} for owner_id, values in session.exec(statement)}
+
+    # Variáveis de host
+
+    @staticmethod
+    def put_host_var(session: Session, host_id: int, var_name: str, var_value: str,
+                     is_encrypted: bool = False, previous_name: Optional[str] = None) -> None:
+        VarDocumentService._put(session, HostVarDocument, host_id, var_name,
+                                var_value, is_encrypted, previous_name)
+
+    @staticmethod
+    def remove_host_var(session: Session, host_id: int, var_name: str) -> None:
+        VarDocumentService._remove(session, HostVarDocument, host_id, var_name)
+
+    @staticmethod
+    def replace_host_vars(session: Session, host_id: int, values: Dict[str, Tuple[str, bool]]) -> None:
+        """Substituir o documento do host por (valor, criptografada) por variável"""
+        VarDocumentService._replace(session, HostVarDocument, host_id, values)
+
+    @staticmethod
+    def get_host_vars(session: Session, host_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Obter os documentos de variáveis dos hosts em uma única consulta"""
+        return VarDocumentService._load(
+            session, HostVarDocument, HostVarDocument.host_id, host_ids)
+
+    # Variáveis de grupo
+
+    @staticmethod
+    def put_group_var(session: Session, group_id: int, var_name: str, var_value: str,
+                      is_encrypted: bool = False, previous_name: Optional[str] = None) -> None:
+        VarDocumentService._put(session, GroupVarDocument, group_id, var_name,
+                                var_value, is_encrypted, previous_name)
+
+    @staticmethod
+    def remove_group_var(session: Session, group_id: int, var_name: str) -> None:
+        VarDocumentService._remove(session, GroupVarDocument, group_id, var_name)
+
+    @staticmethod
+    def replace_group_vars(session: Session, group_id: int, values: Dict[str, Tuple[str, bool]]) -> None:
+        """Substituir o documento do grupo por (valor, criptografada) por variável"""
+        VarDocumentService._replace(session, GroupVarDocument, group_id, values)
+
+    @staticmethod
+    def get_group_vars(session: Session, group_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Obter os documentos de variáveis dos grupos em uma única consulta"""
+        return VarDocumentService._load(
+            session, GroupVarDocument, GroupVarDocument.group_id, group_ids)
+
+    # Consultas por chave
+
+    @staticmethod
+    def host_var_condition(dialect_name: str, var_name: str, value: Any = ANY_VALUE):
+        """
+        Condição sobre o documento de variáveis dos hosts: a chave existe (e,
+        se `value` for informado, tem exatamente esse valor JSON, inclusive
+        null, listas e dicionários). No PostgreSQL usa os operadores JSONB ?
+        e @>, atendidos pelo índice GIN; nos demais bancos, as entradas de
+        json_each. O nome e o valor são sempre parâmetros.
+        """
+        if dialect_name == "postgresql":
+            # A coluna usa o comparador JSON genérico; JSONB expõe ? e @>
+            values = type_coerce(HostVarDocument.vars, JSONB)
+            if value is ANY_VALUE:
+                return values.has_key(var_name)
+            condition = values.contains({var_name: value})
+            if isinstance(value, (list, dict)):
+                # @> aceita subconjuntos de listas e dicionários
+                item = values.op("->", return_type=JSONB)(var_name)
+                return and_(condition, item == type_coerce(value, JSONB))
+            return condition
+        entries = func.json_each(HostVarDocument.vars).table_valued("key", "value", "type")
+        statement = select(1).select_from(entries).where(entries.c.key == var_name)
+        if value is None:
+            statement = statement.where(entries.c.type == "null")
+        elif isinstance(value, (list, dict)):
+            statement = statement.where(
+                entries.c.type == ("array" if isinstance(value, list) else "object"))
+        elif value is not ANY_VALUE:
+            statement = statement.where(entries.c.value == value)
+        return exists(statement)
+
+    @staticmethod
+    def find_host_ids_by_var(session: Session, var_name: str, value: Any = ANY_VALUE) -> List[int]:
+        """
+        Obter os IDs dos hosts que possuem a variável informada (e, se
+        fornecido, com o valor informado). No PostgreSQL a consulta usa o
+        índice GIN do documento JSONB.
+        """
+        dialect_name = session.get_bind().dialect.name
+        condition = VarDocumentService.host_var_condition(dialect_name, var_name, value)
+        if dialect_name == "postgresql" or not isinstance(value, (list, dict)):
+            statement = select(HostVarDocument.host_id).where(condition)
+            return list(session.exec(statement).all())
+        # json_each não compara listas e dicionários (o texto JSON depende da
+        # ordem das chaves): os documentos candidatos são comparados aqui
+        statement = select(HostVarDocument.host_id, HostVarDocument.vars).where(condition)
+        return [host_id for host_id, values in session.exec(statement)
+                if values.get(var_name) == value]
+
+    # Reconstrução a partir das linhas
+
+    @staticmethod
+    def rebuild(session: Session) -> None:
+        """
+        Reconstruir todos os documentos a partir das linhas de variáveis.
+        Necessário ao ativar o modo "json" em um banco existente.
+        """
+        for var_model, doc_model, owner_column in (
+            (HostVar, HostVarDocument, HostVar.host_id),
+            (GroupVar, GroupVarDocument, GroupVar.group_id),
+        ):
+            documents: Dict[int, Dict[str, Any]] = {}
+            statement = (
+                select(owner_column, var_model.var_name,
+                       var_model.var_value, var_model.is_encrypted)
+                .order_by(var_model.id)
+            )
+            for owner_id, var_name, var_value, is_encrypted in session.exec(statement):
+                documents.setdefault(owner_id, {})[var_name] = coerce_var_value(
+                    var_value, is_encrypted)
+
+            key = "host_id" if doc_model is HostVarDocument else "group_id"
+            session.exec(delete(doc_model))
+            for owner_id, values in documents.items():
+                session.add(doc_model(**{key: owner_id, "vars": values}))
+        session.commit()
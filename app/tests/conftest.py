@@ -4,9 +4,17 @@ from sqlmodel import SQLModel, Session, create_engine
 from fastapi.testclient import TestClient
 from sqlalchemy import text
 
+from app.core.config import settings
 from app.main import app
 from app.db.session import get_session
 from app.models.inventory import Group, Host, GroupVar, HostVar, HostGroupLink
+from app.core.response_cache import response_cache
+from app.services.dynamic_group_service import DynamicGroupService
+from app.services.host_pattern_service import HostPatternService
+from app.services.inventory_graph_service import inventory_graph
+
+# Carregamentos preguiçosos de relacionamentos falham nos testes (N+1)
+settings.ORM_RAISELOAD = True
 
 # Criar um banco de dados SQLite em arquivo para testes
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -32,15 +40,30 @@ def clean_tables():
     """Limpar todas as tabelas antes de cada teste."""
     with Session(test_engine) as session:
         # Usar text() para declarações SQL literais
+        session.exec(text("DELETE FROM inventory_changes"))
         session.exec(text("DELETE FROM host_group_membership"))
+        session.exec(text("DELETE FROM dynamic_group_rules"))
+        session.exec(text("DELETE FROM group_var_documents"))
+        session.exec(text("DELETE FROM host_var_documents"))
         session.exec(text("DELETE FROM group_vars"))
         session.exec(text("DELETE FROM host_vars"))
         session.exec(text("DELETE FROM hosts"))
         session.exec(text("DELETE FROM groups"))
         session.commit()
+    # Índices em memória não enxergam escritas feitas diretamente nas tabelas
+    HostPatternService.invalidate()
+    DynamicGroupService.invalidate()
+    inventory_graph.reset()
+    response_cache.clear()
     yield
 
 
+@pytest.fixture(name="engine")
+def engine_fixture():
+    """Fixture que fornece o engine do banco de dados de teste."""
+    return test_engine
+
+
 @pytest.fixture(name="session")
 def session_fixture():
     """Fixture que fornece uma sessão de banco de dados de teste."""
@@ -171,3 +194,27 @@ def mock_auth_fixture():
     else:
         if get_current_user in app.dependency_overrides:
             del app.dependency_overrides[get_current_user]
+
+
+@pytest.fixture(name="assert_max_queries")
+def assert_max_queries_fixture():
+    """
+    Limita o número de consultas SQL de um bloco de código, inclusive as
+    feitas pelo TestClient em outra thread:
+
+        with assert_max_queries(5):
+            client.get("/api/v1/hosts/")
+    """
+    from contextlib import contextmanager
+    from app.core.query_stats import capture_queries
+
+    @contextmanager
+    def assert_max_queries(limit: int):
+        with capture_queries() as stats:
+            yield stats
+        statements = "\n".join(f"  {count}x {' '.join(statement.split())}"
+                               for statement, count in stats.statements.items())
+        assert stats.queries <= limit, \
+            f"{stats.queries} consultas SQL (máximo {limit}):\n{statements}"
+
+    return assert_max_queries
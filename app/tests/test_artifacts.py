@@ -0,0 +1,106 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.services.artifact_service import artifacts, render_ini
+
+
+@pytest.fixture(name="artifacts_dir")
+def artifacts_dir_fixture(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INVENTORY_ARTIFACTS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_render_writes_artifacts_per_revision(session: Session, test_data, artifacts_dir):
+    """Testa a geração dos arquivos e a regravação apenas em nova revisão."""
+    revision = artifacts.render(session)
+    assert artifacts.written_revision() == revision
+    inventory = json.loads((artifacts_dir / "inventory.json").read_text())
+    assert set(inventory["webservers"]["hosts"]) == {"web1", "web2"}
+
+    mtime = (artifacts_dir / "inventory.json").stat().st_mtime_ns
+    assert artifacts.render(session) == revision
+    assert (artifacts_dir / "inventory.json").stat().st_mtime_ns == mtime
+    # Nenhum arquivo temporário deixado no diretório
+    assert sorted(path.name for path in artifacts_dir.iterdir()) == [
+        "REVISION", "hosts.ini", "hosts.yml", "inventory.json"]
+
+
+def test_yaml_artifact_uses_ansible_layout(session: Session, test_data, artifacts_dir):
+    """Testa o YAML no formato do plugin de inventário yaml."""
+    yaml = pytest.importorskip("yaml")
+    artifacts.render(session)
+    document = yaml.safe_load((artifacts_dir / "hosts.yml").read_text())
+    webservers = document["all"]["children"]["webservers"]
+    assert webservers["hosts"]["web1"]["ansible_host"] == "192.168.1.10"
+    assert webservers["vars"]["http_port"] == "80"
+
+
+def test_render_ini():
+    """Testa o INI com hosts, variáveis de grupo e a omissão de valores vault."""
+    inventory = {
+        "all": {"children": ["web"]},
+        "web": {
+            "hosts": {"web1": {"ansible_host": "10.0.0.1", "motd": "hello world",
+                               "secret": {"__ansible_vault": "$ANSIBLE_VAULT;1.1;AES256\n00"}}},
+            "vars": {"http_port": 80},
+            "children": [],
+        },
+    }
+    assert render_ini(inventory).decode() == (
+        '[web]\nweb1 ansible_host=10.0.0.1 motd="hello world"\n\n'
+        "[web:vars]\nhttp_port=80\n")
+
+
+def test_artifact_endpoint(client: TestClient, session: Session, test_data, artifacts_dir, mock_auth):
+    """Testa o endpoint que serve os arquivos gerados."""
+    artifacts.render(session)
+    response = client.get("/api/v1/inventory/artifacts/ini")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "[webservers]" in response.text
+    assert "etag" in response.headers
+
+    assert client.get("/api/v1/inventory/artifacts/toml").status_code == 404
+
+
+def test_artifact_endpoint_disabled(client: TestClient, mock_auth):
+    """Testa a resposta quando os arquivos não estão configurados."""
+    assert client.get("/api/v1/inventory/artifacts/json").status_code == 404
+
+
+def test_artifacts_follow_commits(client: TestClient, session: Session, artifacts_dir, monkeypatch):
+    """Testa a regeneração em segundo plano após uma escrita confirmada."""
+    monkeypatch.setattr(settings, "INVENTORY_ARTIFACTS_DEBOUNCE", 0.0)
+    artifacts.start(session.get_bind())
+    try:
+        initial = artifacts.written_revision()
+        response = client.post("/api/v1/hosts/", json={
+            "hostname": "new-host", "ansible_host": "10.0.0.9"})
+        assert response.status_code == 201
+        for _ in range(100):
+            if artifacts.written_revision() != initial:
+                break
+            time.sleep(0.02)
+        inventory = json.loads((artifacts_dir / "inventory.json").read_text())
+        assert "new-host" in inventory["ungrouped"]["hosts"]
+    finally:
+        artifacts.stop()
+
+
+def test_background_initial_render(session: Session, test_data, artifacts_dir):
+    """Testa a geração inicial na thread (modo "production")."""
+    artifacts.start(session.get_bind(), background=True)
+    try:
+        for _ in range(100):
+            if artifacts.written_revision() is not None:
+                break
+            time.sleep(0.02)
+        inventory = json.loads((artifacts_dir / "inventory.json").read_text())
+        assert "web1" in inventory["webservers"]["hosts"]
+    finally:
+        artifacts.stop()
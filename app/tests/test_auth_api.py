@@ -123,4 +123,27 @@ def test_user_info_endpoint(client: TestClient, mock_auth):
     assert response.status_code == 200
     user_data = response.json()
     assert user_data["username"] == "testuser"
-    assert "roles" in user_data
\ No newline at end of file
+    assert "roles" in user_data
+
+def test_keycloak_key_failure_is_retried_after_interval(monkeypatch):
+    """Testa o tempo limite da busca da chave e a espera antes de uma nova tentativa."""
+    from app.core import auth
+    from app.core.config import settings
+
+    monkeypatch.setattr(auth, "keycloak_public_key", None)
+    monkeypatch.setattr(auth, "keycloak_public_key_expiry", 0)
+    monkeypatch.setattr(auth, "keycloak_public_key_retry_at", 0)
+    monkeypatch.setattr(settings, "KEYCLOAK_TIMEOUT", 2.5)
+    with patch("requests.get", side_effect=ConnectionError("recusada")) as get:
+        with pytest.raises(auth.KeycloakUnavailableError):
+            auth.get_keycloak_public_key()
+        with pytest.raises(auth.KeycloakUnavailableError, match="nova tentativa"):
+            auth.get_keycloak_public_key()
+    assert get.call_count == 1
+    assert get.call_args.kwargs["timeout"] == 2.5
+
+    monkeypatch.setattr(auth, "keycloak_public_key_retry_at", 0)
+    response = MagicMock()
+    response.json.return_value = {"public_key": "CHAVE"}
+    with patch("requests.get", return_value=response):
+        assert "CHAVE" in auth.get_keycloak_public_key()
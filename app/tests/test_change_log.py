@@ -0,0 +1,125 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.services.change_log_service import ChangeLogService
+from app.services.group_service import GroupService
+from app.services.host_service import HostService
+from app.services.host_var_service import HostVarService
+from app.schemas.inventory import GroupCreate, HostCreate, HostUpdate, HostVarCreate
+
+
+def test_write_paths_record_changes(session: Session):
+    """Testa que as operações de escrita registram alterações com revisões crescentes."""
+    group = GroupService.create(session, GroupCreate(name="web"))
+    host = HostService.create(session, HostCreate(hostname="web1", group_ids=[group.id]))
+    HostVarService.create(session, HostVarCreate(
+        var_name="http_port", var_value="80", host_id=host.id))
+
+    entries = ChangeLogService.get_entries(session, since=0)
+    assert [(e.entity_type, e.action) for e in entries] == [
+        ("group", "created"),
+        ("host", "created"),
+        ("membership", "created"),
+        ("host_var", "created"),
+    ]
+    revisions = [e.revision for e in entries]
+    assert revisions == sorted(revisions)
+    assert ChangeLogService.current_revision(session) == revisions[-1]
+
+
+def test_delta_since_revision(session: Session):
+    """Testa que o delta contém apenas as alterações após a revisão."""
+    group = GroupService.create(session, GroupCreate(name="web"))
+    other = GroupService.create(session, GroupCreate(name="db"))
+    host = HostService.create(session, HostCreate(hostname="web1", group_ids=[group.id]))
+    since = ChangeLogService.current_revision(session)
+
+    HostService.update(session, host.id, HostUpdate(
+        ansible_host="10.0.0.1", group_ids=[other.id]))
+    GroupService.delete(session, group.id)
+
+    delta = ChangeLogService.get_changes(session, since=since)
+    assert delta["revision"] > since
+    assert [h.hostname for h in delta["hosts"]["upserted"]] == ["web1"]
+    assert delta["groups"]["deleted"] == [group.id]
+    assert delta["memberships"]["added"] == [{"host_id": host.id, "group_id": other.id}]
+    assert delta["memberships"]["removed"] == [{"host_id": host.id, "group_id": group.id}]
+
+
+def test_changes_endpoint(client: TestClient, session: Session, mock_auth):
+    """Testa o endpoint de delta de alterações."""
+    host = HostService.create(session, HostCreate(hostname="web1"))
+    revision = ChangeLogService.current_revision(session)
+    HostService.delete(session, host.id)
+
+    response = client.get("/api/v1/inventory/changes", params={"since": revision})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["since"] == revision
+    assert data["hosts"] == {"upserted": [], "deleted": [host.id]}
+
+    # Sem alterações novas, o delta é vazio e a revisão se mantém
+    response = client.get("/api/v1/inventory/changes", params={"since": data["revision"]})
+    assert response.json()["revision"] == data["revision"]
+    assert response.json()["hosts"]["deleted"] == []
+
+
+def test_revision_lock_on_postgresql():
+    """Testa o advisory lock que ordena as revisões no PostgreSQL, uma vez por transação."""
+    from types import SimpleNamespace
+
+    class FakeSession:
+        def __init__(self):
+            self.info = {}
+            self.executed = []
+            self.transaction = None
+
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+        def get_transaction(self):
+            return self.transaction
+
+        def execute(self, statement, params=None):
+            self.executed.append(str(statement))
+            self.transaction = self.transaction or object()
+
+    fake = FakeSession()
+    ChangeLogService._lock_revisions(fake)
+    ChangeLogService._lock_revisions(fake)
+    assert fake.executed == ["SELECT pg_advisory_xact_lock(:key)"]
+
+    # Nova transação: novo lock
+    fake.transaction = object()
+    ChangeLogService._lock_revisions(fake)
+    assert len(fake.executed) == 2
+
+
+def test_export_delta_builds_affected_groups(session: Session, monkeypatch):
+    """Testa que o delta lê entradas limitadas e monta apenas os grupos afetados."""
+    from app.services import inventory_service
+    from app.services.inventory_service import InventoryService
+
+    web = GroupService.create(session, GroupCreate(name="web"))
+    GroupService.create(session, GroupCreate(name="db"))
+    HostService.create(session, HostCreate(hostname="web1", group_ids=[web.id]))
+    HostService.create(session, HostCreate(hostname="lonely"))
+    since = ChangeLogService.current_revision(session)
+    HostService.create(session, HostCreate(hostname="web2", group_ids=[web.id]))
+
+    def full_export(*args, **kwargs):
+        raise AssertionError("exportação completa no delta")
+
+    monkeypatch.setattr(InventoryService, "export_ansible_inventory", full_export)
+    delta = InventoryService.export_delta(session, since)
+    assert delta["full"] is False
+    assert delta["children"] == ["web", "db", "ungrouped"]
+    assert sorted(delta["groups"]["web"]["hosts"]) == ["web1", "web2"]
+    assert "db" not in delta["groups"]
+
+    # Acima do limite, o delta passa a ser a exportação completa
+    monkeypatch.undo()
+    monkeypatch.setattr(inventory_service, "DELTA_MAX_ENTRIES", 0)
+    assert len(ChangeLogService.get_entries(session, since, limit=1)) == 1
+    assert InventoryService.export_delta(session, since)["full"] is True
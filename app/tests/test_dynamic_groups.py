@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models.inventory import HostGroupLink
+from app.services.dynamic_group_service import DynamicGroupService
+from app.services.group_service import GroupService
+from app.services.host_service import HostService
+from app.services.host_var_service import HostVarService
+from app.schemas.inventory import (
+    DynamicGroupRuleCreate, GroupCreate, HostCreate, HostUpdate, HostVarCreate
+)
+
+
+def _members(session: Session, group_id: int):
+    return set(session.exec(select(HostGroupLink.host_id).where(
+        HostGroupLink.group_id == group_id)).all())
+
+
+def test_rules_materialize_membership(session: Session, test_data):
+    """Testa que a definição de regras materializa a associação do grupo."""
+    group = GroupService.create(session, GroupCreate(name="db_prod"))
+    DynamicGroupService.set_rules(session, group.id, [
+        DynamicGroupRuleCreate(field="hostname", operator="regex", value="^db"),
+        DynamicGroupRuleCreate(field="ansible_port", operator="eq", value="22"),
+    ])
+
+    assert _members(session, group.id) == {test_data["hosts"][2].id}
+
+
+def test_host_changes_are_evaluated_incrementally(session: Session, test_data):
+    """Testa a reavaliação de um host ao ser criado, alterado ou ter variáveis alteradas."""
+    group = GroupService.create(session, GroupCreate(name="winrm"))
+    DynamicGroupService.set_rules(session, group.id, [
+        DynamicGroupRuleCreate(field="vars.ansible_connection", operator="eq", value="winrm"),
+    ])
+    assert _members(session, group.id) == set()
+
+    host = HostService.create(session, HostCreate(hostname="win1"))
+    var = HostVarService.create(session, HostVarCreate(
+        var_name="ansible_connection", var_value="winrm", host_id=host.id))
+    assert _members(session, group.id) == {host.id}
+
+    HostVarService.delete(session, var.id)
+    assert _members(session, group.id) == set()
+
+
+def test_static_updates_do_not_touch_dynamic_membership(session: Session, test_data):
+    """Testa que a atualização de grupos estáticos preserva a associação dinâmica."""
+    group = GroupService.create(session, GroupCreate(name="web_dynamic"))
+    DynamicGroupService.set_rules(session, group.id, [
+        DynamicGroupRuleCreate(field="hostname", operator="contains", value="web"),
+    ])
+    web1 = test_data["hosts"][0]
+
+    HostService.update(session, web1.id, HostUpdate(group_ids=[test_data["groups"][1].id]))
+    assert web1.id in _members(session, group.id)
+
+    HostService.update(session, web1.id, HostUpdate(hostname="app1"))
+    assert web1.id not in _members(session, group.id)
+
+
+def test_rules_endpoint(client: TestClient, test_data, mock_auth):
+    """Testa a definição de regras via API e a exportação do grupo dinâmico."""
+    group_id = test_data["groups"][1].id
+    response = client.put(
+        f"/api/v1/groups/{group_id}/rules",
+        json=[{"field": "ansible_user", "operator": "eq", "value": "admin"}]
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["field"] == "ansible_user"
+
+    data = client.get("/api/v1/inventory/ansible-format").json()
+    assert set(data["dbservers"]["hosts"]) == {"web1", "web2"}
+
+    response = client.put(
+        f"/api/v1/groups/{group_id}/rules",
+        json=[{"field": "unknown", "operator": "eq", "value": "x"}]
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("pattern", ["(a+)+$", "(a*b?)*c", "^(\\w+\\s?)*$", "(x|y+)+", "a" * 300])
+def test_unsafe_regex_rules_are_rejected(pattern):
+    """Testa a recusa de expressões regulares longas ou com quantificadores aninhados."""
+    with pytest.raises(ValueError):
+        DynamicGroupService.validate_rule(
+            DynamicGroupRuleCreate(field="hostname", operator="regex", value=pattern))
+
+
+@pytest.mark.parametrize("pattern", ["^db", r"^(\d{1,3}\.){3}\d{1,3}$", "(ab?)*", "web[0-9]+"])
+def test_safe_regex_rules_are_accepted(pattern):
+    """Testa que expressões regulares comuns continuam aceitas."""
+    DynamicGroupService.validate_rule(
+        DynamicGroupRuleCreate(field="hostname", operator="regex", value=pattern))
+
+
+def test_compiled_rules_are_cached_by_revision(session: Session, test_data):
+    """Testa que as regras só são recarregadas após uma alteração de grupo."""
+    group = GroupService.create(session, GroupCreate(name="db_cached"))
+    DynamicGroupService.set_rules(session, group.id, [
+        DynamicGroupRuleCreate(field="hostname", operator="regex", value="^db"),
+    ])
+    HostService.create(session, HostCreate(hostname="db2"))
+    cached = DynamicGroupService._cache
+
+    host = HostService.create(session, HostCreate(hostname="db3"))
+    assert DynamicGroupService._cache[1] is cached[1]
+    assert host.id in _members(session, group.id)
+
+    # Novas regras: o cache é descartado
+    DynamicGroupService.set_rules(session, group.id, [
+        DynamicGroupRuleCreate(field="hostname", operator="eq", value="db4"),
+    ])
+    host = HostService.create(session, HostCreate(hostname="db4"))
+    other = HostService.create(session, HostCreate(hostname="db5"))
+    assert DynamicGroupService._cache[1] is not cached[1]
+    assert _members(session, group.id) == {host.id}
+    assert other.id not in _members(session, group.id)
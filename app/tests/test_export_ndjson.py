@@ -0,0 +1,79 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import accepts_encoding
+from app.services.export_service import ExportService
+
+
+def _lines(content: bytes):
+    return [json.loads(line) for line in content.decode("utf-8").splitlines()]
+
+
+def test_export_hosts_ndjson(client: TestClient, test_data):
+    """Testa a exportação de hosts em NDJSON, ordenada por id."""
+    response = client.get("/api/v1/hosts/export.ndjson",
+                          headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "content-encoding" not in response.headers
+
+    rows = _lines(response.content)
+    assert [row["hostname"] for row in rows] == [
+        host.hostname for host in test_data["hosts"]]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert set(rows[0]) >= {"id", "hostname", "ansible_host", "created_at"}
+
+
+def test_export_ndjson_gzip_and_fields(client: TestClient, test_data):
+    """Testa a compressão gzip e a seleção de campos."""
+    response = client.get("/api/v1/groups/export.ndjson?fields=name",
+                          headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    # O httpx descomprime o corpo automaticamente
+    rows = _lines(response.content)
+    assert rows == [{"id": group.id, "name": group.name} for group in test_data["groups"]]
+
+    response = client.get("/api/v1/host-vars/export.ndjson?fields=unknown")
+    assert response.status_code == 400
+    assert "unknown" in response.json()["detail"]
+
+    # q=0 recusa a codificação
+    response = client.get("/api/v1/groups/export.ndjson",
+                          headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_accepts_encoding_q_values():
+    """Testa a interpretação dos q-values do Accept-Encoding."""
+    assert accepts_encoding("gzip, deflate, br", "gzip")
+    assert accepts_encoding("br;q=1.0, gzip;q=0.5", "gzip")
+    assert not accepts_encoding("gzip;q=0", "gzip")
+    assert not accepts_encoding("GZIP; q=0.000", "gzip")
+    assert accepts_encoding("*", "gzip")
+    assert not accepts_encoding("*;q=0", "gzip")
+    assert not accepts_encoding("*, gzip;q=0", "gzip")
+    assert not accepts_encoding("identity", "gzip")
+    assert not accepts_encoding("", "gzip")
+
+
+def test_export_vars_ndjson(client: TestClient, test_data):
+    """Testa a exportação das variáveis de hosts e grupos."""
+    host_vars = _lines(client.get("/api/v1/host-vars/export.ndjson").content)
+    group_vars = _lines(client.get("/api/v1/group-vars/export.ndjson").content)
+    assert {row["var_name"] for row in host_vars} == {
+        var.var_name for var in test_data["host_vars"]}
+    assert {row["group_id"] for row in group_vars} == {
+        var.group_id for var in test_data["group_vars"]}
+
+
+def test_iter_ndjson_chunks_are_valid_gzip():
+    """Testa que cada bloco comprimido é transmitido de forma incremental."""
+    rows = ({"id": index, "value": "x" * 100} for index in range(2000))
+    chunks = list(ExportService.iter_ndjson(rows, compress=True))
+    assert len(chunks) > 2
+    lines = gzip.decompress(b"".join(chunks)).splitlines()
+    assert len(lines) == 2000
+    assert json.loads(lines[-1]) == {"id": 1999, "value": "x" * 100}
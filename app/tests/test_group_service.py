@@ -1,9 +1,9 @@
 import pytest
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 from app.services.group_service import GroupService
 from app.schemas.inventory import GroupCreate, GroupUpdate
-from app.models.inventory import Group
+from app.models.inventory import Group, GroupVar, Host, HostGroupLink
 
 
 def test_create_group(session: Session):
@@ -70,3 +70,34 @@ def test_delete(session: Session, test_data):
 
     # Confirmar que foi excluído
     assert GroupService.get_by_id(session=session, group_id=group_id) is None
+
+
+def test_delete_reparents_children_and_removes_links(session: Session, test_data):
+    """Testa que a exclusão em lote move os filhos e remove variáveis e associações."""
+    parent = test_data["groups"][0]
+    middle = GroupService.create(
+        session=session, group_create=GroupCreate(name="middle", parent_group_id=parent.id))
+    child = GroupService.create(
+        session=session, group_create=GroupCreate(name="child", parent_group_id=middle.id))
+    GroupService.add_host(session=session, group_id=middle.id,
+                          host_id=test_data["hosts"][0].id)
+    session.add(GroupVar(var_name="x", var_value="1", group_id=middle.id))
+    session.commit()
+
+    assert GroupService.delete(session=session, group_id=middle.id) is True
+
+    session.expire_all()
+    assert GroupService.get_by_id(session=session, group_id=middle.id) is None
+    assert GroupService.get_by_id(
+        session=session, group_id=child.id).parent_group_id == parent.id
+    assert session.exec(select(HostGroupLink).where(
+        HostGroupLink.group_id == middle.id)).all() == []
+    assert session.exec(select(GroupVar).where(
+        GroupVar.group_id == middle.id)).all() == []
+    # O host continua existindo
+    assert session.get(Host, test_data["hosts"][0].id) is not None
+
+
+def test_delete_nonexistent(session: Session):
+    """Testa a exclusão de um grupo inexistente."""
+    assert GroupService.delete(session=session, group_id=9999) is False
@@ -56,3 +56,64 @@ def test_delete_group(client: TestClient, test_data, mock_auth):
     # Verificar se o grupo realmente foi excluído
     response = client.get(f"/api/v1/groups/{group_id}")
     assert response.status_code == 404
+
+
+def _create_tree(client: TestClient, root_id: int, levels: int, width: int):
+    parents = [root_id]
+    for level in range(levels):
+        children = []
+        for parent_id in parents:
+            for index in range(width):
+                response = client.post("/api/v1/groups/", json={
+                    "name": f"g{level}_{parent_id}_{index}", "parent_group_id": parent_id})
+                children.append(response.json()["id"])
+        parents = children
+
+
+def test_get_group_depth_and_include(client: TestClient, test_data, mock_auth):
+    """Testa a limitação de profundidade e a seleção de relações do detalhe."""
+    group_id = test_data["groups"][0].id
+    _create_tree(client, group_id, levels=3, width=2)
+
+    data = client.get(f"/api/v1/groups/{group_id}").json()
+    assert len(data["children"][0]["children"][0]["children"]) == 2
+
+    data = client.get(f"/api/v1/groups/{group_id}?depth=1").json()
+    assert len(data["children"]) == 2
+    assert data["children"][0]["children"] == []
+    assert data["children"][0]["parent"]["id"] == group_id
+
+    data = client.get(f"/api/v1/groups/{group_id}?include=variables").json()
+    assert data["hosts"] == [] and data["children"] == []
+    assert len(data["variables"]) == 2
+
+    response = client.get(f"/api/v1/groups/{group_id}?include=hosts,parents")
+    assert response.status_code == 400
+
+
+def test_get_group_queries_per_level(client: TestClient, session: Session, test_data, mock_auth,
+                                     assert_max_queries):
+    """Testa que o número de consultas depende da profundidade, não do tamanho da árvore."""
+    group_id = test_data["groups"][0].id
+    _create_tree(client, group_id, levels=2, width=4)
+
+    session.expire_all()
+    # Raiz (grupo, pai, hosts, variáveis) + 3 consultas por nível + nível vazio
+    with assert_max_queries(4 + 3 * 2 + 1):
+        response = client.get(f"/api/v1/groups/{group_id}")
+    assert response.status_code == 200
+    assert len(response.json()["children"]) == 4
+
+
+def test_list_with_fields(client: TestClient, test_data, mock_auth):
+    """Testa o parâmetro fields nas listagens de hosts e grupos."""
+    response = client.get("/api/v1/hosts/?fields=hostname,ansible_host&limit=1")
+    assert response.status_code == 200
+    assert response.json() == [{
+        "id": test_data["hosts"][0].id, "hostname": "web1", "ansible_host": "192.168.1.10"}]
+
+    response = client.get("/api/v1/groups/?fields=name")
+    assert [group["name"] for group in response.json()] == ["webservers", "dbservers"]
+    assert set(response.json()[0]) == {"id", "name"}
+
+    assert client.get("/api/v1/groups/?fields=password").status_code == 400
@@ -0,0 +1,111 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.services.group_service import GroupService
+from app.services.host_pattern_service import (
+    HostPatternService, MembershipIndex, PatternError, split_pattern
+)
+from app.services.host_service import HostService
+from app.services.host_var_service import HostVarService
+from app.schemas.inventory import GroupCreate, HostCreate, HostVarCreate
+
+
+@pytest.fixture(name="index")
+def index_fixture():
+    hosts = [(1, "web1"), (2, "web2"), (3, "db1"), (4, "db2"), (5, "lb1")]
+    groups = [(10, "web", None), (11, "db", None), (12, "prod", None),
+              (13, "maintenance", None), (14, "datacenter", None), (15, "rack1", 14)]
+    memberships = [(1, 10), (2, 10), (3, 11), (4, 11),
+                   (1, 12), (3, 12), (4, 12), (2, 13), (4, 13), (5, 15)]
+    return MembershipIndex(1, hosts, groups, memberships)
+
+
+def _hostnames(index: MembershipIndex, pattern: str):
+    return [index.hostnames[position] for position in index.positions(index.resolve(pattern))]
+
+
+def test_split_pattern():
+    """Testa a separação de termos por vírgula ou dois-pontos."""
+    assert split_pattern("web:&prod:!maintenance") == ["web", "&prod", "!maintenance"]
+    assert split_pattern("web, db") == ["web", "db"]
+    assert split_pattern("~web[0-9]:x") == ["~web[0-9]:x"]
+
+
+@pytest.mark.parametrize("pattern,expected", [
+    ("all", ["web1", "web2", "db1", "db2", "lb1"]),
+    ("web:db", ["web1", "web2", "db1", "db2"]),
+    ("web:&prod", ["web1"]),
+    ("web:db:&prod:!maintenance", ["web1", "db1"]),
+    ("!maintenance", ["web1", "db1", "lb1"]),
+    ("db*", ["db1", "db2"]),
+    ("~web\\d", ["web1", "web2"]),
+    ("datacenter", ["lb1"]),
+    ("web1,lb1", ["web1", "lb1"]),
+    ("unknown", []),
+])
+def test_resolve_patterns(index: MembershipIndex, pattern, expected):
+    """Testa uniões, interseções, exclusões, curingas, regex e subgrupos."""
+    assert _hostnames(index, pattern) == expected
+
+
+def test_invalid_patterns(index: MembershipIndex):
+    """Testa a rejeição de padrões inválidos."""
+    with pytest.raises(PatternError):
+        index.resolve("~web[")
+    with pytest.raises(PatternError):
+        index.resolve("web:!")
+    # Expressões sujeitas a backtracking catastrófico ou longas demais
+    with pytest.raises(PatternError):
+        index.resolve("~(a+)+$")
+    with pytest.raises(PatternError):
+        index.resolve("~" + "a" * 300)
+
+
+def test_index_follows_revision(session: Session, test_data):
+    """Testa que o índice é reconstruído quando a revisão muda."""
+    _, _, hostnames = HostPatternService.resolve(session, "webservers")
+    assert hostnames == ["web1", "web2"]
+
+    HostService.create(session, HostCreate(
+        hostname="web3", group_ids=[test_data["groups"][0].id]))
+    revision, _, hostnames = HostPatternService.resolve(session, "webservers")
+    assert hostnames == ["web1", "web2", "web3"]
+    assert revision == HostPatternService.get_index(session).revision
+
+
+def test_index_skips_var_changes(session: Session, test_data):
+    """Testa que alterações de variáveis apenas avançam a revisão do índice."""
+    index = HostPatternService.get_index(session)
+    HostVarService.create(session, HostVarCreate(
+        var_name="rack", var_value="r1", host_id=test_data["hosts"][0].id))
+    revision, _, hostnames = HostPatternService.resolve(session, "webservers")
+    assert HostPatternService.get_index(session) is index
+    assert revision == index.revision > 0
+    assert hostnames == ["web1", "web2"]
+
+    GroupService.create(session, GroupCreate(name="extra"))
+    assert HostPatternService.get_index(session) is not index
+
+
+def test_query_endpoint(client: TestClient, test_data, mock_auth):
+    """Testa a resolução de padrões e a exportação de subconjunto via API."""
+    response = client.get("/api/v1/inventory/query", params={"pattern": "all:!dbservers"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert data["hosts"] == ["web1", "web2"]
+
+    response = client.get("/api/v1/inventory/ansible-format", params={"pattern": "web1:db1"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["all"]["children"] == ["webservers", "dbservers"]
+    assert list(data["webservers"]["hosts"]) == ["web1"]
+    assert data["webservers"]["hosts"]["web1"]["http_port"] == "8080"
+
+    response = client.get("/api/v1/inventory/query", params={"pattern": "~("})
+    assert response.status_code == 400
+    response = client.get("/api/v1/inventory/query", params={"pattern": "~(\\w+)*x"})
+    assert response.status_code == 400
+    response = client.get("/api/v1/inventory/ansible-format", params={"pattern": "a," * 1000})
+    assert response.status_code == 422
@@ -0,0 +1,81 @@
+import pytest
+from sqlmodel import Session, select
+
+from app.services.host_service import HostService
+from app.schemas.inventory import HostCreate, HostUpdate
+from app.models.inventory import Group, HostGroupLink, HostVar
+
+
+def test_create_host_with_groups(session: Session, test_data):
+    """Testa a criação de um host já associado a grupos."""
+    group_id = test_data["groups"][0].id
+    host = HostService.create(
+        session=session,
+        host_create=HostCreate(hostname="web3", group_ids=[group_id])
+    )
+
+    assert host.id is not None
+    assert [g.id for g in host.groups] == [group_id]
+
+
+def test_update_replaces_groups(session: Session, test_data):
+    """Testa a substituição das associações de grupo na atualização."""
+    host_id = test_data["hosts"][0].id
+    new_group_id = test_data["groups"][1].id
+
+    HostService.update(session=session, host_id=host_id,
+                       host_update=HostUpdate(group_ids=[new_group_id]))
+
+    links = session.exec(select(HostGroupLink).where(
+        HostGroupLink.host_id == host_id)).all()
+    assert [link.group_id for link in links] == [new_group_id]
+
+
+def test_delete(session: Session, test_data):
+    """Testa a exclusão em lote de um host, suas variáveis e associações."""
+    host_id = test_data["hosts"][0].id
+
+    assert HostService.delete(session=session, host_id=host_id) is True
+
+    session.expire_all()
+    assert HostService.get_by_id(session=session, host_id=host_id) is None
+    assert session.exec(select(HostVar).where(
+        HostVar.host_id == host_id)).all() == []
+    assert session.exec(select(HostGroupLink).where(
+        HostGroupLink.host_id == host_id)).all() == []
+    # Os grupos não são afetados
+    assert session.get(Group, test_data["groups"][0].id) is not None
+
+
+def test_delete_nonexistent(session: Session):
+    """Testa a exclusão de um host inexistente."""
+    assert HostService.delete(session=session, host_id=9999) is False
+
+
+def test_get_with_details_loads_relationships(session: Session, test_data):
+    """Testa o carregamento antecipado de grupos e variáveis do host."""
+    from sqlalchemy.exc import InvalidRequestError
+    from app.models.inventory import Host
+
+    host_id = test_data["hosts"][0].id
+    session.expunge_all()
+
+    # Carregamentos preguiçosos falham nos testes (modo raiseload)
+    host = session.exec(select(Host).where(Host.id == host_id)).first()
+    with pytest.raises(InvalidRequestError):
+        host.groups
+
+    session.expunge_all()
+    host = HostService.get_with_details(session, host_id)
+    assert [group.name for group in host.groups] == ["webservers"]
+    assert {var.var_name for var in host.variables} == {"ansible_host", "http_port"}
+
+
+def test_get_all_with_fields(session: Session, test_data):
+    """Testa a projeção de colunas na listagem de hosts."""
+    group_id = test_data["groups"][0].id
+    hosts = HostService.get_by_group(session, group_id, fields=["id", "hostname"])
+    assert hosts == [
+        {"id": test_data["hosts"][0].id, "hostname": "web1"},
+        {"id": test_data["hosts"][1].id, "hostname": "web2"},
+    ]
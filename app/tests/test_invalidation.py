@@ -0,0 +1,99 @@
+import json
+import pytest
+from sqlmodel import Session
+
+from app.core import events
+from app.core.config import settings
+from app.core.invalidation import InvalidationBus
+from app.models.inventory import InventoryChange
+from app.services.host_service import HostService
+from app.services.inventory_graph_service import inventory_graph
+from app.schemas.inventory import HostCreate
+
+
+@pytest.fixture(name="received")
+def received_fixture():
+    received = []
+    events.subscribe(received.extend)
+    yield received
+    events.unsubscribe(received.extend)
+
+
+@pytest.fixture(name="bus")
+def bus_fixture(session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "INVALIDATION_BACKEND", "poll")
+    # Intervalo longo: o teste chama poll_once diretamente
+    monkeypatch.setattr(settings, "INVALIDATION_POLL_INTERVAL", 3600.0)
+    bus = InvalidationBus()
+    bus.start(session.get_bind())
+    yield bus
+    bus.stop()
+
+
+def _remote_write(session: Session, host_id: int) -> int:
+    """Simula uma escrita confirmada por outro worker (sem eventos locais)"""
+    change = InventoryChange(entity_type="host", entity_id=host_id, action="updated")
+    session.add(change)
+    session.commit()
+    return change.revision
+
+
+def test_resolve_backend(session: Session, monkeypatch):
+    """Testa a escolha do backend conforme o banco de dados."""
+    engine = session.get_bind()
+    monkeypatch.setattr(settings, "INVALIDATION_BACKEND", "auto")
+    assert InvalidationBus.resolve_backend(engine) == "poll"
+    monkeypatch.setattr(settings, "INVALIDATION_BACKEND", "notify")
+    assert InvalidationBus.resolve_backend(engine) == "poll"
+    monkeypatch.setattr(settings, "INVALIDATION_BACKEND", "none")
+    assert InvalidationBus.resolve_backend(engine) is None
+
+
+def test_poll_dispatches_only_remote_changes(session: Session, test_data, bus, received):
+    """Testa que o polling entrega apenas alterações de outros processos."""
+    HostService.create(session, HostCreate(hostname="local1"))
+    assert len(received) == 1
+
+    bus.poll_once()
+    assert len(received) == 1
+
+    revision = _remote_write(session, test_data["hosts"][0].id)
+    bus.poll_once()
+    assert [change["revision"] for change in received[1:]] == [revision]
+    assert received[-1]["group_ids"] is None
+
+    bus.poll_once()
+    assert len(received) == 2
+
+
+def test_remote_changes_refresh_graph(session: Session, test_data, bus):
+    """Testa que o grafo em memória reflete escritas de outros workers."""
+    host = test_data["hosts"][0]
+    inventory_graph.ensure_current(session)
+
+    host.hostname = "renamed"
+    session.add(host)
+    _remote_write(session, host.id)
+    assert inventory_graph.hosts[host.id].hostname == "web1"
+
+    bus.poll_once()
+    inventory_graph.ensure_current(session)
+    assert inventory_graph.hosts[host.id].hostname == "renamed"
+
+
+def test_notifications_ignore_own_origin(session: Session, test_data, received):
+    """Testa o tratamento das mensagens do NOTIFY."""
+    bus = InvalidationBus()
+    bus._engine = session.get_bind()
+    change = [7, "host", test_data["hosts"][0].id, None, "updated"]
+
+    bus.handle_notification(json.dumps({"origin": bus.origin, "changes": [change]}))
+    assert received == []
+
+    bus.handle_notification(json.dumps({"origin": "other", "changes": [change]}))
+    assert received[0]["revision"] == 7
+    assert received[0]["entity_type"] == "host"
+
+    revision = _remote_write(session, test_data["hosts"][1].id)
+    bus.handle_notification(json.dumps({"origin": "other", "range": [revision, revision]}))
+    assert received[-1]["entity_id"] == test_data["hosts"][1].id
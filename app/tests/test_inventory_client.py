@@ -0,0 +1,123 @@
+import gzip
+import importlib.util
+import io
+import json
+import os
+import urllib.error
+
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import make_etag
+
+_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "contrib", "ansible_inventory.py")
+_spec = importlib.util.spec_from_file_location("ansible_inventory", _SCRIPT)
+ansible_inventory = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ansible_inventory)
+
+
+class _Response(io.BytesIO):
+    def __init__(self, status, headers, content):
+        super().__init__(content)
+        self.status = status
+        self.headers = headers
+
+
+def _opener(client: TestClient, calls: list):
+    """Transporte do urllib sobre o TestClient (o corpo já vem descomprimido)"""
+    def open(request, timeout=None, context=None):
+        path = request.full_url.replace("http://testserver", "")
+        response = client.get(path, headers=dict(request.header_items()))
+        calls.append((path, response.status_code))
+        headers = response.headers.copy()
+        headers.pop("content-encoding", None)
+        if response.status_code >= 300:
+            raise urllib.error.HTTPError(request.full_url, response.status_code, "",
+                                         headers, io.BytesIO(response.content))
+        return _Response(response.status_code, headers, response.content)
+    return open
+
+
+def test_ansible_format_etag_and_gzip(client: TestClient, test_data, mock_auth):
+    """Testa a resposta 304 com If-None-Match e a compressão gzip."""
+    response = client.get("/api/v1/inventory/ansible-format")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    revision = int(response.headers["x-inventory-revision"])
+    assert etag == make_etag("ansible-format", revision, None, False)
+
+    response = client.get("/api/v1/inventory/ansible-format", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Corpo comprimido quando grande o suficiente
+    for index in range(20):
+        client.post("/api/v1/hosts/", json={"hostname": f"extra{index}.example.com",
+                                            "ansible_host": f"10.1.0.{index}"})
+    response = client.get("/api/v1/inventory/ansible-format",
+                          headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "extra0.example.com" in response.json()["ungrouped"]["hosts"]
+
+
+def test_ansible_format_delta(client: TestClient, test_data, mock_auth):
+    """Testa o delta com apenas os grupos alterados."""
+    client.post("/api/v1/hosts/", json={"hostname": "app1", "ansible_host": "10.0.0.20"})
+    base = client.get("/api/v1/inventory/ansible-format")
+    revision = int(base.headers["x-inventory-revision"])
+    webservers = test_data["groups"][0]
+
+    client.post("/api/v1/group-vars/", json={
+        "var_name": "tier", "var_value": "front", "group_id": webservers.id})
+    delta = client.get(f"/api/v1/inventory/ansible-format/delta?since={revision}").json()
+    assert delta["full"] is False
+    assert list(delta["groups"]) == ["webservers"]
+    assert delta["groups"]["webservers"]["vars"]["tier"] == "front"
+
+    merged = ansible_inventory.apply_delta(base.json(), delta)
+    assert merged == client.get("/api/v1/inventory/ansible-format").json()
+
+    # A exclusão de um host não permite calcular o delta por grupo
+    client.delete(f"/api/v1/hosts/{test_data['hosts'][0].id}")
+    delta = client.get(f"/api/v1/inventory/ansible-format/delta?since={revision}").json()
+    assert delta["full"] is True
+    assert ansible_inventory.apply_delta(base.json(), delta) == client.get(
+        "/api/v1/inventory/ansible-format").json()
+
+
+def test_inventory_client_cache(client: TestClient, test_data, mock_auth, tmp_path):
+    """Testa o cliente: carga completa, 304 no inventário inalterado e delta."""
+    calls = []
+    inventory_client = ansible_inventory.InventoryClient(
+        base_url="http://testserver/api/v1", token="token",
+        cache_path=str(tmp_path / "cache.json"), opener=_opener(client, calls))
+
+    first = inventory_client.get_inventory()
+    assert calls[-1] == ("/api/v1/inventory/ansible-format", 200)
+
+    assert inventory_client.get_inventory() == first
+    assert calls[-1] == ("/api/v1/inventory/ansible-format/delta?since=0", 304)
+
+    client.post("/api/v1/hosts/", json={"hostname": "new.example.com",
+                                        "ansible_host": "10.0.0.50"})
+    updated = inventory_client.get_inventory()
+    assert calls[-1][0].startswith("/api/v1/inventory/ansible-format/delta")
+    assert "new.example.com" in updated["ungrouped"]["hosts"]
+
+    script = ansible_inventory.to_script_format(updated)
+    assert "web1" in script["webservers"]["hosts"]
+    assert script["_meta"]["hostvars"]["web1"]["ansible_host"] == "192.168.1.10"
+
+
+def test_inventory_client_uses_stale_cache_when_offline(tmp_path):
+    """Testa o uso do cache quando a API está indisponível."""
+    def offline(request, timeout=None, context=None):
+        raise urllib.error.URLError("offline")
+
+    inventory_client = ansible_inventory.InventoryClient(
+        base_url="http://inventory.invalid/api/v1", cache_path=str(tmp_path / "cache.json"),
+        opener=offline)
+    inventory = {"all": {"children": ["ungrouped"]},
+                 "ungrouped": {"hosts": {"a": {"ansible_host": "10.0.0.1"}}, "vars": {}}}
+    inventory_client.save_cache(inventory, 3, 'W/"x"')
+    assert inventory_client.get_inventory() == inventory
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.services.inventory_graph_service import inventory_graph
+
+
+def _read_all(client: TestClient, test_data):
+    group_id = test_data["groups"][0].id
+    host_id = test_data["hosts"][0].id
+    return [
+        client.get("/api/v1/hosts/").json(),
+        client.get(f"/api/v1/hosts/?group_id={group_id}").json(),
+        client.get("/api/v1/hosts/?var_name=http_port&var_value=8080").json(),
+        client.get(f"/api/v1/hosts/{host_id}").json(),
+        client.get("/api/v1/groups/").json(),
+        client.get(f"/api/v1/groups/{group_id}").json(),
+        client.get("/api/v1/inventory/ansible-format").json(),
+    ]
+
+
+@pytest.fixture(name="graph_enabled")
+def graph_enabled_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "INVENTORY_GRAPH_ENABLED", True)
+
+
+def test_graph_matches_database(client: TestClient, test_data, mock_auth, monkeypatch):
+    """Testa que as leituras pelo grafo são idênticas às leituras pelo banco."""
+    # Criar um subgrupo para exercitar a árvore de grupos
+    response = client.post("/api/v1/groups/", json={
+        "name": "frontend", "parent_group_id": test_data["groups"][0].id})
+    assert response.status_code == 201
+
+    from_database = _read_all(client, test_data)
+    monkeypatch.setattr(settings, "INVENTORY_GRAPH_ENABLED", True)
+    assert _read_all(client, test_data) == from_database
+
+
+def test_graph_follows_writes(client: TestClient, test_data, mock_auth, graph_enabled):
+    """Testa que as escritas confirmadas são refletidas na leitura seguinte."""
+    group_id = test_data["groups"][1].id
+    assert len(client.get("/api/v1/hosts/").json()) == 3
+
+    response = client.post("/api/v1/hosts/", json={
+        "hostname": "db2", "ansible_host": "192.168.1.21", "group_ids": [group_id]})
+    host_id = response.json()["id"]
+    client.put(f"/api/v1/hosts/{host_id}/vars", json={"role": "replica"})
+
+    data = client.get(f"/api/v1/groups/{group_id}").json()
+    assert [host["hostname"] for host in data["hosts"]] == ["db1", "db2"]
+    assert client.get(f"/api/v1/hosts/{host_id}").json()["variables"][0]["var_value"] == "replica"
+
+    client.delete(f"/api/v1/groups/{group_id}")
+    assert client.get(f"/api/v1/groups/{group_id}").status_code == 404
+    assert client.get(f"/api/v1/hosts/{host_id}").json()["groups"] == []
+
+    client.delete(f"/api/v1/hosts/{host_id}")
+    assert client.get(f"/api/v1/hosts/{host_id}").status_code == 404
+    assert "db2" not in client.get("/api/v1/inventory/ansible-format").json()["ungrouped"]["hosts"]
+
+
+def test_graph_reads_without_queries(session: Session, client: TestClient, test_data, graph_enabled,
+                                    assert_max_queries):
+    """Testa que, com o grafo atualizado, as leituras não acessam o banco."""
+    client.get("/api/v1/hosts/")
+
+    with assert_max_queries(0):
+        client.get("/api/v1/hosts/")
+        client.get(f"/api/v1/groups/{test_data['groups'][0].id}")
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core import auth
+from app.db.session import get_session
+from app.main import app
+from app.models.inventory import Group, Host
+from benchmarks.datagen import InventorySpec, _advance_sequences, generate_inventory
+from loadtest.driver import LoadDriver, parse_mix, percentile
+from loadtest.keycloak_stub import create_stub_app
+
+
+def test_percentile_nearest_rank():
+    """Testa o percentil pelo posto mais próximo."""
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([7.0], 0.95) == 7.0
+    assert percentile([], 0.5) == 0.0
+    assert parse_mix("export=2,list=1") == {"export": 2.0, "list": 1.0}
+
+
+def test_datagen_advances_postgresql_sequences():
+    """Testa o ajuste das sequências de IDs após a inserção no PostgreSQL."""
+    class FakeSession:
+        def __init__(self, dialect):
+            self.dialect = dialect
+            self.executed = []
+
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name=self.dialect))
+
+        def execute(self, statement):
+            self.executed.append(str(statement))
+
+    sqlite = FakeSession("sqlite")
+    _advance_sequences(sqlite, (Group, Host))
+    assert sqlite.executed == []
+
+    postgresql = FakeSession("postgresql")
+    _advance_sequences(postgresql, (Group, Host))
+    assert postgresql.executed == [
+        "SELECT setval(pg_get_serial_sequence('groups', 'id'), (SELECT max(id) FROM groups))",
+        "SELECT setval(pg_get_serial_sequence('hosts', 'id'), (SELECT max(id) FROM hosts))",
+    ]
+
+
+def test_keycloak_stub_tokens_are_accepted(client: TestClient, monkeypatch):
+    """Testa que os tokens do Keycloak simulado passam pela validação da API."""
+    stub = TestClient(create_stub_app(realm="load", password="secret"))
+    public_key = stub.get("/realms/load").json()["public_key"]
+    monkeypatch.setattr(auth, "keycloak_public_key",
+                        f"-----BEGIN PUBLIC KEY-----\n{public_key}\n-----END PUBLIC KEY-----")
+    monkeypatch.setattr(auth, "keycloak_public_key_expiry", float("inf"))
+
+    token_url = "/realms/load/protocol/openid-connect/token"
+    assert stub.post(token_url, data={"grant_type": "password", "username": "admin1",
+                                      "password": "wrong"}).status_code == 401
+    tokens = stub.post(token_url, data={"grant_type": "password", "username": "admin1",
+                                        "password": "secret"}).json()
+    response = client.get("/api/v1/me",
+                          headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200
+    assert response.json()["username"] == "admin1"
+    assert "admin" in response.json()["roles"]
+
+    refreshed = stub.post(token_url, data={"grant_type": "refresh_token",
+                                           "refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+
+
+def test_load_driver_reports_per_route(session: Session, mock_auth):
+    """Testa uma execução curta do driver contra a aplicação em processo."""
+    generated = generate_inventory(session, InventorySpec(hosts=50, groups=5, depth=2))
+    engine = session.get_bind()
+
+    def get_session_override():
+        with Session(engine) as request_session:
+            yield request_session
+
+    app.dependency_overrides[get_session] = get_session_override
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as client:
+            driver = LoadDriver(client, parse_mix("export=1,list=2,detail=2,write=1"))
+            driver.host_ids = generated["host_ids"]
+            driver.group_ids = generated["group_ids"]
+            return await driver.run(concurrency=4, duration=0.5)
+
+    try:
+        report = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert "GET /hosts/{id}" in report["routes"]
+    route = report["routes"]["GET /inventory/ansible-format"]
+    assert route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"]
@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import Histogram, Registry
+
+
+@pytest.fixture(name="metrics_enabled")
+def metrics_enabled_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+
+
+def test_histogram_exposition():
+    """Testa o formato de exposição de um histograma com rótulos."""
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latência", ("route",), (0.1, 1.0)))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(3.0, "/a")
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latência", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.55' in lines
+
+
+def test_metrics_endpoint(client: TestClient, test_data, mock_auth, metrics_enabled):
+    """Testa as métricas por rota, de banco e de exportação."""
+    route = "/api/v1/hosts/{host_id}"
+    before = metrics.http_requests.value("GET", route, "200")
+    queries_before = metrics.db_queries_per_request.count(route)
+    host_id = test_data["hosts"][0].id
+    assert client.get(f"/api/v1/hosts/{host_id}").status_code == 200
+    assert client.get("/api/v1/inventory/ansible-format").status_code == 200
+
+    assert metrics.http_requests.value("GET", route, "200") == before + 1
+    assert metrics.db_queries_per_request.count(route) == queries_before + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/hosts/{host_id}"}' in body
+    assert 'db_queries_per_request_bucket{route="/api/v1/hosts/{host_id}"' in body
+    assert 'db_pool_connections{state="checked_out"}' in body
+    assert 'cache_requests_total{cache="response",result="hit"}' in body
+    assert 'inventory_export_build_seconds_count{source="db"}' in body
+    assert 'inventory_export_bytes_count{kind="ansible-format"}' in body
+    assert 'http_requests_in_flight{method="GET"}' in body
+
+
+def test_metrics_disabled(client: TestClient):
+    """Testa que o endpoint não é exposto com as métricas desativadas."""
+    assert client.get("/metrics").status_code == 404
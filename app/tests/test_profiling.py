@@ -0,0 +1,120 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import auth
+from app.core.profiling import PROFILE_ID_HEADER, Sampler, parse_profile_header, profiler
+from benchmarks.tokens import generate_keypair, make_token, public_key_pem
+
+
+@pytest.fixture(name="tokens", scope="module")
+def tokens_fixture():
+    private_key, public_key = generate_keypair()
+    return {
+        "public_key": public_key_pem(public_key),
+        "admin": make_token(private_key, "admin1", ["admin"]),
+        "reader": make_token(private_key, "reader1", ["reader"]),
+    }
+
+
+@pytest.fixture(autouse=True)
+def keycloak_key(tokens, monkeypatch):
+    monkeypatch.setattr(auth, "keycloak_public_key", tokens["public_key"])
+    monkeypatch.setattr(auth, "keycloak_public_key_expiry", float("inf"))
+    monkeypatch.setattr(profiler, "enabled", True)
+    monkeypatch.setattr(profiler, "sample_interval", 0.001)
+
+
+def _busy(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def test_sampler_folded_output():
+    """Testa as pilhas no formato folded (raiz;...;folha contagem)."""
+    sampler = Sampler(0.001)
+    sampler.start()
+    _busy(0.1)
+    sampler.stop()
+
+    assert sampler.samples > 0
+    lines = sampler.folded().splitlines()
+    busy = [line for line in lines if "_busy (tests/test_profiling.py:" in line]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.index("test_sampler_folded_output") < stack.index("_busy")
+
+
+def test_parse_profile_header():
+    assert parse_profile_header("1") == {"cpu": True, "memory": False}
+    assert parse_profile_header("cpu, memory") == {"cpu": True, "memory": True}
+    assert parse_profile_header("memory") == {"cpu": False, "memory": True}
+
+
+def test_profile_request(client: TestClient, test_data, tokens):
+    """Testa a captura de uma requisição com perfis de CPU e memória."""
+    headers = {"Authorization": f"Bearer {tokens['admin']}", "X-Profile": "cpu,memory"}
+    response = client.get("/api/v1/inventory/ansible-format", headers=headers)
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    admin = {"Authorization": f"Bearer {tokens['admin']}"}
+    summary = client.get(f"/api/v1/profiling/profiles/{profile_id}", headers=admin).json()
+    assert summary["path"] == "/api/v1/inventory/ansible-format"
+    assert summary["status"] == 200
+    assert summary["cpu"] and summary["memory"]
+    report = summary["memory_reports"][0]
+    assert report["call"] == "InventoryService.export_ansible_inventory"
+    assert report["peak_bytes"] >= 0 and report["top"]
+
+    response = client.get(f"/api/v1/profiling/profiles/{profile_id}/folded", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert profile_id in client.get("/api/v1/profiling/", headers=admin).json()["profiles"]
+
+
+def test_nested_memory_trace(client: TestClient, test_data, tokens):
+    """Testa que a exportação chamada pelo delta não gera relatório aninhado."""
+    headers = {"Authorization": f"Bearer {tokens['admin']}", "X-Profile": "memory"}
+    response = client.get("/api/v1/inventory/ansible-format/delta?since=0", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["full"] is True
+
+    admin = {"Authorization": f"Bearer {tokens['admin']}"}
+    summary = client.get(f"/api/v1/profiling/profiles/{response.headers[PROFILE_ID_HEADER]}",
+                         headers=admin).json()
+    assert [report["call"] for report in summary["memory_reports"]] == [
+        "InventoryService.export_delta"]
+    assert summary["memory_reports"][0]["peak_bytes"] > 0
+
+
+def test_profile_requires_admin(client: TestClient, test_data, tokens):
+    """Testa que o cabeçalho X-Profile é ignorado sem papel de administrador."""
+    for token in (tokens["reader"], None):
+        headers = {"X-Profile": "cpu"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        response = client.get("/api/v1/inventory/ansible-format", headers=headers)
+        assert PROFILE_ID_HEADER not in response.headers
+
+    response = client.get("/api/v1/profiling/",
+                          headers={"Authorization": f"Bearer {tokens['reader']}"})
+    assert response.status_code == 403
+
+
+def test_toggle_at_runtime(client: TestClient, test_data, tokens):
+    """Testa desligar e religar a captura sem reiniciar."""
+    admin = {"Authorization": f"Bearer {tokens['admin']}"}
+    response = client.put("/api/v1/profiling/", json={"enabled": False}, headers=admin)
+    assert response.json()["enabled"] is False
+    response = client.get("/api/v1/inventory/ansible-format", headers={**admin, "X-Profile": "cpu"})
+    assert PROFILE_ID_HEADER not in response.headers
+
+    client.put("/api/v1/profiling/", json={"enabled": True, "sample_interval_ms": 2}, headers=admin)
+    assert profiler.sample_interval == 0.002
+    response = client.get("/api/v1/inventory/ansible-format", headers={**admin, "X-Profile": "cpu"})
+    assert PROFILE_ID_HEADER in response.headers
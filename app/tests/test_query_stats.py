@@ -0,0 +1,79 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core import query_stats
+from app.core.config import settings
+from app.models.inventory import Host
+
+
+@pytest.fixture(name="query_stats_enabled")
+def query_stats_enabled_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_STATS_ENABLED", True)
+
+
+def test_query_count_headers(client: TestClient, test_data, mock_auth, query_stats_enabled):
+    """Testa os cabeçalhos com a contagem e o tempo das consultas SQL."""
+    response = client.get("/api/v1/hosts/")
+    assert response.status_code == 200
+    assert int(response.headers[query_stats.QUERY_COUNT_HEADER]) > 0
+    assert float(response.headers[query_stats.QUERY_TIME_HEADER]) >= 0
+
+
+def test_query_stats_disabled(client: TestClient, test_data, mock_auth):
+    """Testa que, desativada, a contagem não adiciona cabeçalhos à resposta."""
+    response = client.get("/api/v1/hosts/")
+    assert query_stats.QUERY_COUNT_HEADER not in response.headers
+
+
+def test_repeated_statements(session: Session, test_data):
+    """Testa a detecção de consultas repetidas (padrão N+1)."""
+    host_ids = [host.id for host in test_data["hosts"]]
+    with query_stats.request_scope() as stats:
+        for host_id in host_ids:
+            session.exec(select(Host).where(Host.id == host_id)).one()
+        session.exec(select(Host)).all()
+
+    assert stats.queries == len(host_ids) + 1
+    repeated = stats.repeated(len(host_ids))
+    assert len(repeated) == 1
+    assert repeated[0][1] == len(host_ids)
+    assert stats.repeated(len(host_ids) + 1) == []
+
+
+def test_n_plus_one_warning(client: TestClient, test_data, mock_auth, query_stats_enabled,
+                            monkeypatch, caplog):
+    """Testa o alerta de N+1 para consultas repetidas a partir do limite."""
+    monkeypatch.setattr(settings, "QUERY_STATS_N_PLUS_ONE_THRESHOLD", 1)
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        client.get("/api/v1/hosts/")
+    assert any("N+1 em GET /api/v1/hosts/" in record.message for record in caplog.records)
+
+
+def test_assert_max_queries(client: TestClient, test_data, mock_auth, assert_max_queries):
+    """Testa o fixture que limita o número de consultas de um bloco."""
+    with assert_max_queries(10) as stats:
+        client.get("/api/v1/hosts/")
+    assert stats.queries > 0
+
+    with pytest.raises(AssertionError, match="consultas SQL"):
+        with assert_max_queries(0):
+            client.get("/api/v1/hosts/")
+
+
+
+def test_hooks_skip_timing_when_unused(session: Session, monkeypatch):
+    """Testa que os eventos só medem as consultas quando alguém usa a medição."""
+    observed, enabled = [], [False]
+    monkeypatch.setattr(query_stats, "_observers", [
+        (lambda statement, elapsed: observed.append(statement), lambda: enabled[0])])
+    assert not query_stats._is_needed()
+    session.exec(select(Host)).all()
+    assert observed == []
+
+    enabled[0] = True
+    assert query_stats._is_needed()
+    session.exec(select(Host)).all()
+    assert len(observed) == 1
@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.response_cache import response_cache, tags_for_change
+
+
+@pytest.fixture(name="cache_enabled")
+def cache_enabled_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SIZE", 100)
+
+
+def test_tags_for_change():
+    """Testa as tags invalidadas por tipo de alteração."""
+    assert tags_for_change({"entity_type": "host_var", "entity_id": 5, "related_id": 1}) == [
+        ("host_vars", 1), ("host_vars",)]
+    assert tags_for_change({"entity_type": "membership", "entity_id": 1, "related_id": 2}) == [
+        ("host", 1), ("group", 2)]
+
+
+def test_cached_responses_are_invalidated_per_entity(client: TestClient, test_data, cache_enabled):
+    """Testa que apenas as respostas que incluem a entidade alterada são removidas."""
+    web1, db1 = test_data["hosts"][0], test_data["hosts"][2]
+    webservers = test_data["groups"][0]
+    urls = [f"/api/v1/hosts/{web1.id}", f"/api/v1/hosts/{db1.id}",
+            f"/api/v1/groups/{webservers.id}", "/api/v1/groups/"]
+    first = [client.get(url).json() for url in urls]
+    assert [client.get(url).json() for url in urls] == first
+    assert response_cache.hits == len(urls)
+    assert len(response_cache) == len(urls)
+
+    # Variável de web1: afeta o detalhe de web1, mas não os demais
+    response = client.post("/api/v1/host-vars/", json={
+        "var_name": "role", "var_value": "frontend", "host_id": web1.id})
+    assert response.status_code == 201
+    assert len(response_cache) == 3
+
+    variables = client.get(f"/api/v1/hosts/{web1.id}").json()["variables"]
+    assert "role" in [variable["var_name"] for variable in variables]
+
+    # Novo host no grupo: afeta o detalhe do grupo e a lista de hosts
+    client.get("/api/v1/hosts/")
+    client.post("/api/v1/hosts/", json={"hostname": "web3", "group_ids": [webservers.id]})
+    hosts = client.get(f"/api/v1/groups/{webservers.id}").json()["hosts"]
+    assert [host["hostname"] for host in hosts] == ["web1", "web2", "web3"]
+    assert len(client.get("/api/v1/hosts/").json()) == 4
+
+
+def test_cache_is_bounded(client: TestClient, test_data, monkeypatch):
+    """Testa a remoção das entradas menos usadas quando o limite é atingido."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SIZE", 2)
+    for host in test_data["hosts"]:
+        client.get(f"/api/v1/hosts/{host.id}")
+    assert len(response_cache) == 2
+    assert client.get(f"/api/v1/hosts/{test_data['hosts'][0].id}").status_code == 200
+    assert client.get("/api/v1/hosts/999999").status_code == 404
+    assert len(response_cache) == 2
+
+
+def test_roles_resolved_only_with_cache(client: TestClient, test_data, monkeypatch):
+    """Testa que o token só é validado quando o cache de respostas está ativo."""
+    from app.core import response_cache as module
+
+    calls = []
+
+    async def fake_optional_user(token):
+        calls.append(token)
+        return None
+
+    monkeypatch.setattr(module, "get_optional_user", fake_optional_user)
+    headers = {"Authorization": "Bearer qualquer"}
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SIZE", 0)
+    assert client.get("/api/v1/hosts/", headers=headers).status_code == 200
+    assert calls == []
+
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SIZE", 100)
+    assert client.get("/api/v1/hosts/", headers=headers).status_code == 200
+    assert calls == ["qualquer"]
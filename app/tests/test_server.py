@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+from sqlmodel import create_engine
+
+from app import server
+from app.core.config import settings
+from app.db import session as db_session
+
+
+def test_resolve_auto_options(monkeypatch):
+    """Testa a escolha de uvloop/httptools e do gunicorn conforme os pacotes instalados."""
+    monkeypatch.setattr(server, "_installed", lambda module: True)
+    assert server.resolve_loop("auto") == "uvloop"
+    assert server.resolve_http("auto") == "httptools"
+    if os.name != "nt":
+        assert server.resolve_backend("auto") == "gunicorn"
+
+    monkeypatch.setattr(server, "_installed", lambda module: False)
+    assert server.resolve_loop("auto") == "asyncio"
+    assert server.resolve_http("auto") == "h11"
+    assert server.resolve_backend("auto") == "uvicorn"
+    assert server.resolve_loop("asyncio") == "asyncio"
+
+    with pytest.raises(ValueError):
+        server.resolve_backend("hypercorn")
+
+
+def test_gunicorn_config_from_settings(monkeypatch):
+    """Testa a configuração do gunicorn montada a partir de Settings."""
+    monkeypatch.setattr(settings, "SERVER_BACKEND", "gunicorn")
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 0)
+    monkeypatch.setattr(settings, "SERVER_PORT", 9000)
+    monkeypatch.setattr(settings, "SERVER_KEEPALIVE", 75)
+    monkeypatch.setattr(settings, "SERVER_MAX_REQUESTS", 10000)
+    options = server.server_options()
+    assert options["workers"] == (os.cpu_count() or 1)
+
+    config = server.gunicorn_config(options)
+    assert config["bind"] == "0.0.0.0:9000"
+    assert config["keepalive"] == 75
+    assert config["max_requests"] == 10000
+    assert config["preload_app"] is settings.SERVER_PRELOAD
+    assert callable(config["post_fork"])
+
+
+def test_print_config(capsys, monkeypatch):
+    """Testa a opção --print-config, que mostra a configuração efetiva sem iniciar o servidor."""
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 3)
+    server.main(["--print-config"])
+    assert json.loads(capsys.readouterr().out)["workers"] == 3
+
+
+def test_reset_engine_after_fork(monkeypatch):
+    """Testa que o processo filho descarta o pool de conexões herdado."""
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(db_session, "_engine", engine)
+    with engine.connect():
+        pass
+    pool = engine.pool
+    db_session.reset_engine_after_fork()
+    assert engine.pool is not pool
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requer os.fork")
+def test_fork_resets_engine(monkeypatch):
+    """Testa que um os.fork real troca o pool no filho e preserva o do pai."""
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(db_session, "_engine", engine)
+    parent_pool_id = id(engine.pool)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, str(id(engine.pool)).encode())
+        os._exit(0)
+    os.close(write_fd)
+    child_pool_id = int(os.read(read_fd, 64))
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    assert child_pool_id != parent_pool_id
+    assert id(engine.pool) == parent_pool_id
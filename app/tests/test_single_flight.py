@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from sqlmodel import Session
+
+from app.core import single_flight
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
+from app.db.session import get_session
+from app.main import app
+from app.services.inventory_service import InventoryService
+
+
+def test_single_flight_shares_result():
+    """Testa que chamadas simultâneas com a mesma chave executam a função uma vez."""
+    flight = SingleFlight("test")
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return value * 2
+
+    async def scenario():
+        same = [flight.do("a", lambda: work(1)) for _ in range(10)]
+        other = flight.do("b", lambda: work(2))
+        return await asyncio.gather(*same, other)
+
+    results = asyncio.run(scenario())
+    assert results == [2] * 10 + [4]
+    assert sorted(calls) == [1, 2]
+    assert (flight.executions, flight.shared, flight.in_flight()) == (2, 9, 0)
+    single_flight.flights.remove(flight)
+
+
+def test_single_flight_shares_errors():
+    """Testa que a exceção da chamada compartilhada chega a todos e não é guardada."""
+    flight = SingleFlight("test")
+
+    def fail():
+        time.sleep(0.05)
+        raise ValueError("falha")
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("a", fail) for _ in range(3)],
+                                    return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.executions == 1
+    # Nada fica guardado: a próxima chamada executa de novo
+    assert asyncio.run(flight.do("a", lambda: 1)) == 1
+    single_flight.flights.remove(flight)
+
+
+@pytest.fixture(name="slow_export")
+def slow_export_fixture(monkeypatch, engine):
+    """Exportação lenta que conta as montagens"""
+    builds = []
+    lock = threading.Lock()
+    original = InventoryService.export_ansible_inventory
+
+    def export(*args, **kwargs):
+        with lock:
+            builds.append(kwargs.get("decrypt_vault"))
+        time.sleep(0.2)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(InventoryService, "export_ansible_inventory", staticmethod(export))
+
+    # Uma sessão por requisição, como em produção
+    def session_per_request():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_per_request
+    yield builds
+    app.dependency_overrides.pop(get_session, None)
+
+
+def _concurrent_get(count: int, headers=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.get("/api/v1/inventory/ansible-format", headers=headers or {})
+                for _ in range(count)])
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_exports_coalesced(test_data, mock_auth, slow_export):
+    """Testa que uma rajada de exportações idênticas custa uma única montagem."""
+    responses = _concurrent_get(20)
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.content for response in responses}) == 1
+    assert len(slow_export) == 1
+    assert "web1" in responses[0].json()["webservers"]["hosts"]
+
+
+def test_coalescing_disabled(test_data, mock_auth, slow_export, monkeypatch):
+    """Testa que, com SINGLE_FLIGHT_ENABLED desligado, cada requisição monta a exportação."""
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", False)
+    _concurrent_get(3)
+    assert len(slow_export) == 3
+
+
+def test_coalescing_by_encoding(test_data, mock_auth, slow_export):
+    """Testa que respostas com codificações diferentes não são compartilhadas."""
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                client.get("/api/v1/inventory/ansible-format",
+                           headers={"Accept-Encoding": "gzip"}),
+                client.get("/api/v1/inventory/ansible-format",
+                           headers={"Accept-Encoding": "identity"}),
+                client.get("/api/v1/inventory/ansible-format?pattern=webservers"))
+
+    responses = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    assert len(slow_export) == 3
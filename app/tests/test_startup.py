@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core.config import settings
+
+
+def _run_lifespan(monkeypatch, engine, mode: str):
+    calls = []
+    monkeypatch.setattr(settings, "STARTUP_MODE", mode)
+    monkeypatch.setattr(main, "get_engine", lambda: engine)
+    monkeypatch.setattr(main, "init_db", lambda: calls.append("init_db"))
+    monkeypatch.setattr(main, "warm_caches", lambda: calls.append("warm_caches"))
+    with TestClient(main.app):
+        pass
+    return calls
+
+
+def test_development_startup_creates_tables(monkeypatch, engine):
+    """Testa que o modo "development" cria as tabelas na inicialização, sem aquecimento."""
+    assert _run_lifespan(monkeypatch, engine, "development") == ["init_db"]
+
+
+def test_production_startup_skips_ddl(monkeypatch, engine):
+    """Testa que o modo "production" não executa DDL e aquece os caches em segundo plano."""
+    calls = _run_lifespan(monkeypatch, engine, "production")
+    for thread in main.threading.enumerate():
+        if thread.name == "cache-warmup":
+            thread.join(timeout=5)
+    assert calls == ["warm_caches"]
+
+
+def test_import_is_lazy():
+    """Testa que importar a aplicação não cria o engine nem carrega requests e jose."""
+    probe = ("import sys, app.main, app.db.session as session; "
+             "print(session._engine is None, 'requests' in sys.modules, 'jose' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True,
+                            text=True, check=True).stdout
+    assert output.split() == ["True", "False", "False"]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import pytest
+from sqlmodel import Session
+
+from app.core import events
+from app.core.subscriptions import SubscriptionBroker, LAGGED
+from app.services.group_service import GroupService
+from app.services.host_service import HostService
+from app.schemas.inventory import GroupCreate, HostCreate
+
+
+def _change(revision, entity_type="host", entity_id=1, group_ids=None, action="updated"):
+    return {"revision": revision, "entity_type": entity_type, "entity_id": entity_id,
+            "related_id": None, "action": action, "group_ids": group_ids}
+
+
+def test_commit_dispatches_changes(session: Session):
+    """Testa que as alterações são notificadas somente após o commit."""
+    received = []
+    events.subscribe(received.extend)
+    try:
+        group = GroupService.create(session, GroupCreate(name="web"))
+        HostService.create(session, HostCreate(hostname="web1", group_ids=[group.id]))
+    finally:
+        events.unsubscribe(received.extend)
+
+    assert [(c["entity_type"], c["action"]) for c in received] == [
+        ("group", "created"), ("host", "created"), ("membership", "created")]
+    assert all(c["revision"] for c in received)
+
+
+def test_broker_delivers_from_other_threads():
+    """Testa a entrega de notificações publicadas por outra thread."""
+    async def scenario():
+        broker = SubscriptionBroker()
+        subscription = broker.subscribe()
+        thread = threading.Thread(target=broker.publish, args=([_change(1)],))
+        thread.start()
+        thread.join()
+        change = await asyncio.wait_for(subscription.get(), timeout=1)
+        broker.unsubscribe(subscription)
+        return change
+
+    assert asyncio.run(scenario())["revision"] == 1
+
+
+def test_group_filter_and_subtree_growth():
+    """Testa o filtro por subárvore de grupos, incluindo subgrupos criados depois."""
+    async def scenario():
+        broker = SubscriptionBroker()
+        subscription = broker.subscribe({10})
+        subscription.deliver([
+            _change(1, group_ids=[20]),
+            _change(2, entity_type="group", entity_id=11, group_ids=[11, 10], action="created"),
+            _change(3, group_ids=[11]),
+        ])
+        received = [subscription.queue.get_nowait()["revision"]
+                    for _ in range(subscription.queue.qsize())]
+        broker.unsubscribe(subscription)
+        return received
+
+    assert asyncio.run(scenario()) == [2, 3]
+    assert not events.needs_group_scope()
+
+
+def test_slow_consumer_receives_lagged_marker(monkeypatch):
+    """Testa que um buffer cheio é substituído pelo marcador de atraso."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "EVENTS_SUBSCRIBER_BUFFER", 2)
+
+    async def scenario():
+        broker = SubscriptionBroker()
+        subscription = broker.subscribe()
+        subscription.deliver([_change(revision) for revision in range(1, 6)])
+        first = await subscription.get()
+        subscription.deliver([_change(6)])
+        second = await subscription.get()
+        broker.unsubscribe(subscription)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is LAGGED
+    assert second["revision"] == 6
@@ -0,0 +1,115 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.services.host_service import HostService
+from app.services.host_var_service import HostVarService
+from app.services.var_document_service import ANY_VALUE, VarDocumentService, coerce_var_value
+from app.schemas.inventory import HostVarCreate, HostVarUpdate
+
+
+@pytest.fixture(name="json_mode")
+def json_mode_fixture(session: Session, monkeypatch):
+    """Ativa o modo de armazenamento JSON e reconstrói os documentos."""
+    monkeypatch.setattr(settings, "VARS_STORAGE_MODE", "json")
+    VarDocumentService.rebuild(session)
+
+
+def test_coerce_var_value():
+    """Testa a conversão dos valores textuais para tipos JSON."""
+    assert coerce_var_value("80") == 80
+    assert coerce_var_value("true") is True
+    assert coerce_var_value('["a", "b"]') == ["a", "b"]
+    assert coerce_var_value("192.168.1.10") == "192.168.1.10"
+    assert coerce_var_value("80", is_encrypted=True) == "80"
+
+
+def test_export_typed_values(client: TestClient, test_data, mock_auth, json_mode):
+    """Testa a exportação lendo os documentos JSON tipados."""
+    response = client.get("/api/v1/inventory/ansible-format")
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["webservers"]["vars"]["http_port"] == 80
+    assert data["webservers"]["vars"]["ansible_user"] == "admin"
+    assert data["webservers"]["hosts"]["web1"]["http_port"] == 8080
+
+
+def test_write_paths_keep_document_in_sync(session: Session, test_data, json_mode):
+    """Testa que criação, renomeação e exclusão atualizam o documento."""
+    host_id = test_data["hosts"][1].id
+    var = HostVarService.create(session, HostVarCreate(
+        var_name="ports", var_value="[80, 443]", host_id=host_id))
+    assert VarDocumentService.get_host_vars(session, [host_id])[host_id] == {
+        "ports": [80, 443]}
+
+    HostVarService.update(session, var.id, HostVarUpdate(var_name="listen_ports"))
+    assert VarDocumentService.get_host_vars(session, [host_id])[host_id] == {
+        "listen_ports": [80, 443]}
+
+    HostVarService.delete(session, var.id)
+    assert VarDocumentService.get_host_vars(session, [host_id])[host_id] == {}
+
+
+def test_get_by_var(session: Session, test_data, json_mode):
+    """Testa a busca de hosts por chave e valor no documento."""
+    hosts = HostService.get_by_var(session, var_name="http_port", var_value="8080")
+    assert [h.hostname for h in hosts] == ["web1"]
+    assert HostService.get_by_var(session, var_name="http_port", var_value="80") == []
+
+
+def test_get_by_var_quoted_name(session: Session, test_data, json_mode):
+    """Testa a busca por uma variável cujo nome contém aspas."""
+    host_id = test_data["hosts"][0].id
+    HostVarService.create(session, HostVarCreate(host_id=host_id, var_name='a"b', var_value="1"))
+    assert VarDocumentService.find_host_ids_by_var(session, 'a"b') == [host_id]
+    assert VarDocumentService.find_host_ids_by_var(session, 'a"b', 1) == [host_id]
+
+
+def test_get_by_var_structured_values(client: TestClient, test_data, json_mode):
+    """Testa a busca por listas (comparação exata) e por null pela API."""
+    web1, web2, db1 = (host.id for host in test_data["hosts"])
+    for host_id, value in ((web1, "[80, 443]"), (web2, "[80, 443, 8080]"), (db1, "null")):
+        response = client.post("/api/v1/host-vars/", json={
+            "host_id": host_id, "var_name": "ports", "var_value": value})
+        assert response.status_code == 201
+
+    response = client.get("/api/v1/hosts/", params={"var_name": "ports", "var_value": "[80,443]"})
+    assert response.status_code == 200
+    assert [host["id"] for host in response.json()] == [web1]
+
+    response = client.get("/api/v1/hosts/", params={"var_name": "ports", "var_value": "null"})
+    assert [host["id"] for host in response.json()] == [db1]
+
+    response = client.get("/api/v1/hosts/", params={"var_name": "ports"})
+    assert len(response.json()) == 3
+
+
+def test_find_host_ids_by_dict_value(session: Session, test_data, json_mode):
+    """Testa que um dicionário só corresponde ao valor exato, não a um subconjunto."""
+    host_id = test_data["hosts"][0].id
+    HostVarService.create(session, HostVarCreate(
+        host_id=host_id, var_name="limits", var_value='{"cpu": 2, "mem": 4}'))
+    assert VarDocumentService.find_host_ids_by_var(session, "limits", {"mem": 4, "cpu": 2}) == [host_id]
+    assert VarDocumentService.find_host_ids_by_var(session, "limits", {"cpu": 2}) == []
+
+
+def test_postgresql_conditions_use_jsonb_operators():
+    """Testa que, no PostgreSQL, a busca compila para os operadores JSONB ? e @>."""
+    from sqlalchemy.dialects import postgresql
+    from sqlmodel import select
+    from app.models.inventory import HostVarDocument
+
+    def compile_condition(value=ANY_VALUE):
+        condition = VarDocumentService.host_var_condition("postgresql", "http_port", value)
+        statement = select(HostVarDocument.host_id).where(condition)
+        return str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "host_var_documents.vars ? %(param_1)s" in compile_condition()
+    compiled = compile_condition("8080")
+    assert "host_var_documents.vars @> %(param_1)s" in compiled
+    assert "LIKE" not in compiled
+    # Listas e dicionários: @> filtra pelo índice e -> garante a igualdade
+    compiled = compile_condition([80, 443])
+    assert "@>" in compiled and "(host_var_documents.vars -> %(param_2)s) = %(param_3)s::JSONB" in compiled
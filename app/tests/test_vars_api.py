@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+
+def test_read_host_vars_for_many_hosts(client: TestClient, test_data, mock_auth):
+    """Testa a busca em lote das variáveis de vários hosts."""
+    host_ids = [h.id for h in test_data["hosts"]]
+    response = client.get("/api/v1/host-vars/", params={"host_ids": host_ids})
+    assert response.status_code == 200
+    data = response.json()
+    assert {(v["host_id"], v["var_name"]) for v in data} == {
+        (host_ids[0], "ansible_host"), (host_ids[0], "http_port")}
+
+
+def test_read_group_vars_for_many_groups(client: TestClient, test_data, mock_auth):
+    """Testa a busca em lote das variáveis de vários grupos."""
+    group_ids = [g.id for g in test_data["groups"]]
+    response = client.get("/api/v1/group-vars/", params={"group_ids": group_ids})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+def test_replace_host_vars(client: TestClient, test_data, mock_auth):
+    """Testa a substituição do mapa completo de variáveis de um host."""
+    host_id = test_data["hosts"][0].id
+    original = {v.var_name: v.id for v in test_data["host_vars"]}
+
+    response = client.put(
+        f"/api/v1/hosts/{host_id}/vars",
+        json={"http_port": "9090", "env": "prod"}
+    )
+    assert response.status_code == 200
+    data = {v["var_name"]: v for v in response.json()}
+
+    assert set(data) == {"http_port", "env"}
+    assert data["http_port"]["var_value"] == "9090"
+    # Variáveis existentes são atualizadas no lugar, sem recriação
+    assert data["http_port"]["id"] == original["http_port"]
+
+
+def test_replace_group_vars_not_found(client: TestClient, mock_auth):
+    """Testa a substituição de variáveis de um grupo inexistente."""
+    response = client.put("/api/v1/groups/9999/vars", json={"a": "1"})
+    assert response.status_code == 404
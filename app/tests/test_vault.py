@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+pytest.importorskip("cryptography")
+
+from app.core.config import settings
+from app.core.vault import Vault, VaultError, decrypt, encrypt, is_vault_value, vault
+from app.services.host_var_service import HostVarService
+from app.schemas.inventory import HostVarCreate, HostVarUpdate
+
+
+@pytest.fixture(name="vault_password")
+def vault_password_fixture(monkeypatch):
+    """Configura uma senha de vault e executa as operações no próprio processo."""
+    monkeypatch.setattr(settings, "VAULT_PASSWORD", "segredo")
+    monkeypatch.setattr(settings, "VAULT_WORKERS", 0)
+    vault.clear_cache()
+    yield
+    vault.clear_cache()
+
+
+def test_encrypt_decrypt_roundtrip():
+    """Testa a criptografia no formato Ansible Vault 1.1."""
+    vault_text = encrypt("minha senha", "segredo")
+
+    assert vault_text.startswith("$ANSIBLE_VAULT;1.1;AES256\n")
+    assert all(len(line) <= 80 for line in vault_text.splitlines())
+    assert decrypt(vault_text, "segredo") == "minha senha"
+    with pytest.raises(VaultError):
+        decrypt(vault_text, "errada")
+
+
+def test_encrypted_var_is_stored_as_vault(session: Session, test_data, vault_password):
+    """Testa que variáveis marcadas como criptografadas são armazenadas cifradas."""
+    host_id = test_data["hosts"][0].id
+    var = HostVarService.create(session, HostVarCreate(
+        var_name="db_password", var_value="s3cr3t", is_encrypted=True, host_id=host_id))
+    assert is_vault_value(var.var_value)
+    assert vault.decrypt(var.var_value) == "s3cr3t"
+
+    # Ao remover a marcação, o valor volta a ser texto puro
+    var = HostVarService.update(session, var.id, HostVarUpdate(is_encrypted=False))
+    assert var.var_value == "s3cr3t"
+
+
+def test_export_emits_vault_or_decrypted(client: TestClient, session: Session, test_data,
+                                        mock_auth, vault_password):
+    """Testa a exportação com valores vault e a exportação administrativa descriptografada."""
+    host_id = test_data["hosts"][0].id
+    HostVarService.create(session, HostVarCreate(
+        var_name="db_password", var_value="s3cr3t", is_encrypted=True, host_id=host_id))
+
+    data = client.get("/api/v1/inventory/ansible-format").json()
+    value = data["webservers"]["hosts"]["web1"]["db_password"]
+    assert is_vault_value(value["__ansible_vault"])
+
+    data = client.get("/api/v1/inventory/ansible-format-admin").json()
+    assert data["webservers"]["hosts"]["web1"]["db_password"] == "s3cr3t"
+
+
+def test_decrypt_many_uses_pool_and_cache(monkeypatch):
+    """Testa a descriptografia em lote no pool de processos, o cache e as falhas isoladas."""
+    monkeypatch.setattr(settings, "VAULT_PASSWORD", "segredo")
+    monkeypatch.setattr(settings, "VAULT_WORKERS", 2)
+    monkeypatch.setattr(settings, "VAULT_CACHE_SIZE", 10)
+    texts = [encrypt(f"valor{i}", "segredo") for i in range(4)]
+
+    local_vault = Vault()
+    try:
+        invalid = encrypt("valor", "outra-senha")
+        result = local_vault.decrypt_many(texts + [invalid])
+        assert [result[text] for text in texts] == [f"valor{i}" for i in range(4)]
+        assert invalid not in result
+        assert local_vault.cache_misses == 5
+
+        local_vault.decrypt_many(texts)
+        assert local_vault.cache_hits == 4
+    finally:
+        local_vault.shutdown()
+
+
+def test_reveal_keeps_undecryptable_values(vault_password):
+    """Testa que um valor com outra senha continua cifrado sem impedir os demais."""
+    good, bad = encrypt("s3cr3t", "segredo"), encrypt("outro", "outra-senha")
+    variables = [{"db_password": {"__ansible_vault": good},
+                  "api_key": {"__ansible_vault": bad}, "port": 80}]
+
+    vault.reveal(variables)
+    assert variables == [{"db_password": "s3cr3t", "api_key": {"__ansible_vault": bad}, "port": 80}]
+    with pytest.raises(VaultError):
+        vault.decrypt(bad)
@@ -0,0 +1,19 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.tokens import make_token
+
+
+def test_token_validation(benchmark, client):
+    """GET /me: validação RS256 do token com a chave pública em cache"""
+    response = benchmark(client.get, "/api/v1/me")
+    assert response.status_code == 200
+
+
+def test_invalid_token(benchmark, client, keypair):
+    """Rejeição de um token expirado"""
+    expired = make_token(keypair, ttl=-60)
+    response = benchmark(client.get, "/api/v1/me",
+                         headers={"Authorization": f"Bearer {expired}"})
+    assert response.status_code == 401
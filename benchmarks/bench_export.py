@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services.inventory_service import InventoryService
+
+
+def test_export_ansible_inventory(benchmark, session, inventory):
+    """Montagem do inventário completo a partir do banco"""
+    result = benchmark(InventoryService.export_ansible_inventory, session)
+    assert len(result["all"]["children"]) >= 1
+
+
+def test_export_ansible_inventory_pattern(benchmark, session, inventory):
+    """Exportação restrita a um subconjunto de hosts"""
+    host_ids = inventory["host_ids"][::10]
+    benchmark(InventoryService.export_ansible_inventory, session, host_ids=host_ids)
+
+
+def test_export_endpoint(benchmark, client):
+    """GET /inventory/ansible-format, incluindo serialização e autenticação"""
+    response = benchmark(client.get, "/api/v1/inventory/ansible-format",
+                         headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+
+
+def test_export_endpoint_not_modified(benchmark, client):
+    """Requisição condicional com o inventário inalterado (304)"""
+    etag = client.get("/api/v1/inventory/ansible-format").headers["etag"]
+    response = benchmark(client.get, "/api/v1/inventory/ansible-format",
+                         headers={"If-None-Match": etag})
+    assert response.status_code == 304
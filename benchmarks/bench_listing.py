@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services.host_service import HostService
+
+
+def test_list_hosts(benchmark, client):
+    response = benchmark(client.get, "/api/v1/hosts/?limit=500")
+    assert response.status_code == 200
+
+
+def test_list_hosts_projected(benchmark, client):
+    response = benchmark(client.get, "/api/v1/hosts/?limit=500&fields=hostname,ansible_host")
+    assert response.status_code == 200
+
+
+def test_list_hosts_by_group(benchmark, client, inventory):
+    group_id = inventory["group_ids"][-1]
+    response = benchmark(client.get, f"/api/v1/hosts/?group_id={group_id}&limit=500")
+    assert response.status_code == 200
+
+
+def test_list_hosts_by_var(benchmark, client):
+    response = benchmark(client.get, "/api/v1/hosts/?var_name=var_000&var_value=true&limit=500")
+    assert response.status_code == 200
+
+
+def test_list_groups(benchmark, client):
+    response = benchmark(client.get, "/api/v1/groups/?limit=500")
+    assert response.status_code == 200
+
+
+def test_group_details(benchmark, client, inventory):
+    group_id = inventory["group_ids"][0]
+    response = benchmark(client.get, f"/api/v1/groups/{group_id}")
+    assert response.status_code == 200
+
+
+def test_host_details(benchmark, client, inventory):
+    host_id = inventory["host_ids"][len(inventory["host_ids"]) // 2]
+    response = benchmark(client.get, f"/api/v1/hosts/{host_id}")
+    assert response.status_code == 200
+
+
+def test_search_hosts(benchmark, session):
+    """Busca por substring em hostname, ansible_host e ansible_user"""
+    benchmark(HostService.search_hosts, session, "db-prod", 0, 500)
+
+
+def test_query_pattern(benchmark, client):
+    """Resolução de padrões de hosts (índice de associação em memória)"""
+    response = benchmark(client.get, "/api/v1/inventory/query",
+                         params={"pattern": "web*:&db*:!~^cache"})
+    assert response.status_code == 200
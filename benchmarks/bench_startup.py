@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.startup import measure_once, prepare_database
+
+
+@pytest.fixture(scope="module")
+def database_url(tmp_path_factory):
+    url = f"sqlite:///{os.path.join(tmp_path_factory.mktemp('startup'), 'startup.db')}"
+    prepare_database(url)
+    return url
+
+
+@pytest.mark.parametrize("mode", ["development", "production"])
+def test_cold_start(benchmark, database_url, mode):
+    """Importação de app.main e inicialização do lifespan em um processo novo"""
+    result = benchmark.pedantic(measure_once, args=(mode, database_url), rounds=5, iterations=1)
+    benchmark.extra_info.update(import_seconds=result["import"], startup_seconds=result["startup"])
+    # Nenhum módulo pesado é carregado na importação
+    assert result["modules"] == []
@@ -0,0 +1,55 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import insert
+
+from app.models.inventory import Group, GroupVar, HostGroupLink
+
+_sequence = itertools.count()
+
+
+def test_host_var_crud(benchmark, client, inventory):
+    """Ciclo criar/atualizar/excluir de uma variável de host pela API"""
+    host_id = inventory["host_ids"][0]
+
+    def crud():
+        name = f"bench_{next(_sequence)}"
+        created = client.post("/api/v1/host-vars/", json={
+            "var_name": name, "var_value": "1", "host_id": host_id})
+        var_id = created.json()["id"]
+        client.put(f"/api/v1/host-vars/{var_id}", json={"var_value": "2"})
+        return client.delete(f"/api/v1/host-vars/{var_id}")
+
+    assert benchmark(crud).status_code == 204
+
+
+def test_replace_host_vars(benchmark, client, inventory):
+    """Substituição do mapa de variáveis de um host"""
+    host_id = inventory["host_ids"][1]
+    values = {f"var_{index:03d}": str(index) for index in range(20)}
+    response = benchmark(client.put, f"/api/v1/hosts/{host_id}/vars", json=values)
+    assert response.status_code == 200
+
+
+def test_group_delete(benchmark, client, session, inventory):
+    """Exclusão de um grupo com hosts associados e variáveis"""
+    host_ids = inventory["host_ids"][:200]
+
+    def setup():
+        # Um grupo novo por rodada, criado fora da medição
+        group = Group(name=f"bench_delete_{next(_sequence)}")
+        session.add(group)
+        session.commit()
+        session.execute(insert(HostGroupLink.__table__), [
+            {"host_id": host_id, "group_id": group.id} for host_id in host_ids])
+        session.execute(insert(GroupVar.__table__), [
+            {"var_name": f"var_{index}", "var_value": "x", "is_encrypted": False,
+             "group_id": group.id} for index in range(10)])
+        session.commit()
+        return (f"/api/v1/groups/{group.id}",), {}
+
+    response = benchmark.pedantic(client.delete, setup=setup, rounds=20)
+    assert response.status_code == 204
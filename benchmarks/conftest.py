@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core import auth
+from app.db.session import get_session
+from app.main import app
+from benchmarks.datagen import InventorySpec, generate_inventory
+from benchmarks.tokens import generate_keypair, make_token, public_key_pem
+
+
+def _spec_from_environment() -> InventorySpec:
+    """Dimensões do inventário por variáveis BENCH_* (ex.: BENCH_HOSTS=10000)"""
+    defaults = InventorySpec()
+    return InventorySpec(**{
+        field: int(os.getenv(f"BENCH_{field.upper()}", str(getattr(defaults, field))))
+        for field in defaults.__dataclass_fields__
+    })
+
+
+@pytest.fixture(scope="session")
+def bench_engine(tmp_path_factory):
+    database = tmp_path_factory.mktemp("bench") / "inventory.db"
+    engine = create_engine(f"sqlite:///{database}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def inventory(bench_engine):
+    """Inventário sintético gerado uma vez por sessão"""
+    spec = _spec_from_environment()
+    with Session(bench_engine) as session:
+        result = generate_inventory(session, spec)
+    result["spec"] = spec
+    return result
+
+
+@pytest.fixture
+def session(bench_engine, inventory):
+    with Session(bench_engine) as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def keypair():
+    private_key, public_key = generate_keypair()
+    # A chave pública "obtida do Keycloak" fica no cache de app.core.auth
+    auth.keycloak_public_key = public_key_pem(public_key)
+    auth.keycloak_public_key_expiry = float("inf")
+    return private_key
+
+
+@pytest.fixture
+def client(bench_engine, inventory, keypair):
+    """
+    Cliente HTTP com uma sessão por requisição e autenticação real por JWT
+    (sem o lifespan da aplicação, que usaria o banco configurado).
+    """
+    def get_session_override():
+        with Session(bench_engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {make_token(keypair, roles=['admin'])}"
+    yield client
+    app.dependency_overrides.pop(get_session, None)
@@ -0,0 +1,169 @@
+"""
+Gerador de inventários sintéticos para benchmarks e testes de carga.
+
+Os dados são inseridos diretamente nas tabelas do SQLModel em lotes
+(INSERT com vários registros), sem passar pelos serviços nem pelo registro
+de alterações. Uso pela linha de comando, no banco configurado em `.env`:
+
+    python -m benchmarks.datagen --hosts 10000 --groups 500 --depth 4
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import argparse
+import random
+
+from sqlalchemy import func, insert, text
+from sqlmodel import Session, SQLModel, select
+
+from app.models.inventory import Group, GroupVar, Host, HostGroupLink, HostVar
+from app.services.var_document_service import VarDocumentService
+
+BATCH_SIZE = 5000
+
+_ROLES = ("web", "app", "db", "cache", "lb", "queue", "search", "monitor")
+_ENVIRONMENTS = ("prod", "stage", "dev")
+_SITES = ("gru", "iad", "fra", "nrt")
+_CONNECTIONS = ("ssh", "ssh", "ssh", "paramiko", "local")
+_VAR_VALUES = ("true", "false", "8080", "/usr/bin/python3", "info", "UTC",
+               "https://repo.example.com/stable", "deploy", "0.0.0.0")
+
+
+@dataclass
+class InventorySpec:
+    """Dimensões do inventário gerado"""
+    hosts: int = 1000
+    groups: int = 50
+    depth: int = 3
+    host_vars: int = 5
+    group_vars: int = 3
+    memberships: int = 2
+    seed: int = 42
+
+
+def _insert(session: Session, model, rows: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            session.execute(insert(model.__table__), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        session.execute(insert(model.__table__), batch)
+        count += len(batch)
+    return count
+
+
+def _next_id(session: Session, model) -> int:
+    return (session.exec(select(func.max(model.id))).one() or 0) + 1
+
+
+def _advance_sequences(session: Session, models) -> None:
+    """
+    No PostgreSQL, IDs inseridos explicitamente não avançam a sequência da
+    coluna: sem isto, o próximo INSERT da API repetiria um ID existente.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__tablename__
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT max(id) FROM {table}))"))
+
+
+def generate_inventory(session: Session, spec: Optional[InventorySpec] = None) -> Dict[str, Any]:
+    """
+    Gerar um inventário com `spec.groups` grupos distribuídos em `spec.depth`
+    níveis (cada grupo abaixo do primeiro nível tem um pai no nível
+    anterior), `spec.hosts` hosts em `spec.memberships` grupos cada e as
+    variáveis por host e por grupo. Os IDs continuam a partir dos existentes
+    e, no PostgreSQL, as sequências são ajustadas ao final.
+    Retorna a contagem de registros inseridos e os IDs gerados.
+    """
+    spec = spec or InventorySpec()
+    rng = random.Random(spec.seed)
+    now = datetime.now()
+    depth = max(1, spec.depth)
+
+    first_group = _next_id(session, Group)
+    levels: List[List[int]] = [[] for _ in range(depth)]
+    group_rows = []
+    for index in range(spec.groups):
+        group_id = first_group + index
+        level = min(depth - 1, index * depth // max(1, spec.groups))
+        parent_id = rng.choice(levels[level - 1]) if level and levels[level - 1] else None
+        levels[level].append(group_id)
+        prefix = _SITES[index % len(_SITES)] if level == 0 else _ROLES[index % len(_ROLES)]
+        group_rows.append({"id": group_id, "name": f"{prefix}_{group_id}",
+                           "parent_group_id": parent_id, "created_at": now, "updated_at": now})
+    group_ids = [row["id"] for row in group_rows]
+
+    first_host = _next_id(session, Host)
+    host_rows = []
+    for index in range(spec.hosts):
+        host_id = first_host + index
+        role, environment = _ROLES[index % len(_ROLES)], _ENVIRONMENTS[index % len(_ENVIRONMENTS)]
+        host_rows.append({
+            "id": host_id,
+            "hostname": f"{role}-{environment}-{host_id:06d}.{_SITES[index % len(_SITES)]}.example.com",
+            "ansible_host": f"10.{(host_id >> 16) & 255}.{(host_id >> 8) & 255}.{host_id & 255}",
+            "ansible_port": 22,
+            "ansible_user": "deploy",
+            "ansible_connection": _CONNECTIONS[index % len(_CONNECTIONS)],
+            "created_at": now,
+            "updated_at": now,
+        })
+    host_ids = [row["id"] for row in host_rows]
+
+    def memberships():
+        per_host = min(spec.memberships, len(group_ids))
+        for host_id in host_ids:
+            for group_id in rng.sample(group_ids, per_host):
+                yield {"host_id": host_id, "group_id": group_id}
+
+    def variables(owner_ids, owner_key, per_owner):
+        for owner_id in owner_ids:
+            for index in range(per_owner):
+                yield {"var_name": f"var_{index:03d}", "var_value": rng.choice(_VAR_VALUES),
+                       "is_encrypted": False, owner_key: owner_id,
+                       "created_at": now, "updated_at": now}
+
+    counts = {
+        "groups": _insert(session, Group, group_rows),
+        "hosts": _insert(session, Host, host_rows),
+        "memberships": _insert(session, HostGroupLink, memberships()),
+        "group_vars": _insert(session, GroupVar, variables(group_ids, "group_id", spec.group_vars)),
+        "host_vars": _insert(session, HostVar, variables(host_ids, "host_id", spec.host_vars)),
+    }
+    _advance_sequences(session, (Group, Host))
+    session.commit()
+
+    # No modo "json", os documentos de variáveis são derivados das linhas
+    if VarDocumentService.is_enabled():
+        VarDocumentService.rebuild(session)
+
+    return {"counts": counts, "group_ids": group_ids, "host_ids": host_ids}
+
+
+def main(argv=None) -> None:
+    defaults = InventorySpec()
+    parser = argparse.ArgumentParser(description="Gerar um inventário sintético no banco configurado")
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=value)
+    args = parser.parse_args(argv)
+
+    from app.db.session import get_engine
+
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+    spec = InventorySpec(**{field: getattr(args, field) for field in asdict(defaults)})
+    with Session(engine) as session:
+        result = generate_inventory(session, spec)
+    print(", ".join(f"{name}: {count}" for name, count in result["counts"].items()))
+
+
+if __name__ == "__main__":
+    main()
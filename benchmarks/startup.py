@@ -0,0 +1,113 @@
+"""
+Tempo de importação e de inicialização da aplicação, medidos em processos
+Python novos (sem módulos em cache), contra um banco SQLite temporário:
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --mode production --json resultado.json
+
+- import: `import app.main`
+- startup: a fase de inicialização do lifespan, até a aplicação aceitar
+  requisições
+- modules: módulos de terceiros pesados carregados na importação
+
+No modo "production", o banco é preparado antes com `app.db.init_db`, como
+na implantação.
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos cuja importação deve ser adiada para fora da inicialização
+TRACKED_MODULES = ("requests", "jose", "yaml", "cryptography", "httpx")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+# Antes do lifespan: no modo "production", o aquecimento em segundo plano
+# carrega requests a qualquer momento depois disso
+modules = [name for name in %r if name in sys.modules]
+
+async def startup():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        ready = time.perf_counter()
+    return ready
+
+import asyncio
+ready = asyncio.run(startup())
+print(json.dumps({"import": imported - started, "startup": ready - imported,
+                  "modules": modules}))
+"""
+
+
+def measure_once(mode: str, database_url: str) -> Dict[str, Any]:
+    env = {**os.environ, "STARTUP_MODE": mode, "DATABASE_TYPE": "sqlite",
+           "DATABASE_URL_SQLITE": database_url, "PYTHONDONTWRITEBYTECODE": "1",
+           # Sem servidor de identidade: o aquecimento apenas registra a falha
+           "KEYCLOAK_SERVER_URL": os.environ.get("KEYCLOAK_SERVER_URL", "http://127.0.0.1:9")}
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE % (TRACKED_MODULES,)], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def prepare_database(database_url: str) -> None:
+    env = {**os.environ, "DATABASE_TYPE": "sqlite", "DATABASE_URL_SQLITE": database_url}
+    subprocess.run([sys.executable, "-m", "app.db.init_db"], cwd=ROOT, env=env,
+                   capture_output=True, check=True)
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+
+def run(mode: str = "development", runs: int = 5) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'startup.db')}"
+        if mode == "production":
+            prepare_database(database_url)
+        results = [measure_once(mode, database_url) for _ in range(runs)]
+    return {
+        "mode": mode,
+        "runs": runs,
+        "python": sys.version.split()[0],
+        "import": _summary([result["import"] for result in results]),
+        "startup": _summary([result["startup"] for result in results]),
+        "modules": results[-1]["modules"],
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    lines = [f"Modo {result['mode']}, {result['runs']} execuções (Python {result['python']})"]
+    for phase in ("import", "startup"):
+        values = result[phase]
+        lines.append(f"  {phase:<8} mediana {values['median'] * 1000:8.1f} ms  "
+                     f"(mín {values['min'] * 1000:.1f}, máx {values['max'] * 1000:.1f})")
+    lines.append(f"  módulos pesados carregados: {', '.join(result['modules']) or 'nenhum'}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Medir a importação e a inicialização da API")
+    parser.add_argument("--mode", choices=("development", "production"), default="development")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="gravar o resultado em um arquivo JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args.mode, args.runs)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(result, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Par de chaves RSA e tokens JWT locais, no formato emitido pelo Keycloak,
+para exercitar a validação real de tokens sem um servidor de identidade.
+"""
+from typing import Dict, List, Tuple
+import base64
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+
+def generate_keypair() -> Tuple[str, str]:
+    """Retorna (chave privada PEM, chave pública em base64 como no Keycloak)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()).decode("ascii")
+    public_der = key.public_key().public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem, base64.b64encode(public_der).decode("ascii")
+
+
+def public_key_pem(public_key: str) -> str:
+    """Chave pública no formato montado por `app.core.auth`"""
+    return f"-----BEGIN PUBLIC KEY-----\n{public_key}\n-----END PUBLIC KEY-----"
+
+
+def make_token(private_key: str, username: str = "bench", roles: List[str] = (),
+               ttl: int = 3600) -> str:
+    now = int(time.time())
+    claims: Dict = {
+        "preferred_username": username,
+        "email": f"{username}@example.com",
+        "name": username,
+        "realm_access": {"roles": list(roles)},
+        "iat": now,
+        "exp": now + ttl,
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Inventário dinâmico do Ansible para a Ansible Inventory API, com cache local.
+
+Uso:
+    ansible-playbook -i contrib/ansible_inventory.py playbook.yml
+    ./contrib/ansible_inventory.py --list
+    ./contrib/ansible_inventory.py --host web1
+
+O inventário é guardado em disco com a revisão e a ETag recebidas. Nas
+execuções seguintes:
+
+- dentro de ANSIBLE_INVENTORY_API_CACHE_TTL segundos, o cache é usado sem
+  acessar a rede;
+- depois disso, o cliente pede apenas o delta desde a revisão do cache
+  (`/inventory/ansible-format/delta`) com `If-None-Match`: um inventário
+  inalterado custa uma resposta 304 sem corpo; se o servidor não tiver o
+  endpoint de delta, usa uma requisição condicional de `/ansible-format`;
+- as respostas são pedidas com gzip;
+- se a API estiver indisponível, o cache (mesmo expirado) é usado.
+
+Configuração por variáveis de ambiente:
+
+    ANSIBLE_INVENTORY_API_URL       URL base da API (ex.: https://inventario/api/v1)
+    ANSIBLE_INVENTORY_API_TOKEN     token de acesso (Bearer)
+    ANSIBLE_INVENTORY_API_USERNAME  / ANSIBLE_INVENTORY_API_PASSWORD
+                                    credenciais para /auth/login, se não houver token
+    ANSIBLE_INVENTORY_API_PATTERN   padrão de hosts (ex.: web:&prod); sem delta
+    ANSIBLE_INVENTORY_API_CACHE     arquivo de cache (padrão em ~/.cache)
+    ANSIBLE_INVENTORY_API_CACHE_TTL segundos em que o cache é usado sem consulta (0)
+    ANSIBLE_INVENTORY_API_TIMEOUT   timeout das requisições em segundos (30)
+    ANSIBLE_INVENTORY_API_SSL_VERIFY  "false" desativa a verificação TLS
+
+Depende apenas da biblioteca padrão.
+"""
+from typing import Any, Callable, Dict, Optional
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import ssl
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+CACHE_VERSION = 1
+
+
+class InventoryClientError(Exception):
+    pass
+
+
+def apply_delta(inventory: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplicar um delta de /inventory/ansible-format/delta ao inventário local"""
+    if delta["full"]:
+        groups = delta["groups"]
+    else:
+        groups = {name: delta["groups"].get(name, inventory.get(name))
+                  for name in delta["children"]}
+    children = [name for name in delta["children"] if groups.get(name) is not None]
+    return {"all": {"children": children}, **{name: groups[name] for name in children}}
+
+
+def to_script_format(inventory: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converter o inventário da API (hosts com variáveis dentro de cada grupo)
+    para o formato de inventário dinâmico do Ansible, com `_meta.hostvars`.
+    """
+    result: Dict[str, Any] = {"all": {"children": list(inventory["all"]["children"])}}
+    hostvars: Dict[str, Dict[str, Any]] = {}
+    for name in inventory["all"]["children"]:
+        group = inventory[name]
+        result[name] = {
+            "hosts": list(group["hosts"]),
+            "vars": group.get("vars", {}),
+            "children": group.get("children", []),
+        }
+        for hostname, values in group["hosts"].items():
+            hostvars.setdefault(hostname, {}).update(values)
+    result["_meta"] = {"hostvars": hostvars}
+    return result
+
+
+class InventoryClient:
+    def __init__(self, base_url: str, token: Optional[str] = None,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 pattern: Optional[str] = None, cache_path: Optional[str] = None,
+                 cache_ttl: float = 0, timeout: float = 30, ssl_verify: bool = True,
+                 opener: Optional[Callable] = None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.username = username
+        self.password = password
+        self.pattern = pattern
+        self.cache_path = cache_path or self.default_cache_path(self.base_url, pattern)
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.context = None if ssl_verify else ssl._create_unverified_context()
+        self.opener = opener or urllib.request.urlopen
+
+    @staticmethod
+    def default_cache_path(base_url: str, pattern: Optional[str]) -> str:
+        key = hashlib.sha1(f"{base_url}\x1f{pattern or ''}".encode("utf-8")).hexdigest()[:16]
+        cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(cache_dir, "ansible-inventory-api", f"{key}.json")
+
+    # Cache em disco
+
+    def load_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_path) as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        return cache if cache.get("version") == CACHE_VERSION else None
+
+    def save_cache(self, inventory: Dict[str, Any], revision: Optional[int],
+                   etag: Optional[str]) -> Dict[str, Any]:
+        cache = {"version": CACHE_VERSION, "revision": revision, "etag": etag,
+                 "fetched_at": time.time(), "inventory": inventory}
+        directory = os.path.dirname(self.cache_path)
+        os.makedirs(directory, exist_ok=True)
+        # Gravação atômica: execuções concorrentes nunca leem um cache parcial
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".inventory.")
+        try:
+            with os.fdopen(descriptor, "w") as cache_file:
+                json.dump(cache, cache_file, separators=(",", ":"))
+            os.replace(temporary, self.cache_path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        return cache
+
+    # HTTP
+
+    def _login(self) -> str:
+        body = json.dumps({"username": self.username, "password": self.password}).encode("utf-8")
+        status, _, content = self._request(
+            "/auth/login", data=body, headers={"Content-Type": "application/json"},
+            authenticate=False)
+        if status != 200:
+            raise InventoryClientError(f"Falha na autenticação (HTTP {status})")
+        return json.loads(content)["access_token"]
+
+    def _request(self, path: str, headers: Optional[Dict[str, str]] = None,
+                 data: Optional[bytes] = None, authenticate: bool = True):
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip", **(headers or {})}
+        if authenticate:
+            if self.token is None and self.username:
+                self.token = self._login()
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+        try:
+            response = self.opener(request, timeout=self.timeout, context=self.context)
+        except urllib.error.HTTPError as e:
+            # 304 e erros HTTP chegam como exceção no urllib
+            return e.code, e.headers, e.read()
+        with response:
+            content = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                content = gzip.decompress(content)
+            return response.status, response.headers, content
+
+    def _revision(self, headers) -> Optional[int]:
+        value = headers.get("X-Inventory-Revision")
+        return int(value) if value is not None else None
+
+    def fetch_full(self, cache: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        path = "/inventory/ansible-format"
+        if self.pattern:
+            path += "?" + urllib.parse.urlencode({"pattern": self.pattern})
+        headers = {"If-None-Match": cache["etag"]} if cache and cache.get("etag") else {}
+        status, response_headers, content = self._request(path, headers)
+        if status == 304 and cache:
+            return self.save_cache(cache["inventory"], cache["revision"], cache["etag"])
+        if status != 200:
+            raise InventoryClientError(f"Erro ao obter o inventário (HTTP {status})")
+        return self.save_cache(json.loads(content), self._revision(response_headers),
+                               response_headers.get("ETag"))
+
+    def fetch_delta(self, cache: Dict[str, Any]) -> Dict[str, Any]:
+        path = "/inventory/ansible-format/delta?" + urllib.parse.urlencode(
+            {"since": cache["revision"]})
+        headers = {"If-None-Match": cache["etag"]} if cache.get("etag") else {}
+        status, response_headers, content = self._request(path, headers)
+        if status == 304:
+            return self.save_cache(cache["inventory"], cache["revision"], cache["etag"])
+        if status == 404:
+            # Servidor sem suporte a delta
+            return self.fetch_full(cache)
+        if status != 200:
+            raise InventoryClientError(f"Erro ao obter o delta do inventário (HTTP {status})")
+        delta = json.loads(content)
+        return self.save_cache(apply_delta(cache["inventory"], delta), delta["revision"],
+                               response_headers.get("ETag"))
+
+    def get_inventory(self) -> Dict[str, Any]:
+        cache = self.load_cache()
+        if cache and self.cache_ttl > 0 and time.time() - cache["fetched_at"] < self.cache_ttl:
+            return cache["inventory"]
+        try:
+            if cache and not self.pattern and cache.get("revision") is not None:
+                return self.fetch_delta(cache)["inventory"]
+            return self.fetch_full(cache)["inventory"]
+        except (OSError, InventoryClientError, ValueError) as e:
+            if cache is None:
+                raise
+            print(f"Aviso: usando o inventário em cache ({e})", file=sys.stderr)
+            return cache["inventory"]
+
+
+def client_from_environment() -> InventoryClient:
+    base_url = os.environ.get("ANSIBLE_INVENTORY_API_URL")
+    if not base_url:
+        raise InventoryClientError("ANSIBLE_INVENTORY_API_URL não configurada")
+    return InventoryClient(
+        base_url=base_url,
+        token=os.environ.get("ANSIBLE_INVENTORY_API_TOKEN"),
+        username=os.environ.get("ANSIBLE_INVENTORY_API_USERNAME"),
+        password=os.environ.get("ANSIBLE_INVENTORY_API_PASSWORD"),
+        pattern=os.environ.get("ANSIBLE_INVENTORY_API_PATTERN"),
+        cache_path=os.environ.get("ANSIBLE_INVENTORY_API_CACHE"),
+        cache_ttl=float(os.environ.get("ANSIBLE_INVENTORY_API_CACHE_TTL", "0")),
+        timeout=float(os.environ.get("ANSIBLE_INVENTORY_API_TIMEOUT", "30")),
+        ssl_verify=os.environ.get("ANSIBLE_INVENTORY_API_SSL_VERIFY", "true").lower() != "false",
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inventário dinâmico da Ansible Inventory API")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--list", action="store_true", help="listar todo o inventário")
+    group.add_argument("--host", help="variáveis de um host")
+    args = parser.parse_args(argv)
+
+    try:
+        inventory = to_script_format(client_from_environment().get_inventory())
+    except (OSError, InventoryClientError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    if args.list:
+        json.dump(inventory, sys.stdout)
+    else:
+        json.dump(inventory["_meta"]["hostvars"].get(args.host, {}), sys.stdout)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Driver HTTP assíncrono para testes de carga da API.
+
+Vários clientes concorrentes escolhem cenários segundo pesos configuráveis
+(exportação, listagens, detalhes, escritas, login) durante um tempo fixo, e o
+relatório traz p50/p95/p99, média e vazão por rota:
+
+    python -m loadtest.driver --url http://127.0.0.1:8000/api/v1 \\
+        --concurrency 32 --duration 30 --mix export=1,list=5,detail=5,write=1
+"""
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+
+import httpx
+
+DEFAULT_MIX = {"export": 1, "list": 4, "detail": 4, "write": 1}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Cenário desconhecido: '{name}' (use {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil pelo método do posto mais próximo (valores já ordenados)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        values = sorted(self.latencies)
+        count = len(values)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+
+
+class LoadDriver:
+    """
+    Executa os cenários com `concurrency` clientes simultâneos. As rotas são
+    agregadas pelo modelo do caminho (por exemplo `GET /hosts/{id}`), para
+    que os percentis não se dispersem por ID.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, mix: Optional[Dict[str, float]] = None,
+                 username: str = "admin-load", password: str = "load", seed: int = 1):
+        self.client = client
+        self.mix = mix or DEFAULT_MIX
+        self.username = username
+        self.password = password
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, RouteStats] = {}
+        self.host_ids: List[int] = []
+        self.group_ids: List[int] = []
+        self._sequence = itertools.count()
+
+    async def _call(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            await response.aread()
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - started
+        stats = self.stats.setdefault(route, RouteStats())
+        if response is None or response.status_code >= 400:
+            stats.errors += 1
+        else:
+            stats.latencies.append(elapsed)
+        return response
+
+    async def login(self) -> None:
+        response = await self._call("POST /auth/login", "POST", "/auth/login", json={
+            "username": self.username, "password": self.password})
+        if response is None or response.status_code != 200:
+            raise RuntimeError("Falha no login do driver de carga")
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    async def prepare(self) -> None:
+        """Autenticar e obter os IDs usados nos cenários de detalhe e escrita"""
+        await self.login()
+        hosts = await self.client.get("/hosts/", params={"limit": 1000, "fields": "id"})
+        groups = await self.client.get("/groups/", params={"limit": 1000, "fields": "id"})
+        self.host_ids = [host["id"] for host in hosts.json()]
+        self.group_ids = [group["id"] for group in groups.json()]
+        if not self.host_ids or not self.group_ids:
+            raise RuntimeError("O inventário está vazio; gere dados com benchmarks.datagen")
+
+    # Cenários
+
+    async def scenario_export(self) -> None:
+        await self._call("GET /inventory/ansible-format", "GET", "/inventory/ansible-format")
+
+    async def scenario_list(self) -> None:
+        choice = self.rng.random()
+        if choice < 0.4:
+            await self._call("GET /hosts/", "GET", "/hosts/", params={"limit": 100})
+        elif choice < 0.7:
+            await self._call("GET /hosts/?group_id", "GET", "/hosts/", params={
+                "group_id": self.rng.choice(self.group_ids), "limit": 100})
+        else:
+            await self._call("GET /groups/", "GET", "/groups/", params={"limit": 100})
+
+    async def scenario_detail(self) -> None:
+        if self.rng.random() < 0.6:
+            await self._call("GET /hosts/{id}", "GET", f"/hosts/{self.rng.choice(self.host_ids)}")
+        else:
+            await self._call("GET /groups/{id}", "GET", f"/groups/{self.rng.choice(self.group_ids)}")
+
+    async def scenario_write(self) -> None:
+        host_id = self.rng.choice(self.host_ids)
+        response = await self._call("POST /host-vars/", "POST", "/host-vars/", json={
+            "var_name": f"load_{next(self._sequence)}", "var_value": "1", "host_id": host_id})
+        if response is not None and response.status_code == 201:
+            var_id = response.json()["id"]
+            await self._call("PUT /host-vars/{id}", "PUT", f"/host-vars/{var_id}",
+                             json={"var_value": "2"})
+            await self._call("DELETE /host-vars/{id}", "DELETE", f"/host-vars/{var_id}")
+
+    async def scenario_auth(self) -> None:
+        await self._call("POST /auth/login", "POST", "/auth/login", json={
+            "username": self.username, "password": self.password})
+
+    async def _worker(self, deadline: float, scenarios: List[Callable], weights: List[float]) -> None:
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(scenarios, weights)[0]
+            await scenario(self)
+
+    async def run(self, concurrency: int, duration: float) -> Dict[str, Any]:
+        # As estatísticas da preparação não entram no relatório
+        self.stats = {}
+        names = [name for name, weight in self.mix.items() if weight > 0]
+        scenarios = [SCENARIOS[name] for name in names]
+        weights = [self.mix[name] for name in names]
+        started = time.perf_counter()
+        await asyncio.gather(*(self._worker(started + duration, scenarios, weights)
+                               for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        routes = {route: stats.summary(elapsed) for route, stats in sorted(self.stats.items())}
+        total = RouteStats([value for stats in self.stats.values() for value in stats.latencies],
+                           sum(stats.errors for stats in self.stats.values()))
+        return {"concurrency": concurrency, "duration": round(elapsed, 2), "mix": self.mix,
+                "routes": routes, "total": total.summary(elapsed)}
+
+
+SCENARIOS = {
+    "export": LoadDriver.scenario_export,
+    "list": LoadDriver.scenario_list,
+    "detail": LoadDriver.scenario_detail,
+    "write": LoadDriver.scenario_write,
+    "auth": LoadDriver.scenario_auth,
+}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    header = f"{'rota':<32} {'req':>7} {'erros':>6} {'req/s':>8} {'média':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    lines = [f"concorrência {report['concurrency']}, {report['duration']} s", header, "-" * len(header)]
+    for route, summary in list(report["routes"].items()) + [("TOTAL", report["total"])]:
+        lines.append(
+            f"{route:<32} {summary['requests']:>7} {summary['errors']:>6} {summary['rps']:>8} "
+            f"{summary['mean_ms']:>8} {summary['p50_ms']:>8} {summary['p95_ms']:>8} {summary['p99_ms']:>8}")
+    lines.append("(latências em ms)")
+    return "\n".join(lines)
+
+
+async def run_load(url: str, concurrency: int, duration: float, mix: Dict[str, float],
+                   username: str, password: str, timeout: float = 30.0) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        driver = LoadDriver(client, mix, username, password)
+        await driver.prepare()
+        return await driver.run(concurrency, duration)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga da Ansible Inventory API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="pesos dos cenários, ex.: export=1,list=5,detail=5,write=1,auth=0")
+    parser.add_argument("--username", default="admin-load")
+    parser.add_argument("--password", default="load")
+    parser.add_argument("--json", dest="json_path", help="gravar o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(args.url, args.concurrency, args.duration, args.mix,
+                                  args.username, args.password))
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Servidor mínimo compatível com o Keycloak para testes de carga: publica a
+chave pública do realm (consultada por `app.core.auth`) e emite tokens RS256
+no endpoint OpenID Connect usado por `/auth/login` e `/auth/refresh`.
+
+    python -m loadtest.keycloak_stub --port 8180 --latency-ms 20
+
+A latência artificial simula as idas ao Keycloak real. Qualquer usuário é
+aceito com a senha configurada (--password, padrão "load"); usuários cujo
+nome começa com "admin" recebem o papel admin.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+
+from benchmarks.tokens import generate_keypair, make_token, public_key_pem
+
+ACCESS_TOKEN_TTL = 3600
+REFRESH_TOKEN_TTL = 86400
+
+
+def create_stub_app(realm: str = "your-realm", password: str = "load",
+                    latency_ms: float = 0.0) -> FastAPI:
+    private_key, public_key = generate_keypair()
+    verify_key = public_key_pem(public_key)
+    app = FastAPI(title="Keycloak stub")
+    app.state.stats = {"realm": 0, "token": 0}
+
+    async def delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    def issue(username: str) -> dict:
+        roles = ["admin", "user"] if username.startswith("admin") else ["user"]
+        refresh = jwt.encode({"sub": username, "typ": "Refresh", "jti": uuid.uuid4().hex,
+                              "exp": int(time.time()) + REFRESH_TOKEN_TTL},
+                             private_key, algorithm="RS256")
+        return {
+            "access_token": make_token(private_key, username, roles, ACCESS_TOKEN_TTL),
+            "token_type": "Bearer",
+            "expires_in": ACCESS_TOKEN_TTL,
+            "refresh_token": refresh,
+            "refresh_expires_in": REFRESH_TOKEN_TTL,
+        }
+
+    @app.get(f"/realms/{realm}")
+    async def realm_info():
+        app.state.stats["realm"] += 1
+        await delay()
+        return {"realm": realm, "public_key": public_key}
+
+    @app.post(f"/realms/{realm}/protocol/openid-connect/token")
+    async def token(request: Request):
+        app.state.stats["token"] += 1
+        await delay()
+        # Formulário lido diretamente, sem depender do python-multipart
+        form = {key: values[0] for key, values in parse_qs((await request.body()).decode()).items()}
+        grant_type, username = form.get("grant_type"), form.get("username")
+        refresh_token = form.get("refresh_token")
+        if grant_type == "password":
+            if not username or form.get("password") != password:
+                return JSONResponse(status_code=401, content={
+                    "error": "invalid_grant", "error_description": "Invalid user credentials"})
+            return issue(username)
+        if grant_type == "refresh_token" and refresh_token:
+            try:
+                claims = jwt.decode(refresh_token, verify_key, algorithms=["RS256"],
+                                    options={"verify_aud": False})
+            except JWTError:
+                return JSONResponse(status_code=400, content={
+                    "error": "invalid_grant", "error_description": "Invalid refresh token"})
+            return issue(claims["sub"])
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="unsupported_grant_type")
+
+    app.state.private_key = private_key
+    return app
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Keycloak simulado para testes de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8180)
+    parser.add_argument("--realm", default="your-realm")
+    parser.add_argument("--password", default="load")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run(create_stub_app(args.realm, args.password, args.latency_ms),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
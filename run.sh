@@ -3,5 +3,11 @@
 # Ativando o ambiente virtual
 source .venv/bin/activate
 
-# Executando a aplicação
-python -m app
\ No newline at end of file
+# Executando a aplicação:
+#   ./run.sh             desenvolvimento (python -m app: reload, um worker)
+#   ./run.sh production  produção (python -m app.server, variáveis SERVER_*)
+if [ "$1" = "production" ]; then
+    export STARTUP_MODE="${STARTUP_MODE:-production}"
+    exec python -m app.server
+fi
+exec python -m app